@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import api_codec
+import history_store
+from api_codec import Payload
+from synthetic import make_history
+
+# /api/history 응답 크기(전송 바이트)와 직렬화 시간
+#   이전: 소수 3자리 json.dumps (압축 없음, 매 요청 전체 전송)
+#   이후: 소수 2자리(수위계 정밀도) + 형식(json / columnar / arrow) x 압축(없음 / gzip / br)
+#         + 같은 날짜 재요청은 캐시된 압축본, 브라우저가 ETag 를 보내면 304 (본문 0 바이트)
+# 하루치(1분 간격 1440행) 와 기간 조회(1주 10분 평균) 두 가지
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def before(build):
+    decimals, history_store.VALUE_DECIMALS = history_store.VALUE_DECIMALS, 3
+    try:
+        return json.dumps(build()).encode('utf-8')
+    finally:
+        history_store.VALUE_DECIMALS = decimals
+
+
+def report(title, build, repeat):
+    data = build()
+    print(f"\n=== {title} ({len(data['sea'])}행) ===")
+    old = before(build)
+    t_old = best_of(lambda: before(build), repeat)
+    print(f"  {'이전 json(3자리)':24s} {len(old):>9,d} B  직렬화 {t_old * 1000:7.2f} ms")
+
+    encodings = [None, 'gzip'] + (['br'] if api_codec.brotli is not None else [])
+    for fmt in api_codec.FORMATS:
+        payload = Payload(data, fmt)
+        t_enc = best_of(lambda: Payload(build(), fmt), repeat)
+        for encoding in encodings:
+            body = api_codec.compress(payload.body, encoding) if encoding else payload.body
+            t_comp = best_of(lambda: api_codec.compress(payload.body, encoding), repeat) if encoding else 0.0
+            label = f"{fmt}+{encoding or '무압축'}"
+            print(f"  {label:24s} {len(body):>9,d} B (x{len(old) / len(body):5.1f})  "
+                  f"직렬화 {t_enc * 1000:7.2f} ms + 압축 {t_comp * 1000:6.2f} ms")
+    print("  (같은 날짜 재요청: 캐시된 압축본을 그대로 전송, If-None-Match 일치 시 304 + 0 B)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="데이터 API 응답 크기 / 직렬화 시간")
+    parser.add_argument('--days', type=int, default=30, help="합성 과거 CSV 일수")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'sihwa_history.csv')
+        make_history(csv_path, args.days)
+        store = history_store.HistoryStore.from_csv(csv_path)
+
+    print(f"📦 brotli {'사용 가능' if api_codec.brotli is not None else '없음 (gzip 만)'}")
+    report("하루치 /api/history/2024-01-05", lambda: store._day('2024-01-05'), args.repeat)
+    report("1주 /api/history?start=2024-01-01&end=2024-01-07 (10분 평균)",
+           lambda: store.range('2024-01-01', '2024-01-07'), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import chunked
+from baseline_learner import BaselineLearner
+from data_loader import load, load_compact
+from event_engine import CLEAN_COST, SMP, RainEventEngine
+from lag_scan import after_rain_comparison
+from loss_engine import loss_won
+from rain_features import pattern_features
+from synthetic import hourly_frames
+
+# chunk 단위 분석(chunked.run) vs 한 번에 읽기(chunk_rows=None)
+#   시간 / 최대 메모리(tracemalloc, 프로세스 풀을 쓰면 부모 프로세스 것만) / 결과가 정확히 같은지
+#   CSV 와 Parquet 둘 다 (Parquet 는 pyarrow 가 있을 때)
+# 한 번에 읽은 결과는 다시 스크립트들이 쓰는 메모리 내 코드 경로와 비교 (reference):
+#   BaselineLearner.fit / loss_won / RainEventEngine / pattern_features 는 비트 단위로 같아야 하고,
+#   00.py 의 비교 표(lag_scan.after_rain_comparison, float32 groupby 평균)는 chunked.COMPARISON_RTOL 이내
+
+
+def run(merged, rain, chunk_rows, workers, memory):
+    if memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    result = chunked.run(merged, rain, chunk_rows=chunk_rows, max_workers=workers)
+    seconds = time.perf_counter() - t0
+    peak = 0
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def same(a, b):
+    for key in ('clean_rows', 'global_baseline', 'peak_rain', 'peak_ts', 'total_loss_won'):
+        if a[key] != b[key]:
+            return False
+    return (a['group_baseline'].equals(b['group_baseline']) and a['comparison'].equals(b['comparison'])
+            and a['event_cum_loss'].equals(b['event_cum_loss']) and a['monthly'].equals(b['monthly'])
+            and a['engine'].summary(10 ** 6) == b['engine'].summary(10 ** 6))
+
+
+def reference(merged, rain, lag):
+    """같은 파일을 스크립트들과 같은 메모리 내 코드 경로로 계산 (Baseline / 00 / decision / 02_pattern)"""
+    df = load_compact(merged, use_cache=False)
+    learner = BaselineLearner.fit(df)
+    table = learner.as_table()
+    _, comparison = after_rain_comparison(df, lag)
+    loss = loss_won(df['낙차'].to_numpy(), df['합계(킬로와트시)'].to_numpy(), table, SMP)
+
+    # decision.py: 최대 강우일(0시) -1일 ~ +2일
+    peak_ts = df.loc[df['평균강수량(mm)'].idxmax(), '일시']
+    day, peak_day = df['일시'].dt.normalize(), peak_ts.normalize()
+    in_event = ((day >= peak_day - pd.Timedelta(hours=24)) & (day <= peak_day + pd.Timedelta(hours=48))).to_numpy()
+    return {
+        'clean_rows': int(learner.count[-1]), 'global_baseline': learner.global_baseline,
+        'group_baseline': learner.group_baseline(), 'comparison': comparison,
+        'peak_rain': float(df['평균강수량(mm)'].max()), 'peak_ts': peak_ts,
+        'loss': loss, 'event_cum_loss': pd.Series(loss[in_event]).cumsum().to_numpy(),
+        'engine': RainEventEngine(table, smp=SMP, clean_cost=CLEAN_COST).replay(df),
+        'monthly': pattern_features(load('rain', rain, use_cache=False), freq='M'),
+    }
+
+
+def equivalent(result, ref):
+    """chunked.run 결과 vs reference -> 다른 항목 목록 (비어 있으면 통과)"""
+    diffs = [key for key in ('clean_rows', 'global_baseline', 'peak_rain', 'peak_ts') if result[key] != ref[key]]
+    if not result['group_baseline'].equals(ref['group_baseline']):
+        diffs.append('group_baseline')
+    if result['total_loss_won'] != math.fsum(ref['loss']):
+        diffs.append('total_loss_won')
+    if not np.array_equal(result['event_cum_loss'].to_numpy(), ref['event_cum_loss']):
+        diffs.append('event_cum_loss')
+    if result['engine'].summary(10 ** 6) != ref['engine'].summary(10 ** 6):
+        diffs.append('engine')
+    if not result['monthly'].equals(ref['monthly']):
+        diffs.append('monthly')
+
+    # 00.py 표: 같은 구간 / 상태, 값은 float32 반올림 차이 이내
+    mine, theirs = result['comparison'], ref['comparison']
+    cols = [c for c in mine.columns if c in chunked.STATUS]
+    same_shape = (list(mine.index) == [float(h) for h in theirs.index]
+                  and cols == [str(c) for c in theirs.columns if c in chunked.STATUS])
+    if not same_shape or not np.allclose(mine[cols].to_numpy(), theirs[cols].to_numpy(np.float64),
+                                         rtol=chunked.COMPARISON_RTOL, atol=0, equal_nan=True):
+        diffs.append('comparison')
+    return diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="chunk 단위 분석 vs 메모리 내 계산")
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--chunk-rows', type=int, nargs='+', default=[20_000, 100_000])
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _, rain_df, merged_df = hourly_frames(args.years)
+        paths = {'csv': (os.path.join(workdir, 'merged.csv'), os.path.join(workdir, 'rain.csv'))}
+        merged_df.to_csv(paths['csv'][0], index=False, encoding='utf-8-sig')
+        rain_df.to_csv(paths['csv'][1], index=False, encoding='utf-8-sig')
+        try:
+            import pyarrow  # noqa: F401
+
+            paths['parquet'] = (os.path.join(workdir, 'merged.parquet'), os.path.join(workdir, 'rain.parquet'))
+            merged_df.to_parquet(paths['parquet'][0], row_group_size=50_000)
+            rain_df.to_parquet(paths['parquet'][1], row_group_size=50_000)
+        except ImportError:
+            print("⚠️ [주의] pyarrow 가 없어 Parquet 는 건너뜀")
+        del rain_df, merged_df
+
+        # 메모리 내 코드 경로는 CSV 만 읽으므로 CSV 로 한 번 (Parquet 는 같은 자료)
+        expected = reference(*paths['csv'], chunked.default_lag())
+        ok = True
+        for kind, (merged, rain) in paths.items():
+            print(f"=== {kind}: {args.years}년치 시간 자료 ===")
+            ref, seconds, peak = run(merged, rain, None, 1, False)
+            _, _, peak = run(merged, rain, None, 1, True)
+            diffs = equivalent(ref, expected)
+            ok &= not diffs
+            print(f"  {'한 번에':16s} {seconds:7.2f} s  최대 {peak:7.1f} MB  "
+                  f"{'메모리 내 코드와 같음' if not diffs else '❌ 메모리 내 코드와 다름: ' + ', '.join(diffs)}")
+            for rows in args.chunk_rows:
+                for workers in (1, args.workers):
+                    result, seconds, _ = run(merged, rain, rows, workers, False)
+                    _, _, peak = run(merged, rain, rows, workers, True) if workers == 1 else (None, None, None)
+                    match = same(ref, result)
+                    ok &= match
+                    mem = f"최대 {peak:7.1f} MB" if peak is not None else f"{'':>13s}"
+                    print(f"  {rows:>7,}행 x {workers}프로세스 {seconds:7.2f} s  {mem}  "
+                          f"{'같음' if match else '❌ 다름'}")
+
+    if ok:
+        print("\n✅ [성공] 모든 chunk 크기 / 프로세스 수에서 결과가 한 번에 계산한 것과 정확히 같고, "
+              "한 번에 계산한 것은 메모리 내 코드 경로와 같음 (00.py 표는 float32 반올림 이내)")
+    else:
+        print("\n❌ [오류] 결과가 다른 경우가 있음")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_loader
+from lag_scan import after_rain_comparison
+from synthetic import hourly_frames
+
+# 병합 시간 자료의 메모리: pd.read_csv 그대로 / data_loader.load_merged / data_loader.load_compact
+#   행당 바이트 (memory_usage(deep=True), 문자열 포함) 와 로드 시간 (Feather 캐시 없이 / 캐시에서)
+#   00.py 식 필터링의 최대 메모리: 필터한 프레임 .copy() + 문자열 상태 컬럼 vs 플래그 마스크 + 범주형 상태
+# 참고: 1분 간격 10년치는 ~526만 행 -> 행당 33바이트면 ~170MB
+# 행 순서 (실제 병합 CSV): 파일은 매일 00:00 행이 그날 23:00 뒤에 있고, load_compact 는 일시 순으로 정렬함
+#   -> 00.py 비교 표가 일시 순 정렬한 load_merged 경로와 같은지 확인 (float32 반올림까지 허용)
+#      파일 행 순서 그대로 shift 한 원본 스크립트 방식과의 차이는 참고로만 출력
+
+LAG = 3
+
+
+def filter_copy(df, sort=True):
+    if sort:
+        df = df.sort_values('일시').reset_index(drop=True)
+    df['after_rain'] = df['평균강수량(mm)'].shift(LAG) > 0
+    df['efficiency'] = df['합계(킬로와트시)'] / df['낙차']
+    df = df[(df['낙차'] >= 1.0) & (df['합계(킬로와트시)'] > 0)].copy()
+    df['status'] = '맑음'
+    df.loc[df['after_rain'], 'status'] = '비 온 후(쓰레기유입)'
+    df['head_group'] = (df['낙차'] // 0.5) * 0.5
+    return df.groupby(['head_group', 'status'])['efficiency'].mean().unstack()
+
+
+def filter_mask(df):
+    raining = data_loader.flag(df, 'raining')
+    after_rain = np.zeros(len(df), dtype=bool)
+    after_rain[LAG:] = raining[:len(df) - LAG]
+    valid = data_loader.flag(df, 'head_ok', 'generating')
+    df['efficiency'] = df['합계(킬로와트시)'] / df['낙차']
+    df['status'] = pd.Categorical.from_codes(after_rain.astype(np.int8), ['맑음', '비 온 후(쓰레기유입)'])
+    df['head_group'] = (df['낙차'] // 0.5) * 0.5
+    active = df.loc[valid, ['head_group', 'status', 'efficiency']]
+    return active.groupby(['head_group', 'status'], observed=True)['efficiency'].mean().unstack()
+
+
+def max_diff(table, ref):
+    table = table.drop(columns='효율감소율(%)', errors='ignore')
+    return float((ref - table.reindex(index=ref.index, columns=ref.columns)).abs().max().max())
+
+
+def check_row_order(path):
+    merged = data_loader.load_merged(path)
+    compact = data_loader.load_compact(path, use_cache=False)
+    times = pd.to_datetime(merged['일시']).to_numpy()
+    moved = int((times[1:] < times[:-1]).sum())
+    _, table = after_rain_comparison(compact, LAG)
+
+    print(f"\n=== 행 순서 ({os.path.basename(path)}, 일시가 앞 행보다 이른 행 {moved}개) ===")
+    diff = max_diff(table, filter_copy(merged.copy()))
+    print(f"  일시 순 정렬 load_merged 대비  최대 {diff:.4f} kWh/m")
+    print(f"  파일 행 순서 그대로 shift 대비 최대 {max_diff(table, filter_copy(merged.copy(), sort=False)):.4f} kWh/m (참고)")
+    if diff > 0.01:
+        print(f"❌ [오류] 00.py 비교 표가 일시 순 정렬 경로와 다릅니다 (최대 {diff:.4f} kWh/m)")
+    else:
+        print("✅ [성공] 00.py 비교 표가 일시 순 정렬 경로와 같습니다 (float32 반올림 이내)")
+
+
+def peak_mb(fn, *args):
+    tracemalloc.start()
+    out = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, peak / 1e6
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="병합 시간 자료 메모리 절약 스키마")
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--merged', default=os.path.join(data_loader.DATA_DIR, data_loader.SOURCES['merged'][0]),
+                        help="행 순서 확인에 쓸 실제 병합 CSV (없으면 건너뜀)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'power_rain_merged_2024.csv')
+        hourly_frames(args.years)[2].to_csv(path, index=False, encoding='utf-8-sig')
+
+        raw, t_raw = timed(lambda: pd.read_csv(path, encoding='utf-8-sig'))
+        merged, t_merged = timed(lambda: data_loader.load_merged(path))
+        compact, t_compact = timed(lambda: data_loader.load_compact(path))
+        _, t_merged_hit = timed(lambda: data_loader.load_merged(path))
+        _, t_compact_hit = timed(lambda: data_loader.load_compact(path))
+
+        n = len(raw)
+        print(f"=== {args.years}년치 시간 자료 {n:,}행 ===")
+        base = data_loader.memory_bytes(raw)
+        for label, df, t_parse, t_hit in [('pd.read_csv', raw, t_raw, None),
+                                          ('load_merged', merged, t_merged, t_merged_hit),
+                                          ('load_compact', compact, t_compact, t_compact_hit)]:
+            size = data_loader.memory_bytes(df)
+            hit = f"{t_hit * 1000:7.1f} ms" if t_hit is not None else f"{'-':>10s}"
+            print(f"  {label:14s} {size / n:6.1f} B/행  {size / 1e6:7.2f} MB  ({base / size:4.2f}x 절약)  "
+                  f"파싱 {t_parse * 1000:7.1f} ms  캐시 {hit}")
+
+        print("\n=== 00.py 식 필터링 (최대 메모리, tracemalloc) ===")
+        old, old_mb = peak_mb(filter_copy, merged.copy())
+        new, new_mb = peak_mb(filter_mask, compact.copy())
+        print(f"  .copy() + 문자열 상태   {old_mb:7.2f} MB")
+        print(f"  마스크 + 범주형 상태    {new_mb:7.2f} MB  ({old_mb / new_mb:4.2f}x)")
+        diff = (old - new.reindex(index=old.index, columns=old.columns)).abs().max().max()
+        print(f"  결과 차이(float32 반올림) 최대 {diff:.4f} kWh/m")
+
+    if os.path.exists(args.merged):
+        check_row_order(args.merged)
+
+    ratio = base / data_loader.memory_bytes(compact)
+    if ratio >= 4:
+        print(f"\n✅ [성공] pd.read_csv 대비 {ratio:.2f}x")
+    else:
+        print(f"\n⚠️ [주의] pd.read_csv 대비 {ratio:.2f}x (목표 4x 미달)")
+
+
+if __name__ == '__main__':
+    main()
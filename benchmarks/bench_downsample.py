@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import history_store
+from downsample import lttb_indices, minmax_indices
+from synthetic import make_history
+
+# 차트용 다운샘플링
+#   1) lttb / minmax 인덱스 계산 시간 (점 수 n, 계열 2개)
+#   2) 기간 조회 응답: 이전(range 자동 resample, 기간이 길수록 점이 늘어남) vs max_points (점 수 일정)
+#      점 수 / JSON 바이트 / 처음 조회(피라미드 캐시 없음) / 다시 조회(피라미드 캐시) 시간
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def kernels(repeat):
+    rng = np.random.default_rng(0)
+    print("=== 다운샘플 인덱스 계산 (계열 2개) ===")
+    for n in (1_440, 52_560, 525_600):
+        x = np.arange(n, dtype=np.float64)
+        ys = np.cumsum(rng.normal(size=(2, n)), axis=1)
+        for m in (500, 2000):
+            t_lttb = best_of(lambda: lttb_indices(x, ys, m), repeat)
+            t_mm = best_of(lambda: minmax_indices(ys, m), repeat)
+            print(f"  n={n:>9,d} -> {m:5d}점  lttb {t_lttb * 1000:7.2f} ms  minmax {t_mm * 1000:7.2f} ms")
+
+
+def ranges(store, days_total, max_points, repeat):
+    print(f"\n=== 기간 조회: 자동 resample vs max_points={max_points} ===")
+    for days in (1, 7, 30, 90, 365):
+        if days > days_total:
+            break
+        end = str(np.datetime64('2024-01-01') + days - 1)
+        old = store.range('2024-01-01', end)
+        old_bytes = len(json.dumps(old).encode())
+        t_old = best_of(lambda: store.range('2024-01-01', end), repeat)
+
+        store.pyramid.cache_clear()
+        t0 = time.perf_counter()
+        new = store.range('2024-01-01', end, max_points=max_points)
+        t_cold = time.perf_counter() - t0
+        t_warm = best_of(lambda: store.range('2024-01-01', end, max_points=max_points), repeat)
+        new_bytes = len(json.dumps(new).encode())
+        print(f"  {days:4d}일  이전 {len(old['sea']):>6,d}점 {old_bytes:>9,d} B {t_old * 1000:7.2f} ms ({old['resample']:5s})"
+              f" | max_points {len(new['sea']):>5,d}점 {new_bytes:>7,d} B 처음 {t_cold * 1000:7.2f} ms"
+              f" 다시 {t_warm * 1000:6.2f} ms ({new['resample']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="차트용 다운샘플링 (LTTB / min-max, 날짜별 피라미드)")
+    parser.add_argument('--days', type=int, default=365, help="합성 과거 CSV 일수")
+    parser.add_argument('--max-points', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    kernels(args.repeat)
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'sihwa_history.csv')
+        make_history(csv_path, args.days)
+        store = history_store.HistoryStore.from_csv(csv_path)
+    ranges(store, args.days, args.max_points, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
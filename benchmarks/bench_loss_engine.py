@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from data_loader import load_merged
+from loss_engine import BaselineTable, evaluate_scenarios, loss_won
+
+# decision.py 에 있던 기준표/상수 (apply 방식과 결과 비교용)
+baseline_by_head = {
+    1.0: 28031.8, 1.5: 27965.5, 2.0: 29206.2, 2.5: 29979.2,
+    3.0: 30260.5, 3.5: 31356.2, 4.0: 31609.8, 4.5: 31356.3,
+    5.0: 31438.4, 5.5: 33196.7, 6.0: 34972.5, 6.5: 33796.0,
+    7.0: 32895.8, 7.5: 28701.5, 8.0: 27065.4
+}
+global_baseline = 30844.9
+SMP = 150
+
+
+def calc_loss_won(row):
+    head_key = round(row['낙차'] * 2) / 2
+    eff = baseline_by_head.get(head_key, global_baseline)
+    expected_power = eff * row['낙차']
+    loss_kwh = expected_power - row['합계(킬로와트시)']
+    return max(0, loss_kwh) * SMP
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="손실 계산: df.apply vs loss_engine")
+    parser.add_argument('--scale', type=int, default=10, help="2024년 데이터를 몇 배로 복제할지")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    base = load_merged()[['낙차', '합계(킬로와트시)']]
+    df = pd.concat([base] * args.scale, ignore_index=True)
+    table = BaselineTable(baseline_by_head, global_baseline)
+    print(f"📦 행 수: {len(df):,} (x{args.scale})")
+
+    t_apply, old = best_of(lambda: df.apply(calc_loss_won, axis=1).to_numpy(), args.repeat)
+    head = df['낙차'].to_numpy()
+    kwh = df['합계(킬로와트시)'].to_numpy()
+    t_vec, new = best_of(lambda: loss_won(head, kwh, table, SMP), args.repeat)
+
+    assert np.allclose(old, new, rtol=1e-12, atol=0), "apply 결과와 벡터 결과가 다릅니다"
+    print(f"🐢 df.apply      : {t_apply * 1000:9.2f} ms")
+    print(f"🚀 loss_engine   : {t_vec * 1000:9.2f} ms  ({t_apply / t_vec:,.0f}배)")
+
+    # 시나리오 일괄 평가: 기준표 3개(±5%) x SMP 5개 x 수거비용 4개
+    tables = [BaselineTable({k: v * f for k, v in baseline_by_head.items()}, global_baseline * f)
+              for f in (0.95, 1.0, 1.05)]
+    smp_values = [100, 125, 150, 175, 200]
+    clean_costs = [2_000_000, 5_000_000, 10_000_000, 20_000_000]
+    n_scen = len(tables) * len(smp_values) * len(clean_costs)
+    t_batch, _ = best_of(lambda: evaluate_scenarios(head, kwh, tables, smp_values, clean_costs), args.repeat)
+    print(f"📊 시나리오 {n_scen}개 일괄 평가: {t_batch * 1000:9.2f} ms "
+          f"(apply 로는 약 {t_apply * len(tables) * len(smp_values):,.1f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from synthetic import make_history
+from metrics import Counter, Histogram, Sampler
+
+# 계측 오버헤드
+#   1) Counter.inc / Histogram.observe 한 번의 비용 (쓰레드별 샤드) vs 락으로 보호한 dict 카운터, 쓰레드 여러 개
+#   2) 요청 계측 미들웨어(app.RequestMetrics) 한 번의 비용 (아무것도 안 하는 WSGI 앱을 감싸서)
+#   3) 앱 요청 처리량: METRICS 끔 / 켬(매 요청 시간 측정) / 켬(10번에 한 번 측정)
+#      /data (가장 가벼운 요청) 와 /api/history/<날짜> (캐시된 응답) 를 번갈아 반복해 최소값 비교
+#      (코어가 적은 머신에서는 회차별 편차가 몇 % 있으므로 2) 의 절대 비용과 같이 볼 것)
+
+
+class LockedCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, *labelvalues, value=1):
+        with self._lock:
+            self.values[labelvalues] = self.values.get(labelvalues, 0) + value
+
+
+def per_op_ns(fn, n, threads):
+    def work():
+        for _ in range(n):
+            fn()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return (time.perf_counter() - t0) / (n * threads) * 1e9
+
+
+def micro(n, threads):
+    counter = Counter('bench_total', '', ('route',))
+    locked = LockedCounter()
+    histogram = Histogram('bench_seconds', '', ('route',))
+    print(f"=== 기록 1회 비용 (쓰레드 {threads}개 x {n:,}회) ===")
+    for label, fn in [('샤드 Counter.inc', lambda: counter.inc('/data')),
+                      ('락 dict 카운터', lambda: locked.inc('/data')),
+                      ('샤드 Histogram.observe', lambda: histogram.observe(0.0031, '/data')),
+                      ('(빈 호출)', lambda: None)]:
+        print(f"  {label:24s} {per_op_ns(fn, n, threads):7.0f} ns")
+
+
+def middleware(n):
+    import app
+
+    def inner(environ, start_response):
+        start_response('200 OK', [])
+        return [b'']
+
+    environ = {'REQUEST_METHOD': 'GET', 'sihwa.route': '/data'}
+    wrapped = {'그대로': inner, '매번 측정': app.RequestMetrics(inner, Sampler(1)),
+               '1/10 측정': app.RequestMetrics(inner, Sampler(10))}
+    print("\n=== 요청 계측 미들웨어 1회 비용 ===")
+    base = None
+    for label, wsgi_app in wrapped.items():
+        t0 = time.perf_counter()
+        for _ in range(n):
+            wsgi_app(environ, lambda *a: None)
+        ns = (time.perf_counter() - t0) / n * 1e9
+        base = ns if base is None else base
+        print(f"  {label:12s} {ns:7.0f} ns (+{ns - base:5.0f} ns)")
+
+
+def app_throughput(csv_path, workdir, requests, repeat):
+    import app
+
+    variants = {'계측 끔': {'METRICS': False}, '계측 켬(매번)': {'METRICS': True, 'METRICS_SAMPLE': 1},
+                '계측 켬(1/10)': {'METRICS': True, 'METRICS_SAMPLE': 10}}
+    clients = {}
+    for label, extra in variants.items():
+        config = {'HISTORY_CSV': csv_path, 'SENSOR_DB': os.path.join(workdir, f'{len(clients)}.sqlite3'),
+                  'PRELOAD': 'eager', 'START_DEVICES': False, 'START_TIDE_FEED': False}
+        flask_app = app.create_app(dict(config, **extra))
+        clients[label] = (flask_app, flask_app.test_client())
+
+    for path in ('/data', '/api/history/2024-01-05'):
+        best = {label: float('inf') for label in variants}
+        for _ in range(repeat):
+            # 같은 회차 안에서 번갈아 재서 CPU 클럭 변화 등의 영향을 줄임
+            for label, (_, client) in clients.items():
+                client.get(path)
+                t0 = time.perf_counter()
+                for _ in range(requests):
+                    client.get(path)
+                best[label] = min(best[label], (time.perf_counter() - t0) / requests)
+        base = best['계측 끔']
+        print(f"\n=== {path} ({requests}회 x {repeat}번 중 최소) ===")
+        for label, sec in best.items():
+            print(f"  {label:16s} {sec * 1e6:8.1f} us/요청  ({(sec / base - 1) * 100:+5.1f}%)")
+
+    for flask_app, _ in clients.values():
+        flask_app.extensions['sihwa'].close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="계측(metrics) 오버헤드")
+    parser.add_argument('--ops', type=int, default=200_000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    micro(args.ops, args.threads)
+    middleware(args.ops)
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'sihwa_history.csv')
+        make_history(csv_path, 30)
+        app_throughput(csv_path, workdir, args.requests, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
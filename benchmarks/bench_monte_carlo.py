@@ -0,0 +1,74 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import monte_carlo as mc
+
+# 수거 정책 몬테카를로: 시나리오마다 Python 반복(시간 x 정책) vs (정책, 시나리오) 배열 한 번 + 프로세스 풀
+# 실제 data/ 자료로 입력을 만들므로 저장소 루트에서 실행 (python benchmarks/bench_monte_carlo.py)
+
+
+def loop_policies(rain, expected, inflow, p):
+    """시나리오 하나씩, 시간 하나씩 도는 기준 구현 (run_policies 와 같은 결과여야 함)"""
+    T, S = rain.shape
+    keep = 0.5 ** (1.0 / p['half_life_hours'])
+    period = p['fixed_days'] * 24
+    loss = np.zeros((len(mc.POLICIES), S))
+    cleanups = np.zeros((len(mc.POLICIES), S), dtype=np.int64)
+    for s in range(S):
+        for i, name in enumerate(mc.POLICIES):
+            debris = since = rain_since = dry = 0.0
+            for t in range(T):
+                debris = debris * keep + float(inflow[t, s])
+                h = min(debris * p['smp'] * p['penalty_per_ton'], p['smp'] * p['max_penalty']) * float(expected[t, s])
+                loss[i, s] += h
+                since += h
+                rain_since += float(rain[t, s])
+                dry = 0 if rain[t, s] >= mc.RAIN_THRESHOLD else dry + 1
+                clean = {'none': False, 'threshold': since >= p['loss_threshold'],
+                         'fixed': (t + 1) % period == 0,
+                         'rain_triggered': rain_since >= p['rain_mm'] and dry == p['dry_hours']}[name]
+                if clean:
+                    debris = since = 0.0
+                    cleanups[i, s] += 1
+                    if name == 'rain_triggered':
+                        rain_since = 0.0
+    return loss, cleanups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="수거 정책 몬테카를로 속도")
+    parser.add_argument('--scenarios', type=int, default=mc.N_SCENARIOS)
+    parser.add_argument('--loop-scenarios', type=int, default=5, help="기준 구현으로 비교할 시나리오 수")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    inputs = mc.load_inputs()
+    p = mc.normalize_params({})
+
+    rng = np.random.default_rng(0)
+    arrays = mc.synth_years(inputs, args.loop_scenarios, rng)
+    t0 = time.perf_counter()
+    ref_loss, ref_clean = loop_policies(*arrays, p)
+    t_loop = (time.perf_counter() - t0) / args.loop_scenarios
+    loss, clean = mc.run_policies(*arrays, p)
+    print(f"🎲 기준 구현: 시나리오당 {t_loop * 1000:,.0f} ms "
+          f"(손실 최대 상대오차 {np.abs(loss / np.maximum(ref_loss, 1) - 1).max():.1e}, "
+          f"수거 횟수 일치 {np.array_equal(clean, ref_clean)})")
+
+    for workers in sorted(set(args.workers)):
+        t0 = time.perf_counter()
+        res = mc.simulate(inputs, max_workers=workers, scenarios=args.scenarios)
+        elapsed = time.perf_counter() - t0
+        print(f"  simulate(workers={workers:>2}) {args.scenarios:,}개 {elapsed:6.2f} s"
+              f"  (시나리오당 {elapsed / args.scenarios * 1000:.2f} ms, 기준 대비 {t_loop * args.scenarios / elapsed:,.0f}배)"
+              f"  최적 정책 {res['best_policy']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from model_pipeline import FEATURE_SETS, MODEL_PATH, TARGET, build_training_frame, export, fit_config
+from predictor import EfficiencyPredictor
+
+# /api/predict 지연 시간 (p50/p99)
+#   direct : 요청마다 model.predict 한 번 (기존 방식)
+#   batched: 동시 단건 요청을 마이크로 배치로 묶음, 메모이즈 없음(매번 다른 낙차)
+#   cached : 같은 낙차 구간이 반복되는 실제 센서 패턴 (메모이즈 적중)
+
+
+def percentiles(lat):
+    lat = np.asarray(lat) * 1000
+    return f"p50 {np.percentile(lat, 50):7.3f} ms / p99 {np.percentile(lat, 99):7.3f} ms"
+
+
+def run_threads(fn, n_threads, n_requests, make_row):
+    lat = [[] for _ in range(n_threads)]
+
+    def worker(t):
+        rng = np.random.default_rng(t)
+        for _ in range(n_requests):
+            row = make_row(rng)
+            t0 = time.perf_counter()
+            fn(row)
+            lat[t].append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(n_threads)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - t0
+    return [x for part in lat for x in part], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="효율 예측 지연 시간")
+    parser.add_argument('--threads', type=int, default=16, help="동시 요청 수")
+    parser.add_argument('--requests', type=int, default=200, help="쓰레드당 요청 수")
+    args = parser.parse_args()
+
+    if not os.path.exists(MODEL_PATH):
+        df = build_training_frame()
+        export(fit_config(df[FEATURE_SETS['full']], df[TARGET], FEATURE_SETS['full'], {}))
+    total = args.threads * args.requests
+    print(f"🤖 {args.threads} 쓰레드 x {args.requests} 요청 = {total:,}건")
+
+    def random_head(rng):
+        return {'head': float(rng.uniform(0.5, 8.0)), 'rain': float(rng.uniform(0, 10))}
+
+    def sensor_head(rng):
+        return {'head': float(rng.normal(3.0, 0.3))}
+
+    # 기존 방식: 요청마다 DataFrame 만들어서 predict
+    direct = EfficiencyPredictor.load()
+
+    def predict_direct(row):
+        return direct.model.predict(pd.DataFrame(direct._matrix([row]), columns=direct.features))
+
+    lat, elapsed = run_threads(predict_direct, args.threads, args.requests, random_head)
+    print(f"  direct  {percentiles(lat)}  {total / elapsed:8,.0f} req/s")
+
+    batched = EfficiencyPredictor.load(cache_size=0)
+    lat, elapsed = run_threads(batched.predict_one, args.threads, args.requests, random_head)
+    stats = batched.get_stats()
+    print(f"  batched {percentiles(lat)}  {total / elapsed:8,.0f} req/s "
+          f"(predict {stats['predict_calls']}회, 최대 배치 {stats['max_batch_seen']})")
+
+    cached = EfficiencyPredictor.load()
+    lat, elapsed = run_threads(cached.predict_one, args.threads, args.requests, sensor_head)
+    stats = cached.get_stats()
+    print(f"  cached  {percentiles(lat)}  {total / elapsed:8,.0f} req/s "
+          f"(적중 {stats['cache_hits'] / stats['rows']:.1%}, predict {stats['predict_calls']}회)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from rain_features import pattern_features
+
+# 강우 패턴 지표: 기존 방식(groupby 여러 번 + 월별 np.percentile apply) vs 정렬 + 구간 reduce
+# 관측소 여러 곳 x 여러 해 시간별 강수량을 합성해서 비교
+
+
+def make_rain(stations, years, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range('2000-01-01', periods=int(years * 8760), freq='h')
+    frames = []
+    for s in range(stations):
+        wet = rng.random(len(ts)) < 0.08
+        frames.append(pd.DataFrame({'station': f"st{s:03d}", '일시': ts,
+                                    '평균강수량(mm)': np.where(wet, rng.gamma(0.8, 5.0, len(ts)), 0.0).round(1)}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def top10_ratio(x):
+    if x.sum() == 0: return 0
+    threshold = np.percentile(x, 90)
+    return x[x >= threshold].sum() / x.sum()
+
+
+def legacy(df):
+    month = df['일시'].dt.to_period('M')
+    g = df.groupby(['station', month])['평균강수량(mm)']
+    out = g.agg(rain_sum='sum', rain_peak='max').reset_index()
+    heavy = df[df['평균강수량(mm)'] >= 10].groupby(['station', month[df['평균강수량(mm)'] >= 10]])['평균강수량(mm)'].count()
+    top10 = g.apply(top10_ratio)
+    return out, heavy, top10
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="강우 패턴 지표 계산 속도")
+    parser.add_argument('--stations', type=int, default=20)
+    parser.add_argument('--years', type=float, default=30)
+    parser.add_argument('--skip-legacy', action='store_true', help="기존 방식은 건너뜀 (대용량)")
+    args = parser.parse_args()
+
+    df = make_rain(args.stations, args.years)
+    print(f"🌧️ {args.stations}개 관측소 x {args.years:g}년 = {len(df):,}행")
+
+    if not args.skip_legacy:
+        (_, _, top10), t_legacy = timed(legacy, df)
+        print(f"  기존 groupby/apply (월)   {t_legacy:8.2f} s")
+    for freq in ('D', 'W', 'M', '72h'):
+        result, elapsed = timed(pattern_features, df, freq, station_col='station')
+        print(f"  pattern_features({freq:>3})   {elapsed:8.2f} s  ({len(result):,}행)")
+        if freq == 'M' and not args.skip_legacy:
+            diff = np.abs(result['top10_ratio'].to_numpy() - top10.to_numpy()).max()
+            print(f"    top10_ratio 최대 오차 {diff:.2e}, 속도 {t_legacy / elapsed:.0f}배")
+
+
+if __name__ == '__main__':
+    main()
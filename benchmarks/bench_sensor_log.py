@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sensor_log import SensorLog
+
+# 센서 로그 기록 처리량: 장치 여러 대가 동시에 2Hz 로 보낸다고 가정하고 rows/s 측정
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SensorLog 기록 처리량")
+    parser.add_argument('--devices', type=int, default=10)
+    parser.add_argument('--hours', type=float, default=6, help="장치당 몇 시간치(2Hz) 를 기록할지")
+    parser.add_argument('--flush-rows', type=int, default=500)
+    args = parser.parse_args()
+
+    n_per_device = int(args.hours * 3600 * 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        log = SensorLog(os.path.join(tmp, 'bench.sqlite3'), flush_rows=args.flush_rows)
+        start_ts = time.time() - args.hours * 3600
+
+        t0 = time.perf_counter()
+        for i in range(n_per_device):
+            ts = start_ts + i * 0.5
+            for d in range(args.devices):
+                log.append(f"gate{d}", ts, 1.5, -0.5, 2.0, i % 1024, i)
+        log.flush()
+        elapsed = time.perf_counter() - t0
+
+        total = n_per_device * args.devices
+        print(f"📝 {total:,} 행 ({args.devices}대 x {n_per_device:,}), flush {args.flush_rows}행 단위")
+        print(f"⏱️ {elapsed:.2f} s -> {total / elapsed:,.0f} rows/s "
+              f"(2Hz 센서 {total / elapsed / 2:,.0f} 대 분량)")
+        print(f"💾 flush {log.stats['flushes']}회, DB 크기 {os.path.getsize(log.path) / 1e6:.1f} MB")
+        log.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from synthetic import make_history
+
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# 웹 앱 시작 시간: 예전처럼 import 때 모두 로드(eager) vs 앱 팩토리 + 지연 import + 백그라운드 로드
+# 모드마다 새 파이썬 프로세스를 띄워 `python -X importtime` 으로 재고,
+#   import      : import app 까지
+#   create_app  : 요청을 받을 수 있을 때까지 (첫 응답 가능 시점)
+#   ready       : /ready 가 200 이 될 때까지 (과거 CSV + 기준효율 로드 완료)
+# 과거 CSV(data/sihwa_history.csv) 는 저장소에 없으므로 1분 간격 합성 자료를 만들어 씀
+
+MODES = {
+    # 예전 app.py: 모듈 맨 위에서 pandas / figures(matplotlib, seaborn) / predictor(sklearn) / lag_scan /
+    # monte_carlo 를 import 하고, CSV 와 모델을 import 중에 모두 로드
+    'eager': ("import app, figures, lag_scan, monte_carlo, predictor", 'eager'),
+    'factory': ("import app", 'background'),
+}
+
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+{imports}
+t1 = time.perf_counter()
+flask_app = app.create_app({{'PRELOAD': {mode!r}}})
+t2 = time.perf_counter()
+client = flask_app.test_client()
+while client.get('/ready').status_code != 200:
+    time.sleep(0.005)
+t3 = time.perf_counter()
+print(json.dumps({{'import': t1 - t0, 'create_app': t2 - t0, 'ready': t3 - t0}}))
+"""
+
+
+def run_child(mode, csv_path, workdir):
+    imports, preload = MODES[mode]
+    env = dict(os.environ, SIHWA_START_DEVICES='0', SIHWA_START_TIDE_FEED='0',
+               SIHWA_SENSOR_DB=os.path.join(workdir, 'sensor_log.sqlite3'), SIHWA_HISTORY_CSV=csv_path,
+               PYTHONWARNINGS='ignore')
+    code = CHILD.format(imports=imports, mode=preload)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=SRC_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(proc.stderr)
+
+
+def parse_importtime(stderr):
+    """-X importtime 출력 -> 최상위 import 별 누적 시간(ms)"""
+    top = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cum_us, name = line[len('import time:'):].split('|')
+        # 들여쓰기가 없으면 최상위 import (헤더 줄은 숫자가 아니라서 제외)
+        if cum_us.strip().isdigit() and not name.startswith('  '):
+            top[name.strip()] = int(cum_us) / 1000
+    return top
+
+
+def main():
+    parser = argparse.ArgumentParser(description="웹 앱 시작 시간 (python -X importtime)")
+    parser.add_argument('--days', type=int, default=365, help="합성 과거 CSV 일수 (1분 간격)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'sihwa_history.csv')
+        make_history(csv_path, args.days)
+        print(f"📄 합성 과거 CSV: {args.days}일 x 1440행 = {args.days * 1440:,}행")
+
+        for mode in MODES:
+            runs = [run_child(mode, csv_path, workdir) for _ in range(args.repeat)]
+            best = {k: min(t[k] for t, _ in runs) for k in runs[0][0]}
+            first = runs[0][0]
+            print(f"\n=== {mode} ({MODES[mode][0]}, PRELOAD={MODES[mode][1]}) ===")
+            print(f"  {'':12s} {'첫 실행':>9s} {'최소':>9s}")
+            for key in ('import', 'create_app', 'ready'):
+                print(f"  {key:12s} {first[key]:8.3f}s {best[key]:8.3f}s")
+            top = sorted(runs[-1][1].items(), key=lambda kv: -kv[1])[:args.top]
+            print("  최상위 import 누적 시간:")
+            for name, ms in top:
+                print(f"    {name:24s} {ms:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
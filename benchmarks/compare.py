@@ -0,0 +1,66 @@
+import argparse
+import json
+import sys
+
+# suite.py 결과 두 개 비교: 단계 x 배수별 시간 / 최대 메모리 비율
+#   python benchmarks/compare.py benchmarks/results/이전.json benchmarks/results/새것.json
+# 새 결과가 threshold 이상 느려지거나(그리고 차이가 min-ms 이상) 메모리가 threshold 이상 늘면 표시하고
+# 종료 코드 1 (CI 에서 회귀 검사로 쓸 수 있음)
+
+THRESHOLD = 0.15
+MIN_MS = 5.0
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    return report['environment'], {(r['stage'], r['scale']): r for r in report['results']}
+
+
+def ratio(old, new):
+    return new / old if old else float('inf') if new else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교 (suite.py JSON 두 개)")
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="회귀로 볼 증가 비율 (0.15 = 15%%)")
+    parser.add_argument('--min-ms', type=float, default=MIN_MS, help="이보다 작은 시간 차이는 무시")
+    args = parser.parse_args()
+
+    old_env, old = load(args.old)
+    new_env, new = load(args.new)
+    print(f"📊 {old_env['revision']} ({old_env['created']}) -> {new_env['revision']} ({new_env['created']})")
+    if (old_env['cpus'], old_env['python']) != (new_env['cpus'], new_env['python']):
+        print(f"⚠️ [주의] 실행 환경이 다릅니다: CPU {old_env['cpus']} -> {new_env['cpus']}, "
+              f"Python {old_env['python']} -> {new_env['python']}")
+
+    print(f"\n  {'단계':14s} {'배수':>5s} {'이전 ms':>10s} {'새 ms':>10s} {'비율':>7s} {'이전 MB':>9s} {'새 MB':>9s} {'비율':>7s}")
+    regressions = []
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[1], k[0])):
+        a, b = old[key], new[key]
+        t_ratio = ratio(a['seconds'], b['seconds'])
+        slower = t_ratio > 1 + args.threshold and (b['seconds'] - a['seconds']) * 1000 >= args.min_ms
+        m_ratio = ratio(a.get('peak_mb') or 0, b.get('peak_mb') or 0) if 'peak_mb' in a and 'peak_mb' in b else None
+        bigger = m_ratio is not None and m_ratio > 1 + args.threshold
+        if slower or bigger:
+            regressions.append(key)
+        mem = (f"{a['peak_mb']:9.1f} {b['peak_mb']:9.1f} {m_ratio:6.2f}x" if m_ratio is not None
+               else f"{'-':>9s} {'-':>9s} {'-':>7s}")
+        flag = ' ❌' if slower or bigger else ' 🚀' if t_ratio < 1 - args.threshold else ''
+        print(f"  {key[0]:14s} {key[1]:>4d}x {a['seconds'] * 1000:10.1f} {b['seconds'] * 1000:10.1f} "
+              f"{t_ratio:6.2f}x {mem}{flag}")
+
+    only = sorted(old.keys() ^ new.keys())
+    if only:
+        print(f"\n  한쪽에만 있는 항목: {', '.join(f'{s}@{x}x' for s, x in only)}")
+    if regressions:
+        print(f"\n❌ [오류] 회귀 {len(regressions)}건 (기준 +{args.threshold:.0%}): "
+              f"{', '.join(f'{s}@{x}x' for s, x in regressions)}")
+        sys.exit(1)
+    print(f"\n✅ [성공] 기준 +{args.threshold:.0%} 를 넘는 회귀 없음")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from app import create_app
+
+# /stream(SSE) 부하 테스트
+# 가짜 센서가 rate Hz 로 값을 발행하고, 클라이언트 N 개가 동시에 구독해서 받은 메시지 수를 센다.
+# 같은 시간 동안 폴링(0.5초)이었다면 필요했을 요청 수와 비교한다.
+
+
+def client(url, stop, counts, idx, delay):
+    with requests.get(url, stream=True, timeout=30) as res:
+        for line in res.iter_lines(chunk_size=1):
+            if stop.is_set():
+                break
+            if line.startswith(b'data:'):
+                counts[idx] += 1
+                if delay:
+                    time.sleep(delay)   # 느린 클라이언트 흉내
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE /stream 부하 테스트")
+    parser.add_argument('--clients', type=int, default=50)
+    # 느린 클라이언트는 소켓 버퍼가 찰 때까지는 끊기지 않으므로 rate/duration 을 키워야 드롭이 보임
+    parser.add_argument('--slow-clients', type=int, default=2, help="메시지마다 1초씩 늦게 읽는 클라이언트 수")
+    parser.add_argument('--rate', type=float, default=2.0, help="센서 발행 빈도 (Hz)")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # 가짜 센서로만 발행하므로 시리얼 장치 / 조위 갱신 / 과거 데이터 로드는 끔
+    app = create_app({'START_DEVICES': False, 'START_TIDE_FEED': False, 'PRELOAD': 'lazy'})
+    broadcaster = app.extensions['sihwa'].broadcaster
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/stream"
+
+    n = args.clients + args.slow_clients
+    counts = [0] * n
+    stop = threading.Event()
+    threads = [threading.Thread(target=client, args=(url, stop, counts, i, 1.0 if i >= args.clients else 0),
+                                daemon=True) for i in range(n)]
+    for t in threads:
+        t.start()
+
+    # 모든 클라이언트가 붙을 때까지 대기
+    deadline = time.time() + 10
+    while broadcaster.client_count() < n and time.time() < deadline:
+        time.sleep(0.05)
+
+    published = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        published += 1
+        broadcaster.publish({'sea': 1.0, 'lake': -1.0, 'head': 2.0, 'waste': published, 'loss_cum': 0})
+        time.sleep(1 / args.rate)
+    time.sleep(0.5)
+    stop.set()
+
+    fast = counts[:args.clients]
+    stats = broadcaster.get_stats()
+    poll_requests = int(n * args.duration / args.poll_interval)
+    print(f"👥 클라이언트 {n}개 (느린 클라이언트 {args.slow_clients}개), {args.rate} Hz x {args.duration:.0f}s")
+    print(f"📤 발행 메시지          : {published}")
+    print(f"📥 일반 클라이언트 수신 : 최소 {min(fast)}, 최대 {max(fast)}")
+    print(f"✂️ 끊긴 느린 클라이언트 : {stats['dropped_clients']}")
+    print(f"🌐 HTTP 요청 수         : SSE {n} vs 폴링 {poll_requests:,}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import http.client
+import multiprocessing as mp
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic import make_history
+
+SERVE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "serve.py"))
+
+# 운영 모드(serve.py) 부하 테스트: worker 수별 초당 요청 수
+# worker 수마다 serve.py 를 새로 띄우고, 클라이언트 프로세스 여러 개가 keep-alive 연결로 duration 동안 요청을 보냄
+# 요청은 실시간 값(/data, 공유 링버퍼), 최근 이력(/data/recent), 과거 기간 조회(/api/history, memory-map + 리샘플)를 섞음
+# 클라이언트도 CPU 를 쓰므로 코어 수가 적은 머신에서는 worker 를 늘려도 처리량이 거의 같음 (결과에 코어 수를 같이 출력)
+
+PATHS = [
+    '/data',
+    '/data/recent?seconds=60',
+    '/api/history?start=2024-01-01&end=2024-01-07&resample=10min',
+    '/api/history?start=2024-02-01&end=2024-03-31',
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def client(port, duration, seed, out):
+    rng = np.random.default_rng(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        path = PATHS[rng.integers(len(PATHS))]
+        t0 = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            res = conn.getresponse()
+            res.read()
+            if res.status != 200:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - t0)
+    out.put((latencies, errors))
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/ready')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run(workers, args, env):
+    port = free_port()
+    server = subprocess.Popen([sys.executable, SERVE, '--workers', str(workers), '--threads', str(args.threads),
+                               '--bind', f'127.0.0.1:{port}'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_ready(port):
+            raise RuntimeError(f"serve.py (workers={workers}) 가 준비되지 않았습니다")
+        # 각 worker 의 날짜 캐시 등을 데우는 짧은 예열
+        ctx = mp.get_context('spawn')
+        out = ctx.Queue()
+        warm = [ctx.Process(target=client, args=(port, 1.0, i, out)) for i in range(args.clients)]
+        for p in warm:
+            p.start()
+        for _ in warm:
+            out.get()
+
+        procs = [ctx.Process(target=client, args=(port, args.duration, 100 + i, out)) for i in range(args.clients)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    latencies = np.concatenate([np.asarray(l) for l, _ in results])
+    errors = sum(e for _, e in results)
+    return len(latencies) / args.duration, np.percentile(latencies, [50, 99]) * 1000, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="serve.py worker 수별 처리량")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--days', type=int, default=90, help="합성 과거 CSV 일수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'sihwa_history.csv')
+        make_history(csv_path, args.days)
+        env = dict(os.environ, SIHWA_HISTORY_CSV=csv_path, SIHWA_SERIAL_PORT='loop://', SIHWA_START_TIDE_FEED='0',
+                   SIHWA_SENSOR_DB=os.path.join(workdir, 'sensor_log.sqlite3'), PYTHONWARNINGS='ignore')
+        print(f"🖥️ CPU {os.cpu_count()}개, 클라이언트 프로세스 {args.clients}개 x {args.duration:.0f}s, "
+              f"worker 당 쓰레드 {args.threads}개")
+        base = None
+        for workers in args.workers:
+            rps, (p50, p99), errors = run(workers, args, env)
+            base = base or rps
+            print(f"  workers={workers:>2}  {rps:8.1f} req/s (x{rps / base:.2f})  "
+                  f"p50 {p50:6.1f} ms  p99 {p99:6.1f} ms  오류 {errors}")
+
+
+if __name__ == '__main__':
+    main()
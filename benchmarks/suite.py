@@ -0,0 +1,290 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.normpath(os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+import data_loader
+from synthetic import HISTORY_DAYS_1X, write_dataset
+
+# 분석 파이프라인 + 웹 엔드포인트 벤치마크 모음 (커밋 사이 비교용 JSON 출력)
+#   python benchmarks/suite.py                       # 1x, 10x, 100x 전체 -> benchmarks/results/<커밋>-<시각>.json
+#   python benchmarks/suite.py --scales 1 10 --stages baseline loss_decision
+#   python benchmarks/compare.py 이전.json 새것.json  # 느려진 단계 표시
+#
+# 합성 데이터(synthetic.py)는 data/.cache/bench/ 에 배수별로 한 번만 만들어 둠
+# 단계마다 repeat 번 재서 최소값을 쓰고, 최대 메모리는 tracemalloc 을 켠 채로 한 번 더 실행해서 잼
+# (tracemalloc 은 느려지므로 시간 측정과 따로)
+
+SCALES = (1, 10, 100)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DATA_DIR = os.path.join(ROOT_DIR, "data", ".cache", "bench")
+RESULT_VERSION = 1
+
+LAG = 3                 # 00.py 의 기본 시차 (lag_scan 결과 대신 고정)
+SMP = 150
+CLEAN_COST = 5_000_000
+RF_TREES = 20
+API_DAYS = 60           # /api/history/<날짜> 를 몇 개 날짜에 요청할지
+
+
+# --- 단계: ctx -> 처리한 행 수 (또는 (행 수, 추가 기록 dict)) ---
+def stage_csv_load(ctx):
+    """CSV 파싱 (data_loader, Feather 캐시 없이)"""
+    frames = [data_loader.load(name, ctx['paths'][name], use_cache=False)
+              for name in ('power', 'rain', 'merged', 'env_monthly')]
+    return sum(len(df) for df in frames)
+
+
+def stage_compact_load(ctx):
+    """병합 시간 CSV -> 메모리 절약 스키마 (data_loader.load_compact, Feather 캐시 없이)"""
+    return len(data_loader.load_compact(ctx['paths']['merged'], use_cache=False))
+
+
+def stage_history_load(ctx):
+    """1분 간격 과거 CSV -> HistoryStore (웹 앱 시작 시 로드)"""
+    from history_store import HistoryStore
+
+    return len(HistoryStore.from_csv(ctx['paths']['history']))
+
+
+def stage_merge_00(ctx):
+    """00.py: 발전 + 강수 시간 병합, 시차 반영 후 낙차 구간 x 상태별 효율 비교"""
+    power, rain = ctx['power'], ctx['rain']
+    ts = power['날짜'] + pd.to_timedelta(power['시간'].str[:2].astype(int), unit='h')
+    df = pd.merge(power.assign(일시=ts), rain, on='일시', how='inner').sort_values('일시').reset_index(drop=True)
+
+    df['after_rain'] = df['평균강수량(mm)'].shift(LAG) > 0
+    df['efficiency'] = df['합계(킬로와트시)'] / df['낙차']
+    df = df[(df['낙차'] >= 1.0) & (df['합계(킬로와트시)'] > 0)].copy()
+    df['status'] = np.where(df['after_rain'], '비 온 후(쓰레기유입)', '맑음')
+    df['head_group'] = (df['낙차'] // 0.5) * 0.5
+    df.groupby(['head_group', 'status'])['efficiency'].mean().unstack()
+    return len(ts)
+
+
+def stage_baseline(ctx):
+    """Baseline.py: 정상 데이터 추출 + 낙차 구간별 기준 효율"""
+    from baseline_learner import BaselineLearner
+
+    df = ctx['merged']
+    df_base = df[(df['평균강수량(mm)'] <= 0.5) & (df['낙차'] > 1) & (df['합계(킬로와트시)'] > 0)].copy()
+    df_base['효율'] = df_base['합계(킬로와트시)'] / df_base['낙차']
+    learner = BaselineLearner()
+    learner.update_frame(df)
+    learner.group_baseline()
+    return len(df)
+
+
+def stage_loss_decision(ctx):
+    """decision.py: 시간별 손실액 + 1년 전체 이벤트 엔진 재생 (이벤트 구간 그래프는 figures 캐시라 제외)"""
+    from event_engine import RainEventEngine
+    from loss_engine import loss_won
+
+    df = ctx['compact'].assign(loss_won=0.0)
+    table = ctx['table']
+    df['loss_won'] = loss_won(df['낙차'].to_numpy(), df['합계(킬로와트시)'].to_numpy(), table, SMP)
+    RainEventEngine(table, smp=SMP, clean_cost=CLEAN_COST).replay(df)
+    return len(df)
+
+
+def stage_pattern_02(ctx):
+    """02_pattern.py: 월별 강우 패턴 지표 + 쓰레기 자료 병합 + 상관분석"""
+    from scipy.stats import pearsonr
+
+    from rain_features import METRICS, pattern_features
+
+    waste = ctx['env_monthly'].copy()
+    waste['date'] = waste['date'].dt.to_period('M')
+    monthly = pattern_features(ctx['rain'], freq='M')
+    monthly['month'] = monthly['period'].dt.to_period('M')
+    final = pd.merge(monthly, waste[['date', 'waste_sum']], left_on='month', right_on='date', how='inner')
+    for col in METRICS:
+        pearsonr(final[col], final['waste_sum'])
+    return len(ctx['rain'])
+
+
+def stage_rf_fit(ctx):
+    """00_randomforest.py: 월별 환경 자료를 붙인 학습 데이터로 랜덤 포레스트 (시계열 CV 2분할 + 최종 학습)"""
+    from model_pipeline import FEATURE_SETS, TARGET, fit_config
+
+    env = ctx['env_monthly'].copy()
+    env['date'] = env['date'].dt.to_period('M')
+    gen = ctx['power'].copy()
+    gen['YM'] = gen['날짜'].dt.to_period('M')
+    df = pd.merge(gen, env, left_on='YM', right_on='date', how='inner')
+    df = df[(df['낙차'] > 0) & (df['합계(킬로와트시)'] > 0)].copy()
+    df[TARGET] = df['합계(킬로와트시)'] / df['낙차']
+    features = FEATURE_SETS['full']
+    # 모델 캐시에 걸리지 않도록 매번 빈 폴더. 최대 메모리는 fit_config 가 잰 학습 중 RSS 증가분
+    # (tracemalloc 은 sklearn 의 C 할당을 못 봄, 잴 수 없는 OS 면 tracemalloc 값으로)
+    with tempfile.TemporaryDirectory() as model_dir:
+        result = fit_config(df[features], df[TARGET], features,
+                            {'n_estimators': ctx['rf_trees'], 'random_state': 42}, cv_splits=2, model_dir=model_dir)
+    return len(df), ({'peak_mb': result['fit_rss_mb']} if result['fit_rss_mb'] is not None else {})
+
+
+def stage_api_history(ctx):
+    """Flask /api/history/<날짜> (날짜별 응답 캐시를 비우고) + 전체 기간 /api/history"""
+    from api_codec import PayloadCache
+
+    svc, client = ctx['services'], ctx['client']
+    store = svc.history.get()
+    store.day.cache_clear()
+    svc.payloads = PayloadCache()
+    days = ctx['history_days']
+    for d in pd.date_range('2024-01-01', periods=days)[:: max(1, days // API_DAYS)]:
+        assert client.get(f'/api/history/{d:%Y-%m-%d}', headers={'Accept-Encoding': 'gzip'}).status_code == 200
+    end = pd.Timestamp('2024-01-01') + pd.Timedelta(days=days - 1)
+    assert client.get(f'/api/history?start=2024-01-01&end={end:%Y-%m-%d}').status_code == 200
+    return len(store)
+
+
+def stage_api_data(ctx):
+    """Flask /data x 500 + /data/recent?seconds=600 x 50 (링버퍼에 10분치 측정값)"""
+    client = ctx['client']
+    for _ in range(500):
+        assert client.get('/data').status_code == 200
+    for _ in range(50):
+        assert client.get('/data/recent?seconds=600').status_code == 200
+    return 550
+
+
+STAGES = {
+    'csv_load': stage_csv_load,
+    'compact_load': stage_compact_load,
+    'history_load': stage_history_load,
+    'merge_00': stage_merge_00,
+    'baseline': stage_baseline,
+    'loss_decision': stage_loss_decision,
+    'pattern_02': stage_pattern_02,
+    'rf_fit': stage_rf_fit,
+    'api_history': stage_api_history,
+    'api_data': stage_api_data,
+}
+
+
+# --- 준비 / 실행 ---
+def prepare(scale, seed, stages, workdir, rf_trees):
+    """배수별 입력 (시간 측정 밖): 합성 CSV, 타입이 정리된 DataFrame, 기준표, 테스트용 Flask 앱"""
+    from baseline_learner import BaselineLearner
+
+    paths = write_dataset(os.path.join(DATA_DIR, f'x{scale}_s{seed}'), scale, seed)
+    ctx = {'paths': paths, 'rf_trees': rf_trees, 'history_days': HISTORY_DAYS_1X * scale}
+    for name in ('power', 'rain', 'merged', 'env_monthly'):
+        ctx[name] = data_loader.load(name, paths[name])
+    ctx['compact'] = data_loader.load_compact(paths['merged'])
+    learner = BaselineLearner()
+    learner.update_frame(ctx['merged'])
+    ctx['table'] = learner.as_table()
+
+    if {'api_history', 'api_data'} & set(stages):
+        import app
+
+        flask_app = app.create_app({
+            'HISTORY_CSV': paths['history'], 'SENSOR_DB': os.path.join(workdir, f'sensor_x{scale}.sqlite3'),
+            'PRELOAD': 'lazy', 'START_DEVICES': False, 'START_TIDE_FEED': False, 'METRICS': False,
+        })
+        svc = flask_app.extensions['sihwa']
+        svc.history.get()
+        # 링버퍼에 2Hz x 10분 측정값
+        now = time.time()
+        for i in range(1200):
+            svc.ingestor.feed(f"{1.5 + 0.001 * i:.3f}|-0.52|{i % 300}\n".encode(), now=now - 600 + i * 0.5)
+        ctx.update(app=flask_app, services=svc, client=flask_app.test_client())
+    return ctx
+
+
+def measure(fn, ctx, repeat, memory):
+    runs, rows, extra = [], 0, {}
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(ctx)
+        runs.append(time.perf_counter() - t0)
+        rows, extra = out if isinstance(out, tuple) else (out, {})
+    result = {'rows': int(rows), 'seconds': min(runs), 'runs': runs}
+    if 'peak_mb' in extra:
+        result['peak_mb'] = extra['peak_mb']
+    elif memory:
+        tracemalloc.start()
+        fn(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_mb'] = round(peak / 1e6, 2)
+    return result
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return rev + ('-dirty' if dirty else '')
+
+
+def environment(args):
+    import sklearn
+
+    return {
+        'revision': git_revision(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__, 'pandas': pd.__version__, 'sklearn': sklearn.__version__,
+        'args': vars(args),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분석 파이프라인 / 웹 엔드포인트 벤치마크 모음")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(SCALES))
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rf-trees', type=int, default=RF_TREES)
+    parser.add_argument('--no-memory', action='store_true', help="tracemalloc 최대 메모리 측정 생략")
+    parser.add_argument('--out', default=None, help="결과 JSON 경로 (기본: benchmarks/results/<커밋>-<시각>.json)")
+    args = parser.parse_args()
+
+    report = {'version': RESULT_VERSION, 'environment': environment(args), 'results': []}
+    print(f"🧪 커밋 {report['environment']['revision']}, CPU {os.cpu_count()}개, 반복 {args.repeat}회")
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            t0 = time.perf_counter()
+            ctx = prepare(scale, args.seed, args.stages, workdir, args.rf_trees)
+            print(f"\n=== {scale}x (시간 자료 {len(ctx['merged']):,}행, 1분 자료 {ctx['history_days']}일, "
+                  f"준비 {time.perf_counter() - t0:.1f}s) ===")
+            for name in args.stages:
+                result = measure(STAGES[name], ctx, args.repeat, not args.no_memory)
+                report['results'].append(dict(stage=name, scale=scale, **result))
+                peak = f"{result['peak_mb']:9.1f} MB" if 'peak_mb' in result else ''
+                print(f"  {name:14s} {result['seconds'] * 1000:10.1f} ms  {result['rows']:>12,d}행  {peak}")
+            if 'app' in ctx:
+                ctx['services'].close()
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{report['environment']['revision']}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"\n💾 결과 저장: {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# 벤치마크용 합성 데이터 (data/ 의 CSV 와 같은 컬럼 / 인코딩 / 값 범위)
+#   power_2024_hourly.csv, rain_hourly_2024_avg.csv, power_rain_merged_2024.csv : 1시간 간격, 1x = 1년
+#   rain_waste_monthly_2020_2024_merged.csv                                   : 월별 (시간 자료와 같은 기간, 최소 2020~)
+#   sihwa_history.csv                                                         : 1분 간격, 1x = HISTORY_DAYS_1X 일
+# 배수(scale)만큼 기간을 늘림 (10x = 10년치 시간 자료). 끝은 항상 2024-12-31 이라 2024년 기준 코드도 그대로 동작.
+
+HOURLY_YEARS_1X = 1
+HISTORY_DAYS_1X = 30
+END_YEAR = 2024
+DATASET_VERSION = 1
+
+SEA_COL = '해수위(ELm)'
+LAKE_COL = '호수위(ELm)'
+KWH_COL = '합계(킬로와트시)'
+RAIN_COL = '평균강수량(mm)'
+UNIT_COLS = ['1호기(와트시)(1_3호)', '2호기(와트시)(4_6호)', '3호기(와트시)(7_10호)']
+UNIT_SHARE = [0.4, 0.4, 0.2]
+
+FILES = {
+    'power': 'power_2024_hourly.csv',
+    'rain': 'rain_hourly_2024_avg.csv',
+    'merged': 'power_rain_merged_2024.csv',
+    'env_monthly': 'rain_waste_monthly_2020_2024_merged.csv',
+    'history': 'sihwa_history.csv',
+}
+
+
+def hourly_frames(years, seed=0):
+    """발전 / 강수 / 병합 시간 자료 (조석 낙차 + 강우 이벤트 뒤 효율 저하)"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(f'{END_YEAR - years + 1}-01-01 01:00')
+    end = pd.Timestamp(f'{END_YEAR + 1}-01-01 00:00')
+    ts = pd.date_range(start, end, freq='h')
+    n = len(ts)
+    t = np.arange(n, dtype=np.float64)
+
+    # 12.42 시간 반일주조 + 14.8 일 대소조
+    sea = 2.5 * np.sin(2 * np.pi * t / 12.42) * (1 + 0.3 * np.sin(2 * np.pi * t / 354.4)) + rng.normal(0, 0.1, n)
+    lake = -1.9 + 0.4 * np.sin(2 * np.pi * t / 24.0 + 1.0) + rng.normal(0, 0.05, n)
+    sea, lake = np.round(sea, 2), np.round(lake, 2)
+    head = sea - lake
+
+    # 강수: 여름에 잦은 강우 이벤트 (시작 확률 x 지속 시간), 양은 감마 분포
+    summer = 1 + 2 * np.exp(-((ts.month.to_numpy() - 7.5) ** 2) / 2)
+    starts = rng.random(n) < 0.006 * summer
+    duration = rng.integers(2, 18, n)
+    raining = np.zeros(n, dtype=bool)
+    for i in np.flatnonzero(starts):
+        raining[i:i + duration[i]] = True
+    rain = np.round(np.where(raining, rng.gamma(0.8, 2.5, n), 0.0), 1)
+
+    # 발전: 낙차 1m 이상에서 효율 ~30,000 kWh/m, 비가 온 뒤 며칠 동안 쓰레기로 효율 저하
+    recent_rain = pd.Series(rain).rolling(72, min_periods=1).sum().to_numpy()
+    eff = 30_000 * (1 - 0.1 * np.tanh(recent_rain / 30)) * rng.normal(1, 0.05, n)
+    kwh = np.round(np.where(head >= 1.0, eff * head, 0.0), 2)
+
+    date_text = (ts - pd.Timedelta(hours=1)).strftime('%Y-%m-%d')     # 24:00 은 전날 날짜
+    hour = np.where(ts.hour == 0, 24, ts.hour)
+    power = pd.DataFrame({'날짜': date_text, '시간': [f'{h:02d}:00' for h in hour],
+                          '시간별단가': np.round(rng.normal(125, 30, n).clip(40, 230), 2)})
+    for col, share in zip(UNIT_COLS, UNIT_SHARE):
+        power[col] = np.round(kwh * 1000 * share, 1)
+    power['합계(와트시)'] = power[UNIT_COLS].sum(axis=1)
+    power[KWH_COL] = kwh
+    power[LAKE_COL] = lake
+    power[SEA_COL] = sea
+
+    rain_df = pd.DataFrame({'일시': ts.strftime('%Y-%m-%d %H:%M:%S'), RAIN_COL: rain})
+    merged = power.copy()
+    merged['일시'] = rain_df['일시']
+    merged[RAIN_COL] = rain
+    merged['낙차'] = head
+    return power, rain_df, merged
+
+
+def env_monthly_frame(merged, seed=0):
+    """월별 강수 / 쓰레기 (쓰레기는 월 강수량에 비례 + 잡음), 2020-01 부터 또는 시간 자료 시작부터"""
+    rng = np.random.default_rng(seed + 1)
+    ts = pd.to_datetime(merged['일시'])
+    first = min(ts.min().to_period('M'), pd.Period('2020-01', 'M'))
+    months = pd.period_range(first, pd.Period(f'{END_YEAR}-12', 'M'), freq='M')
+    rain = merged[RAIN_COL].groupby(ts.dt.to_period('M')).sum().reindex(months, fill_value=0.0)
+    rain_avg = rain.to_numpy() / 2 + rng.gamma(1.0, 10.0, len(months))
+    waste = np.round((40 + 0.35 * rain_avg + rng.normal(0, 15, len(months))).clip(3, None), 2)
+    return pd.DataFrame({'date': months.strftime('%Y-%m'), 'rain_avg': rain_avg, 'waste_sum': waste})
+
+
+def history_frame(days, seed=0):
+    """sihwa_history.csv 형식 (1분 간격 해수위/호수위)"""
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range('2024-01-01', periods=days * 1440, freq='min')
+    t = np.arange(len(ts))
+    return pd.DataFrame({
+        '일자': ts.strftime('%Y-%m-%d %H:%M'),
+        '해수위(EL.m)': np.round(3 * np.sin(t / 372.6) + rng.normal(0, 0.05, len(t)), 2),
+        '호수위(EL.m)': np.round(-1.5 + 0.3 * np.sin(t / 1000), 2),
+    })
+
+
+def make_history(path, days, seed=0):
+    history_frame(days, seed).to_csv(path, index=False, encoding='cp949')
+
+
+def write_dataset(directory, scale=1, seed=0):
+    """scale 배 데이터셋을 directory 에 CSV 로 (이미 만들어져 있으면 그대로), {이름: 경로} 반환"""
+    paths = {name: os.path.join(directory, filename) for name, filename in FILES.items()}
+    marker = os.path.join(directory, f'.complete_v{DATASET_VERSION}')
+    if os.path.exists(marker):
+        return paths
+
+    os.makedirs(directory, exist_ok=True)
+    power, rain, merged = hourly_frames(HOURLY_YEARS_1X * scale, seed)
+    power.to_csv(paths['power'], index=False, encoding='utf-8-sig')
+    rain.to_csv(paths['rain'], index=False, encoding='utf-8-sig')
+    merged.to_csv(paths['merged'], index=False, encoding='utf-8-sig')
+    env_monthly_frame(merged, seed).to_csv(paths['env_monthly'], index=False, encoding='utf-8-sig')
+    make_history(paths['history'], HISTORY_DAYS_1X * scale, seed)
+    open(marker, 'w').close()
+    return paths
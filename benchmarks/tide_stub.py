@@ -0,0 +1,185 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tide_feed import FALLBACK_DATA, TideFeed
+
+# K-water 조위 API(sihwaequiplist) 로컬 스텁 서버 + TideFeed 캐시 동작 확인
+#   - 동시에 들어온 miss 는 업스트림 한 번으로 합쳐지는지 (ttl 안에서는 더 부르지 않음)
+#   - ttl 이 지나면 이전 값을 바로 돌려주고 뒤에서 갱신하는지 (stale-while-revalidate)
+#   - 업스트림이 실패해도 캐시가 있으면 이전 값을 계속 주는지
+#   - 캐시 없이 실패하면 error_ttl 동안은 업스트림을 다시 부르지 않고 대체 데이터를 주는지
+# --serve: 스텁만 띄워 두고 앱을 붙여 볼 때 (KWATER_API_URL=<출력된 주소> python src/serve.py)
+
+ROWS = 24
+
+
+def tide_xml(version):
+    """sihwaequiplist 형식 응답 (최신이 먼저). 해수위에 version 을 더해 어느 응답인지 구분"""
+    items = ''.join(
+        f"<item><obsdt>2024-01-01 {h:02d}:00</obsdt><seaRwl>{version + h / 10:.2f}</seaRwl>"
+        f"<lakeRwl>{-1 - h / 100:.2f}</lakeRwl></item>"
+        for h in reversed(range(ROWS)))
+    return f"<response><body><items>{items}</items></body></response>".encode()
+
+
+class TideStub(ThreadingHTTPServer):
+    """호출 수를 세고, 응답 지연 / 실패를 바꿀 수 있는 스텁"""
+    daemon_threads = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.delay = delay
+        self.failing = False
+        self.calls = 0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/sihwaequiplist"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        stub = self.server
+        with stub.lock:
+            stub.calls += 1
+            stub.version += 1
+            version, failing = stub.version, stub.failing
+        time.sleep(stub.delay)
+        if failing:
+            self.send_error(503)
+            return
+        body = tide_xml(version)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/xml')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def wait_until(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def check_coalescing(stub, clients, ttl):
+    feed = TideFeed(stub.url, 'stub', ttl=ttl, stale_ttl=ttl * 4, error_ttl=ttl)
+    results = [None] * clients
+    barrier = threading.Barrier(clients)
+
+    def worker(i):
+        barrier.wait()
+        results[i] = feed.get()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    first = stub.calls
+    for _ in range(clients):
+        feed.get()  # ttl 안: 캐시 그대로
+
+    ok = first == 1 and stub.calls == 1 and all(r is results[0] and r is not FALLBACK_DATA for r in results)
+    return ok, f"동시 miss {clients}개 -> 업스트림 {first}회, ttl 안 {clients}회 더 조회 후 {stub.calls}회 " \
+               f"(합쳐짐 {feed.stats['coalesced']})"
+
+
+def check_stale_while_revalidate(stub, ttl):
+    feed = TideFeed(stub.url, 'stub', ttl=ttl, stale_ttl=ttl * 4, error_ttl=ttl)
+    old = feed.get()
+    time.sleep(ttl * 1.2)
+
+    t0 = time.perf_counter()
+    stale = feed.get()
+    elapsed = time.perf_counter() - t0
+    refreshed = wait_until(lambda: feed.get() is not stale)
+    ok = stale is old and elapsed < stub.delay and refreshed and stub.calls == 2
+    return ok, f"ttl 지난 뒤 이전 값을 {elapsed * 1000:.1f} ms 만에 반환 (업스트림 지연 {stub.delay * 1000:.0f} ms), " \
+               f"뒤에서 갱신 {'됨' if refreshed else '안 됨'}, 업스트림 {stub.calls}회"
+
+
+def check_stale_on_error(stub, ttl):
+    feed = TideFeed(stub.url, 'stub', ttl=ttl, stale_ttl=ttl * 4, error_ttl=ttl)
+    good = feed.get()
+    stub.failing = True
+    time.sleep(ttl * 1.2)
+
+    served = feed.get()     # stale: 이전 값 + 뒤에서 갱신 시도 (실패)
+    failed = wait_until(lambda: feed.stats['upstream_errors'] == 1)
+    again = feed.get()
+    ok = served is good and again is good and failed
+    return ok, f"업스트림 실패(503) 중에도 이전 값 유지 (오류 {feed.stats['upstream_errors']}회, 업스트림 {stub.calls}회)"
+
+
+def check_error_ttl(stub, ttl):
+    stub.failing = True
+    feed = TideFeed(stub.url, 'stub', ttl=ttl, stale_ttl=ttl * 4, error_ttl=ttl)
+    first = feed.get()
+    for _ in range(10):
+        feed.get()  # error_ttl 안: 업스트림을 다시 부르지 않음
+    within = stub.calls
+    time.sleep(ttl * 1.2)
+    feed.get()
+    ok = first is FALLBACK_DATA and within == 1 and stub.calls == 2
+    return ok, f"캐시 없이 실패 -> 대체 데이터, error_ttl 안 10회 조회에 업스트림 {within}회, 지난 뒤 {stub.calls}회"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="K-water 조위 API 스텁 + TideFeed 캐시 확인")
+    parser.add_argument('--clients', type=int, default=20, help="동시에 조회하는 쓰레드 수")
+    parser.add_argument('--ttl', type=float, default=0.5, help="확인용 ttl (초, stale_ttl = 4 x ttl, error_ttl = ttl)")
+    parser.add_argument('--delay', type=float, default=0.2, help="스텁 응답 지연 (초)")
+    parser.add_argument('--serve', action='store_true', help="확인 없이 스텁만 띄우기 (Ctrl+C 로 종료)")
+    args = parser.parse_args()
+
+    if args.serve:
+        stub = TideStub(args.delay)
+        print(f"스텁 주소: {stub.url}")
+        print(f"KWATER_API_URL={stub.url} python src/serve.py")
+        try:
+            stub.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    checks = [
+        ('요청 합치기', lambda stub: check_coalescing(stub, args.clients, args.ttl)),
+        ('stale-while-revalidate', lambda stub: check_stale_while_revalidate(stub, args.ttl)),
+        ('실패 시 이전 값', lambda stub: check_stale_on_error(stub, args.ttl)),
+        ('error_ttl', lambda stub: check_error_ttl(stub, args.ttl)),
+    ]
+    failed = []
+    for name, check in checks:
+        # 확인마다 새 스텁 (호출 수를 0 부터 셈)
+        stub = TideStub(args.delay)
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        try:
+            ok, detail = check(stub)
+        finally:
+            stub.shutdown()
+            stub.server_close()
+        print(f"  {'✅' if ok else '❌'} {name:24s} {detail}")
+        if not ok:
+            failed.append(name)
+
+    if failed:
+        print(f"\n❌ [오류] TideFeed 캐시 동작이 기대와 다름: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ [성공] 업스트림은 ttl 당 한 번, 실패해도 캐시된 값 / 대체 데이터로 응답")
+
+
+if __name__ == '__main__':
+    main()
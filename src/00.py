@@ -1,57 +1,30 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# 1. 환경 설정
-plt.rcParams['font.family'] = 'Malgun Gothic'
-plt.rcParams['axes.unicode_minus'] = False
-
-# 2. 데이터 로드
-# 시간별 발전 데이터
-df_gen = pd.read_csv('data/power_2024_hourly.csv', encoding='utf-8-sig') 
-# 시간별 강수량 데이터 (컬럼명: 일시, 평균강수량(mm))
-df_rain = pd.read_csv('data/rain_hourly_2024_avg.csv') 
-
-# 3. 날짜 형식 통일 및 데이터 병합
-df_gen['날짜'] = pd.to_datetime(df_gen['날짜'])
-df_rain['일시'] = pd.to_datetime(df_rain['일시'])
-
-# '날짜'와 '일시'를 기준으로 병합하여 강수량 정보를 발전 데이터에 붙임
-df = pd.merge(df_gen, df_rain, left_on='날짜', right_on='일시', how='inner')
-
-# 4. 효율 계산 및 데이터 정제
-df['낙차'] = df['해수위(ELm)'] - df['호수위(ELm)']
-df['efficiency'] = df['합계(킬로와트시)'] / df['낙차']
-
-# 유효 데이터 필터링 (낙차 1.0m 이상)
-df = df[(df['낙차'] >= 1.0) & (df['합계(킬로와트시)'] > 0)].copy()
-
-# 5. 시차(Time Lag) 반영 및 상태 정의
-# 비 온 뒤 3시간 후에 쓰레기가 유도된다는 상관분석 결과 반영
-df['after_rain_3h'] = df['평균강수량(mm)'].shift(3) > 0
-
-df['status'] = '맑음'
-df.loc[df['after_rain_3h'] == True, 'status'] = '비 온 후(쓰레기유입)'
-
-# 6. 낙차 구간별(Head Group) 효율 비교
-df['head_group'] = (df['낙차'] // 0.5) * 0.5
-comparison = df.groupby(['head_group', 'status'])['efficiency'].mean().unstack()
+from data_loader import load_compact
+from figures import export
+from lag_scan import after_rain_comparison, best_lag, load_or_build
+
+# 1~3. 데이터 로드 (발전 + 강수 시간별 통합 데이터, 그래프 폰트/스타일은 figures.py 에서 설정)
+# 발전 데이터의 '날짜' 는 날짜만 있어서 '일시' 와 직접 병합하면 자정 행만 남으므로 병합본을 사용
+# 메모리 절약 스키마(일시 순 정렬 + float32 + 플래그)로 읽고, 이후 필터링은 복사 대신 마스크로
+# 일시 순 정렬이라 자정(00:00) 행 위치가 CSV 와 달라지고, 시차(shift)도 파일 행 순서가 아닌 일시 기준
+df = load_compact()
+
+# 4. 시차(Time Lag) 반영
+# 강수 -> 효율 lag 상관 스캔(lag_scan)에서 유의하게 효율을 낮추는 시차를 가져옴 (없으면 기존 3시간)
+# 스캔 표는 data/.cache 에 저장되므로 데이터가 바뀔 때만 다시 계산 (병렬 계산은 python src/lag_scan.py)
+LAG = best_lag(load_or_build(max_workers=1))
+print(f"⏱️ 적용 시차: 비 온 뒤 {LAG}시간")
+
+# 5~6. 효율 계산, 상태 정의, 낙차 구간별(Head Group) 효율 비교
+# lag_scan.after_rain_comparison: 필터링 전에 shift, 유효 데이터는 마스크로만 (chunked.py 결과 비교 기준)
+_, comparison = after_rain_comparison(df, LAG)
 
 # 결과가 있는 구간에 대해 효율 감소율 계산
-if '비 온 후(쓰레기유입)' in comparison.columns and '맑음' in comparison.columns:
-    comparison['효율감소율(%)'] = (comparison['맑음'] - comparison['비 온 후(쓰레기유입)']) / comparison['맑음'] * 100
+if '효율감소율(%)' in comparison.columns:
     print("=== 📊 [분석결과] 낙차 조건을 통제한 실시간 쓰레기 페널티 ===")
     print(comparison.dropna())
 
-    # 7. 시각화
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=df, x='head_group', y='efficiency', hue='status', 
-                 hue_order=['맑음', '비 온 후(쓰레기유입)'], marker='o')
-    plt.title('낙차 구간별 쓰레기 유입에 따른 실제 효율 저하 (이전 분석 결과 반영)', fontsize=15)
-    plt.xlabel('낙차 구간 (m)')
-    plt.ylabel('평균 발전 효율 (kWh/m)')
-    plt.grid(True, alpha=0.3)
-    plt.show()
+    # 7. 시각화 - figures.draw_lag_efficiency (화면 없이 렌더링, 입력과 시차가 같으면 캐시된 그림 재사용)
+    export({'data/lag_efficiency.png': ('lag_efficiency', {'lag': LAG})})
+    print("✅ 그래프 저장: data/lag_efficiency.png")
 else:
-    print("⚠️ 비교할 수 있는 강우 후 데이터가 부족합니다.")
\ No newline at end of file
+    print("⚠️ 비교할 수 있는 강우 후 데이터가 부족합니다.")
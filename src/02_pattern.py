@@ -1,41 +1,26 @@
 import pandas as pd
-import numpy as np
 from scipy.stats import pearsonr
 
+from data_loader import load_env_monthly, load_rain
+from rain_features import pattern_features
+
 # 1. 데이터 로드
 # 시간별 강수량 데이터 (컬럼명: 일시, 평균강수량(mm))
-df_rain = pd.read_csv('data/rain_hourly_2024_avg.csv')
-df_rain['일시'] = pd.to_datetime(df_rain['일시'])
+df_rain = load_rain()
 
 # 월별 쓰레기 데이터 (컬럼명: date, waste_sum)
-df_waste = pd.read_csv('data/rain_waste_monthly_2020_2024_merged.csv')
-df_waste['date'] = pd.to_datetime(df_waste['date']).dt.to_period('M')
+df_waste = load_env_monthly()
+df_waste['date'] = df_waste['date'].dt.to_period('M')
 
 # 2. 강우 패턴 지표 계산 (월 단위 요약)
-df_rain['month'] = df_rain['일시'].dt.to_period('M')
-
-def top10_ratio(x):
-    if x.sum() == 0: return 0
-    threshold = np.percentile(x, 90)
-    return x[x >= threshold].sum() / x.sum()
-
-# 월별로 묶어서 패턴 변수 생성
-monthly_rain = df_rain.groupby('month')['평균강수량(mm)'].agg(
-    rain_sum='sum',    # 월 누적 강수량
-    rain_peak='max',   # 월 최대 시간 강수량
-).reset_index()
-
-# 집중 강우 시간 수 (10mm/h 이상)
-heavy_hours = df_rain[df_rain['평균강수량(mm)'] >= 10].groupby('month')['평균강수량(mm)'].count().reset_index()
-heavy_hours.columns = ['month', 'heavy_hours']
-
-# 상위 10% 집중도
-top10 = df_rain.groupby('month')['평균강수량(mm)'].apply(top10_ratio).reset_index()
-top10.columns = ['month', 'top10_ratio']
+# 정렬된 배열 한 번으로 월 누적/최대 강수량, 집중 강우 시간 수(10mm/h 이상), 상위 10% 집중도를 계산
+monthly = pattern_features(df_rain, freq='M')
+monthly['month'] = monthly['period'].dt.to_period('M')
+monthly = monthly[['month', 'rain_sum', 'rain_peak', 'heavy_hours', 'top10_ratio']]
+# 저장 파일 형식 유지: 예전 결과(병합 후 fillna)와 같이 집중 강우 시간 수는 실수로
+monthly['heavy_hours'] = monthly['heavy_hours'].astype('float64')
 
 # 3. 데이터 통합
-monthly = pd.merge(monthly_rain, heavy_hours, on='month', how='left').fillna(0)
-monthly = pd.merge(monthly, top10, on='month', how='left')
 # 쓰레기 데이터와 최종 병합
 final_pattern = pd.merge(monthly, df_waste[['date', 'waste_sum']], left_on='month', right_on='date', how='inner')
 
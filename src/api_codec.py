@@ -0,0 +1,170 @@
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from flask import Response
+
+from metrics import REGISTRY
+
+try:
+    import brotli
+except ImportError:     # 선택 의존성: 없으면 gzip 만 씀
+    brotli = None
+
+# JSON 데이터 API(/api/history, /api/realtime) 응답 인코딩
+# - 형식(Accept 또는 ?format=):
+#     json     application/json (기본, 기존 화면 그대로)
+#     columnar application/vnd.sihwa.columnar+json  숫자 컬럼은 float32 little-endian 을 base64 로
+#              {"sea": {"dtype": "float32", "b64": "..."}, "times": [...], ...}
+#     arrow    application/vnd.apache.arrow.stream  Arrow IPC 스트림 (pyarrow 는 이 형식을 요청할 때만 import)
+#   columnar / arrow 는 파싱 없이 typed array 로 받기 위한 것 (2자리로 반올림한 JSON 숫자가 float32 바이트보다
+#   압축이 잘 돼서 전송 바이트는 json+br 이 가장 작음, benchmarks/bench_api_codec.py)
+# - 압축(Accept-Encoding): br(brotli 모듈이 있을 때) > gzip, 작은 응답은 압축하지 않음
+# - 본문 해시로 약한 ETag -> If-None-Match 가 같으면 304 (압축 방식이 달라도 같은 ETag)
+# - 인코딩 결과(압축본 포함)는 PayloadCache 에 두고 과거 날짜처럼 바뀌지 않는 응답에서 재사용
+
+FORMATS = {
+    'json': 'application/json',
+    'columnar': 'application/vnd.sihwa.columnar+json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+VARY = 'Accept, Accept-Encoding'
+
+ENCODE_SECONDS = REGISTRY.histogram('sihwa_encode_seconds', "응답 직렬화/압축 시간 (캐시 미스만)", ('step',))
+
+
+def negotiate_format(request):
+    """?format= 이 있으면 그것, 없으면 Accept 헤더 (*/* 나 헤더가 없으면 json)"""
+    name = request.args.get('format')
+    if name is not None:
+        if name not in FORMATS:
+            raise ValueError(f"format 은 {', '.join(FORMATS)} 중 하나여야 합니다.")
+        return name
+    best = request.accept_mimetypes.best_match(list(FORMATS.values()), default=FORMATS['json'])
+    return next(name for name, mime in FORMATS.items() if mime == best)
+
+
+def negotiate_encoding(request):
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _is_numeric(values):
+    return isinstance(values, list) and bool(values) and all(
+        isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+
+
+def _columnar(data):
+    out = {}
+    for key, value in data.items():
+        if _is_numeric(value):
+            raw = np.asarray(value, dtype='<f4').tobytes()
+            out[key] = {'dtype': 'float32', 'b64': base64.b64encode(raw).decode('ascii')}
+        else:
+            out[key] = value
+    return out
+
+
+def _arrow(data):
+    """같은 길이의 리스트는 컬럼, 나머지(resample 같은 값)는 스키마 metadata 로"""
+    import pyarrow as pa
+
+    columns, meta = {}, {}
+    for key, value in data.items():
+        if isinstance(value, list):
+            columns[key] = pa.array(value, type=pa.float32()) if _is_numeric(value) else pa.array(value)
+        else:
+            meta[key] = json.dumps(value, ensure_ascii=False)
+    if len({len(col) for col in columns.values()}) > 1:
+        raise ValueError("arrow 형식은 길이가 같은 컬럼만 보낼 수 있습니다.")
+    table = pa.table(columns).replace_schema_metadata(meta)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode(data, fmt):
+    if fmt == 'columnar':
+        data = _columnar(data)
+    elif fmt == 'arrow':
+        return _arrow(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class Payload:
+    """인코딩된 본문 하나 + ETag, 압축본은 처음 요청될 때 만들어 보관"""
+
+    def __init__(self, data, fmt):
+        t0 = time.perf_counter()
+        self.body = encode(data, fmt)
+        ENCODE_SECONDS.observe(time.perf_counter() - t0, fmt)
+        self.mimetype = FORMATS[fmt]
+        self.etag = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self._compressed = {}
+
+    def body_for(self, encoding):
+        if encoding is None or len(self.body) < MIN_COMPRESS_BYTES:
+            return self.body, None
+        if encoding not in self._compressed:
+            t0 = time.perf_counter()
+            self._compressed[encoding] = compress(self.body, encoding)
+            ENCODE_SECONDS.observe(time.perf_counter() - t0, encoding)
+        return self._compressed[encoding], encoding
+
+
+class PayloadCache:
+    """(키, 형식) -> Payload LRU (바뀌지 않는 응답만 넣을 것)"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, fmt, build):
+        key = (key, fmt)
+        with self._lock:
+            payload = self._items.get(key)
+            if payload is not None:
+                self._items.move_to_end(key)
+                return payload
+        # 인코딩은 락 밖에서 (같은 키가 동시에 들어오면 두 번 만들 수 있지만 결과는 같음)
+        payload = Payload(build(), fmt)
+        with self._lock:
+            self._items[key] = payload
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return payload
+
+
+def respond(request, payload, max_age=0):
+    """조건부 GET(304) + 압축 협상까지 한 응답 (max_age=0 이면 매번 ETag 로 재검증)"""
+    cache_control = f'public, max-age={max_age}' if max_age else 'no-cache'
+    headers = {'Vary': VARY, 'Cache-Control': cache_control}
+    if request.if_none_match.contains_weak(payload.etag):
+        response = Response(status=304, headers=headers)
+    else:
+        body, encoding = payload.body_for(negotiate_encoding(request))
+        response = Response(body, mimetype=payload.mimetype, headers=headers)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(payload.etag, weak=True)
+    return response
@@ -1,175 +1,735 @@
-from flask import Flask, render_template, jsonify
-import serial
+from flask import Blueprint, Flask, current_app, render_template, jsonify, request, Response, send_file
+from datetime import date
 import threading
 import time
-import requests
-import xml.etree.ElementTree as ET
-from datetime import datetime, timedelta
-import pandas as pd
 import os
 
-app = Flask(__name__)
+from api_codec import Payload, PayloadCache, negotiate_format, respond
+from broadcast import Broadcaster
+from device_manager import DeviceManager, load_device_config
+from lazy_resource import LazyResource
+from metrics import CONTENT_TYPE, REGISTRY, RequestProfile, Sampler, from_stats, render
+from sensor_log import DB_PATH, SensorLog
+from tide_feed import SharedTideFeed, TideFeed
+
+# 앱 팩토리: import 만 해서는 아무것도 열거나 읽지 않고, create_app() 에서 초기화
+# - pandas / sklearn / matplotlib 을 쓰는 모듈(history_store, baseline_learner, predictor, figures, lag_scan,
+#   monte_carlo ...)은 처음 쓰는 함수 안에서 import
+# - 과거 CSV / 기준효율 학습기 / 예측 모델은 백그라운드 쓰레드에서 로드하고, 그 전에 들어온 요청은 로드를 기다림
+#   (/ready 로 구성요소별 상태 확인)
+# - 시리얼 장치 / 조위 갱신 쓰레드 시작 여부는 설정으로 (테스트, WSGI worker 에서 끌 수 있음)
+# - 요청/조회/업스트림 시간과 장치 수집 카운터는 /metrics (Prometheus text, metrics.py)
+#
+# 실행: python app.py / flask --app app run / 여러 worker 프로세스로는 python serve.py
 
-# --- [1] 과거 CSV 데이터 로드 로직 ---
-csv_df = None
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # src 폴더 기준 상위 폴더의 data/sihwa_history.csv 접근
 CSV_PATH = os.path.normpath(os.path.join(BASE_DIR, "..", "data", "sihwa_history.csv"))
 
-def init_csv():
-    global csv_df
-    if not os.path.exists(CSV_PATH):
-        print(f"❌ [오류] CSV 파일을 찾을 수 없습니다: {CSV_PATH}")
-        return
+# 스텁 서버로 테스트할 때는 KWATER_API_URL 환경변수로 주소를 바꿀 수 있음 (python benchmarks/tide_stub.py --serve)
+KWATER_URL = os.environ.get('KWATER_API_URL', 'http://apis.data.go.kr/B500001/dam/sihwavalue/sihwaequip/sihwaequiplist')
+KWATER_SERVICE_KEY = 'a8e1d37e6bc69ccac0b101c638f05e8a83ce096c866d4448f1c56ced78b6d28f'
 
-    try:
-        # 한글 깨짐 방지를 위해 cp949 사용
-        df = pd.read_csv(CSV_PATH, encoding="cp949")
-        
-        # '일자' 컬럼을 날짜 형식으로 변환 후 비교용/표시용 컬럼 생성
-        df['일자'] = pd.to_datetime(df['일자'])
-        df['date_only'] = df['일자'].dt.strftime('%Y-%m-%d')
-        df['time_only'] = df['일자'].dt.strftime('%H:%M')
-        
-        csv_df = df
-        print(f"✅ [성공] 과거 CSV 로드 완료 ({len(csv_df)} 행)")
-    except Exception as e:
-        print(f"❌ [오류] CSV 로드 중 에러 발생: {e}")
-
-# 서버 시작 전 CSV 미리 로드
-init_csv()
-
-# --- [2] 실시간 아두이노 데이터 보관함 및 통신 ---
-latest_data = {
-    "sea": 0.0, "lake": 0.0, "head": 0.0, 
-    "waste": 0, "loss_cum": 0
-}
-
-ser = None
-try:
-    ser = serial.Serial('COM3', 9600, timeout=1)
-    print("✅ [성공] 아두이노 포트(COM3) 개방 완료")
-except Exception as e:
-    print(f"⚠️ [주의] 아두이노 연결 실패(시뮬레이터 모드): {e}")
-
-def read_arduino():
-    global latest_data
-    while True:
-        if ser and ser.is_open:
-            try:
-                line = ser.readline().decode('utf-8').strip()
-                if line:
-                    parts = line.split("|")
-                    if len(parts) == 3:
-                        sea = float(parts[0])
-                        lake = float(parts[1])
-                        latest_data["sea"] = sea
-                        latest_data["lake"] = lake
-                        latest_data["head"] = abs(sea - lake)
-                        latest_data["waste"] = int(parts[2])
-                        latest_data["loss_cum"] += int(int(parts[2]) / 10)
-            except:
-                pass
-        time.sleep(0.1)
-
-# 아두이노 읽기 쓰레드 시작
-t = threading.Thread(target=read_arduino, daemon=True)
-t.start()
-
-# --- [3] K-water API 호출 함수 ---
-def get_kwater_data():
-    url = 'http://apis.data.go.kr/B500001/dam/sihwavalue/sihwaequip/sihwaequiplist'
-    service_key = 'a8e1d37e6bc69ccac0b101c638f05e8a83ce096c866d4448f1c56ced78b6d28f' 
-    
-    now = datetime.now()
-    today_str = now.strftime('%Y-%m-%d')
-    yesterday_str = (now - timedelta(days=1)).strftime('%Y-%m-%d')
-
-    params = {
-        'serviceKey' : service_key, 
-        'pageNo' : '1', 
-        'numOfRows' : '24', 
-        'stdt' : yesterday_str, 
-        'eddt' : today_str, 
-        '_type' : 'xml' 
-    }
+PRELOAD_MODES = ('background', 'lazy', 'eager')
+HTTP_REQUESTS = REGISTRY.counter('sihwa_http_requests_total', "요청 수", ('route', 'method', 'status'))
+HTTP_SECONDS = REGISTRY.histogram('sihwa_http_request_seconds', "요청 처리 시간 (SSE 는 응답 시작까지)", ('route',))
+QUERY_SECONDS = REGISTRY.histogram('sihwa_data_query_seconds', "데이터 API 조회 시간 (응답 캐시 미스만)", ('kind',))
 
-    try:
-        response = requests.get(url, params=params, timeout=5)
-        if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            sea_list, lake_list, time_list = [], [], []
-            
-            for item in root.findall('.//item'):
-                s = item.findtext('seaRwl')
-                l = item.findtext('lakeRwl')
-                t = item.findtext('obsdt')
-                if s and l:
-                    sea_list.append(float(s))
-                    lake_list.append(float(l))
-                    time_list.append(t[-5:] if t else "") 
-            
-            # 그래프 방향 정렬 (과거 -> 현재)
-            sea_list.reverse()
-            lake_list.reverse()
-            time_list.reverse()
-
-            if len(sea_list) > 0:
-                return {'sea': sea_list, 'lake': lake_list, 'times': time_list}
-    except Exception as e:
-        print(f"⚠️ API 오류: {e}")
-    
-    # API 실패 시 샘플 데이터
+# 오늘 이전 날짜의 과거 데이터 응답은 바뀌지 않으므로 브라우저 캐시 허용 (그 외는 매번 ETag 로 재검증)
+PAST_MAX_AGE = 86400
+# /ready 가 200 이 되려면 로드가 끝나야 하는 구성요소 (predictor 는 없어도 서비스 가능)
+READY_REQUIRES = ('history', 'baseline')
+# POST /api/baseline 으로 바뀐 학습기 상태는 이 시간 동안 모아서 한 번 저장 (종료 시에도 저장)
+BASELINE_SAVE_SECONDS = 10.0
+# /api/simulate: 웹 요청 한 번의 시나리오 상한 (1만 개 약 6초), 다른 계산이 돌고 있으면 이만큼만 기다리고 503
+SIMULATE_MAX_SCENARIOS = 10_000
+SIMULATE_WAIT_SECONDS = 1.0
+
+
+def _env_flag(name, default):
+    return os.environ.get(name, default).lower() not in ('0', 'false', 'no', 'off')
+
+
+def default_config():
+    """환경변수 -> 설정 (create_app(config) 로 덮어쓸 수 있음)"""
     return {
-        'sea': [3.1, 3.5, 4.2, 3.8, 2.5, 1.1, -0.5, -1.5, -2.0, -1.8, -0.5, 1.2],
-        'lake': [-1.2, -1.3, -1.5, -1.7, -1.9, -2.0, -1.8, -1.5, -1.2, -1.0, -0.8, -0.5],
-        'times': ["00:00", "02:00", "04:00", "06:00", "08:00", "10:00", "12:00", "14:00", "16:00", "18:00", "20:00", "22:00"]
+        'HISTORY_CSV': os.environ.get('SIHWA_HISTORY_CSV', CSV_PATH),
+        'SENSOR_DB': os.environ.get('SIHWA_SENSOR_DB', DB_PATH),
+        # background: 시작 직후 백그라운드 로드 / lazy: 첫 요청 때 로드 / eager: create_app 안에서 모두 로드
+        'PRELOAD': os.environ.get('SIHWA_PRELOAD', 'background'),
+        # 장치 목록은 SIHWA_DEVICES(JSON 또는 파일 경로), 없으면 SIHWA_SERIAL_PORT(기본 COM3) 한 대
+        # 하드웨어 없이 돌릴 때는 포트에 'loop://' 나 pty 경로를 지정, SIHWA_START_DEVICES=0 이면 포트를 열지 않음
+        'START_DEVICES': _env_flag('SIHWA_START_DEVICES', '1'),
+        'START_TIDE_FEED': _env_flag('SIHWA_START_TIDE_FEED', '1'),
+        # serial: 이 프로세스가 시리얼을 직접 읽음 / shared: serve.py 의 수집 프로세스가 쓰는 공유 링버퍼를 읽음
+        'SENSOR_SOURCE': os.environ.get('SIHWA_SENSOR_SOURCE', 'serial'),
+        # /metrics 용 요청 계측 (요청 시간은 METRICS_SAMPLE 번에 한 번만 잼, 요청 수는 매번)
+        'METRICS': _env_flag('SIHWA_METRICS', '1'),
+        'METRICS_SAMPLE': int(os.environ.get('SIHWA_METRICS_SAMPLE', '1')),
+        # 켜면 ?profile=1 이 붙은 요청을 cProfile 로 재서 data/.cache/profiles/ 에 저장 (응답 헤더 X-Profile)
+        'PROFILE': _env_flag('SIHWA_PROFILE', '0'),
     }
 
-# --- [4] 라우팅 (URL 연결) ---
 
-@app.route('/')
+class Services:
+    """앱 하나가 쓰는 상태 (장치, 로그, 캐시, 지연 로드 구성요소)"""
+
+    def __init__(self, config):
+        self.config = config
+
+        # --- [1] 과거 CSV 데이터 (날짜 인덱스 + float32 컬럼) ---
+        self.history = LazyResource('history', self._load_history)
+        # 날짜/기간별 인코딩된 응답(JSON, columnar, arrow + 압축본) 캐시
+        self.payloads = PayloadCache(maxsize=256)
+
+        # --- [2] 실시간 아두이노 데이터 수집 ---
+        # 새 측정값을 접속 중인 화면들에 밀어주는 SSE 브로드캐스터
+        self.broadcaster = Broadcaster(queue_size=16)
+
+        # 측정값 영구 저장 (SQLite WAL, 500행 또는 5초마다 한 번에 기록)
+        # shared: 여러 worker 중 하나, 기록은 수집 프로세스 하나만 하므로 여기서는 읽기 전용 연결
+        shared = config['SENSOR_SOURCE'] == 'shared'
+        if shared:
+            self.sensor_log = SensorLog(config['SENSOR_DB'], readonly=True)
+        else:
+            self.sensor_log = SensorLog(config['SENSOR_DB'], flush_rows=500, flush_seconds=5.0).start()
+
+        device_config = load_device_config('COM3')
+        if shared:
+            from shared_ring import SharedDevices
+            self.devices = SharedDevices([cfg['id'] for cfg in device_config])
+        else:
+            for cfg in device_config:
+                cfg.setdefault('loss_cum', self.sensor_log.loss_cum(cfg['id']))
+            self.devices = DeviceManager(device_config, history_hours=24)
+            for dev_id, dev in self.devices.devices.items():
+                dev.add_listener(self.sensor_log.listener(dev_id))
+
+        # 첫 번째 장치가 대시보드(/data, /stream)에 표시되는 기본 장치
+        self.ingestor = self.devices.primary()
+        self.ingestor.add_listener(self.publish_reading)
+
+        # --- [3] K-water API 조위 데이터 (캐시 + 백그라운드 갱신) ---
+        # shared: 업스트림은 수집 프로세스만 호출하고 worker 는 그 결과 파일을 읽음
+        if shared:
+            from shared_ring import tide_path
+            self.tide_feed = SharedTideFeed(tide_path(), ttl=300, stale_ttl=3600)
+        else:
+            self.tide_feed = TideFeed(KWATER_URL, KWATER_SERVICE_KEY, ttl=300, stale_ttl=3600)
+
+        # --- [4] 기준 효율 온라인 학습기 ---
+        # 저장된 상태(data/baseline_state.npz)를 불러오고, 새 시간 데이터가 들어오면 O(1) 로 갱신
+        self.baseline_lock = threading.Lock()
+        self.baseline = LazyResource('baseline', self._load_baseline)
+        self._baseline_save = None      # 예약된 저장 타이머
+
+        # --- [5] 강우 이벤트 / 수거 시점 판단 엔진 ---
+        # 시간 단위 레코드(강수량, 낙차, 발전량)를 받을 때마다 이벤트 상태와 누적 손실액을 갱신
+        self.event_lock = threading.Lock()
+        self.events = LazyResource('events', self._load_event_engine)
+
+        # --- [6] 효율 예측 모델 (00_randomforest.py 가 내보낸 data/models/efficiency_rf.joblib) ---
+        # 한 번만 로드, 동시 단건 요청은 배치 쓰레드가 모아서 predict 한 번
+        self.predictor = LazyResource('predictor', self._load_predictor)
+
+        self.simulate_lock = threading.Lock()
+
+    # --- 지연 로드 구성요소 ---
+    def _load_history(self):
+        from history_store import HistoryStore
+
+        path = self.config['HISTORY_CSV']
+        if not os.path.exists(path):
+            print(f"❌ [오류] CSV 파일을 찾을 수 없습니다: {path}")
+            raise FileNotFoundError(path)
+        try:
+            # 한글 깨짐 방지를 위해 cp949 사용, 파싱 결과는 data/.cache 의 .npy 를 memory-map (worker 끼리 공유)
+            store = HistoryStore.from_csv_cached(path, encoding="cp949")
+        except Exception as e:
+            print(f"❌ [오류] CSV 로드 중 에러 발생: {e}")
+            raise
+        print(f"✅ [성공] 과거 CSV 로드 완료 ({len(store)} 행)")
+        return store
+
+    def _load_baseline(self):
+        from baseline_learner import BaselineLearner
+
+        try:
+            learner = BaselineLearner.load_or_fit()
+        except Exception as e:
+            print(f"⚠️ [주의] 기준 효율 학습기 로드 실패: {e}")
+            raise
+        print("✅ [성공] 기준 효율 학습기 로드 완료")
+        return learner
+
+    def baseline_changed(self):
+        """학습기 상태 저장 예약 (BASELINE_SAVE_SECONDS 안의 변경은 한 번에 저장)"""
+        with self.baseline_lock:
+            if self._baseline_save is None:
+                self._baseline_save = threading.Timer(BASELINE_SAVE_SECONDS, self.save_baseline)
+                self._baseline_save.daemon = True
+                self._baseline_save.start()
+
+    def save_baseline(self):
+        with self.baseline_lock:
+            if self._baseline_save is None:
+                return
+            self._baseline_save.cancel()
+            self._baseline_save = None
+            learner = self.baseline.peek()
+            try:
+                if learner is not None:
+                    learner.save()
+            except OSError as e:
+                print(f"⚠️ [주의] 기준 효율 상태 저장 실패: {e}")
+
+    def _load_event_engine(self):
+        from event_engine import RainEventEngine
+
+        learner = self.baseline.get()
+        if learner is None:
+            return None
+        with self.baseline_lock:
+            table = learner.as_table()
+        return RainEventEngine(table, on_alert=lambda a: print(
+            f"🚨 [알림] 이벤트 {a['event_id']} 누적 손실 {a['cum_loss']:,.0f}원 - 수거 권장"))
+
+    def _load_predictor(self):
+        from predictor import load_predictor
+
+        try:
+            predictor = load_predictor()
+        except Exception as e:
+            print(f"⚠️ [주의] 효율 예측 모델 로드 실패: {e}")
+            raise
+        if predictor is None:
+            print("⚠️ [주의] 저장된 효율 모델이 없습니다 (python src/00_randomforest.py 먼저 실행)")
+        else:
+            print(f"✅ [성공] 효율 예측 모델 로드 완료 (특성: {', '.join(predictor.features)})")
+        return predictor
+
+    def publish_reading(self, snap):
+        # 예측 모델이 로드돼 있으면 실시간 측정값에 예상 효율/출력을 붙여서 push (로드 중이면 기다리지 않음)
+        predictor = self.predictor.peek()
+        if predictor is not None:
+            try:
+                snap = predictor.score_reading(snap)
+            except Exception as e:
+                print(f"⚠️ [주의] 실시간 예측 실패: {e}")
+        self.broadcaster.publish(snap)
+
+    # --- 시작 / 종료 ---
+    def start(self):
+        mode = self.config['PRELOAD']
+        if mode not in PRELOAD_MODES:
+            raise ValueError(f"PRELOAD 는 {', '.join(PRELOAD_MODES)} 중 하나여야 합니다: {mode}")
+        resources = (self.history, self.baseline, self.events, self.predictor)
+        if mode == 'eager':
+            for res in resources:
+                res.get()
+        elif mode == 'background':
+            # 쓰레드 하나에서 순서대로 (CSV 파싱과 모델 로드가 서로 CPU 를 뺏지 않도록)
+            threading.Thread(target=lambda: [res.get() for res in resources],
+                             name='preload', daemon=True).start()
+
+        if self.config['START_TIDE_FEED']:
+            self.tide_feed.start()
+        # 모든 장치를 쓰레드 하나로 읽음 (연결이 끊기면 장치별 지수 백오프로 재연결)
+        if self.config['START_DEVICES']:
+            self.devices.start()
+        return self
+
+    def close(self):
+        self.devices.stop()
+        self.tide_feed.stop()
+        self.sensor_log.close()
+        self.save_baseline()
+
+    def metric_families(self):
+        """구성요소들의 get_stats() 를 /metrics 형식으로 (읽을 때만 계산)"""
+        now = time.time()
+        devices = self.devices.get_stats()
+        for stats in devices.values():
+            if stats.get('last_ts'):
+                stats['last_reading_age_seconds'] = now - stats['last_ts']
+            stats['connected'] = int(bool(stats.get('connected')))
+        families = from_stats('sihwa_ingest', devices, 'device',
+                              counters=('lines', 'parse_errors', 'dropped_lines', 'serial_errors', 'listener_errors',
+                                        'errors', 'bytes', 'batches', 'reconnects'),
+                              gauges=('buffered_rows', 'backlog_bytes', 'last_reading_age_seconds', 'connected'))
+        families += from_stats('sihwa_tide', {None: self.tide_feed.get_stats()}, None,
+                               counters=('hits', 'stale_hits', 'misses', 'coalesced', 'upstream_calls',
+                                         'upstream_errors'),
+                               gauges=('age_seconds',))
+        families += from_stats('sihwa_sse', {None: self.broadcaster.get_stats()}, None,
+                               counters=('published', 'delivered', 'dropped_clients'), gauges=('clients',))
+        families += from_stats('sihwa_sensor_log', {None: dict(self.sensor_log.stats)}, None,
+                               counters=('rows_written', 'flushes'), gauges=('last_flush_ms',))
+        resources = {res.name: dict(res.status(), ready=int(res.state == 'ready'))
+                     for res in (self.history, self.baseline, self.events, self.predictor)}
+        families += from_stats('sihwa_resource', resources, 'resource', gauges=('ready', 'seconds'))
+        return families
+
+    def readiness(self):
+        components = {res.name: res.status()
+                      for res in (self.history, self.baseline, self.events, self.predictor)}
+        components['devices'] = {'state': 'running' if self.config['START_DEVICES'] else 'disabled'}
+        components['tide_feed'] = {'state': 'running' if self.config['START_TIDE_FEED'] else 'disabled'}
+        # lazy 모드에서는 아직 안 쓴 구성요소(pending)도 첫 요청 때 로드되므로 준비된 것으로 봄
+        done = ('ready', 'missing', 'failed') + (('pending',) if self.config['PRELOAD'] == 'lazy' else ())
+        ready = all(components[name]['state'] in done for name in READY_REQUIRES)
+        return ready, components
+
+
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config.update(default_config())
+    app.config.update(config or {})
+    app.extensions['sihwa'] = Services(app.config).start()
+    app.register_blueprint(bp)
+    _instrument(app)
+    return app
+
+
+def _instrument(app):
+    # 요청 계측은 Flask 훅 대신 WSGI 미들웨어로 (훅은 호출마다 함수 확인/프록시 접근 비용이 있어서)
+    if app.config['METRICS']:
+        app.request_class = RoutedRequest
+        app.wsgi_app = RequestMetrics(app.wsgi_app, Sampler(app.config['METRICS_SAMPLE']))
+    if not app.config['PROFILE']:
+        return
+
+    @app.before_request
+    def start_profile():
+        if request.args.get('profile') == '1':
+            request.environ['sihwa.profile'] = RequestProfile(request.path).start()
+
+    @app.after_request
+    def stop_profile(response):
+        if 'sihwa.profile' in request.environ:
+            response.headers['X-Profile'] = request.environ.pop('sihwa.profile').stop()
+        return response
+
+
+class RoutedRequest(Flask.request_class):
+    """찾은 라우트를 environ 에도 적어 둠 (요청이 끝나면 Flask 가 요청 객체를 environ 에서 떼어 내므로)"""
+
+    @property
+    def url_rule(self):
+        return self.__dict__.get('url_rule')
+
+    @url_rule.setter
+    def url_rule(self, rule):
+        self.__dict__['url_rule'] = rule
+        self.environ['sihwa.route'] = rule.rule
+
+
+class RequestMetrics:
+    """라우트별 요청 수 / 처리 시간 (라우트를 못 찾은 요청은 'unmatched')"""
+
+    def __init__(self, wsgi_app, sampler):
+        self.wsgi_app = wsgi_app
+        self.sampler = sampler
+
+    def __call__(self, environ, start_response):
+        t0 = time.perf_counter() if self.sampler.hit() else None
+        status = []
+
+        def record_status(code, headers, exc_info=None):
+            status.append(code[:3])
+            return start_response(code, headers, exc_info)
+
+        result = self.wsgi_app(environ, record_status)
+        route = environ.get('sihwa.route', 'unmatched')
+        HTTP_REQUESTS.inc(route, environ['REQUEST_METHOD'], status[0] if status else '500')
+        if t0 is not None:
+            HTTP_SECONDS.observe(time.perf_counter() - t0, route)
+        return result
+
+
+def _svc():
+    return current_app.extensions['sihwa']
+
+
+# --- [7] 라우팅 (URL 연결) ---
+bp = Blueprint('sihwa', __name__)
+
+@bp.route('/ready')
+def ready():
+    # 지연 로드 구성요소 상태 (과거 CSV / 기준효율 로드가 끝나면 200, 그 전에는 503)
+    is_ready, components = _svc().readiness()
+    return jsonify({'ready': is_ready, 'components': components}), 200 if is_ready else 503
+
+@bp.route('/metrics')
+def metrics_api():
+    # Prometheus text 형식 (요청/조회/직렬화/업스트림 시간 히스토그램 + 장치/캐시/로그 카운터)
+    return Response(render(REGISTRY.families() + _svc().metric_families()), content_type=CONTENT_TYPE)
+
+@bp.route('/')
 def home():
     return render_template('home.html')
 
-@app.route('/weather')
+@bp.route('/weather')
 def weather():
     # 첫 로딩 시 실시간 데이터를 가져와 전달
-    api_result = get_kwater_data()
-    return render_template('weather.html', api_data=api_result, arduino=latest_data)
+    s = _svc()
+    return render_template('weather.html', api_data=s.tide_feed.get(), arduino=s.ingestor.snapshot())
 
-@app.route('/data')
+@bp.route('/data')
 def get_arduino_data():
-    return jsonify(latest_data)
+    return jsonify(_svc().ingestor.snapshot())
+
+@bp.route('/data/recent')
+def get_arduino_recent():
+    # 링버퍼에 남아있는 최근 측정값 (?seconds=600)
+    seconds = request.args.get('seconds', default=600, type=float)
+    return jsonify(_svc().ingestor.history(seconds))
+
+@bp.route('/data/stats')
+def get_arduino_stats():
+    s = _svc()
+    return jsonify(dict(s.ingestor.get_stats(), log=dict(s.sensor_log.stats)))
+
+@bp.route('/devices')
+def get_devices():
+    # 장치별 연결 상태 / 수집 카운터
+    return jsonify(_svc().devices.get_stats())
+
+@bp.route('/data/<device_id>')
+def get_device_data(device_id):
+    devices = _svc().devices
+    if device_id not in devices:
+        return jsonify({'error': f'알 수 없는 장치: {device_id}'}), 404
+    return jsonify(devices[device_id].snapshot())
+
+@bp.route('/data/<device_id>/recent')
+def get_device_recent(device_id):
+    devices = _svc().devices
+    if device_id not in devices:
+        return jsonify({'error': f'알 수 없는 장치: {device_id}'}), 404
+    seconds = request.args.get('seconds', default=600, type=float)
+    return jsonify(devices[device_id].history(seconds))
+
+@bp.route('/stream')
+def stream():
+    # 측정값이 들어올 때마다 한 번씩 push (Server-Sent Events)
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(_svc().broadcaster.stream(), mimetype='text/event-stream', headers=headers)
+
+@bp.route('/stream/stats')
+def stream_stats():
+    return jsonify(_svc().broadcaster.get_stats())
+
+def _data_response(kind, data_fn, cache_key=None, max_age=0):
+    # Accept 로 형식(json/columnar/arrow), Accept-Encoding 으로 압축 선택, If-None-Match 가 맞으면 304
+    def build():
+        with QUERY_SECONDS.time(kind):
+            return data_fn()
 
-@app.route('/api/realtime')
+    try:
+        fmt = negotiate_format(request)
+        if cache_key is None:
+            payload = Payload(build(), fmt)
+        else:
+            payload = _svc().payloads.get(cache_key, fmt, build)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return respond(request, payload, max_age)
+
+def _is_past(date_str):
+    return date_str < date.today().isoformat()
+
+def _post_rows():
+    """POST 본문 {...} 하나 또는 {"rows": [{...}, ...]} -> 행 dict 목록 (다른 모양이면 ValueError)"""
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        raise ValueError('본문은 JSON 객체여야 합니다 ({...} 또는 {"rows": [...]})')
+    rows = body['rows'] if 'rows' in body else [body]
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        raise ValueError('rows 는 JSON 객체의 배열이어야 합니다')
+    return rows
+
+
+def _downsample_args():
+    # ?max_points=N(&downsample=lttb|minmax): 차트에 그릴 점 수 상한 (없으면 전부)
+    from downsample import METHODS, parse_max_points
+
+    method = request.args.get('downsample', 'lttb')
+    if method not in METHODS:
+        raise ValueError(f"downsample 은 {', '.join(METHODS)} 중 하나여야 합니다.")
+    return parse_max_points(request.args.get('max_points')), method
+
+@bp.route('/api/realtime')
 def get_realtime_api():
-    return jsonify(get_kwater_data())
+    try:
+        max_points, method = _downsample_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    feed = _svc().tide_feed
+    if max_points is None:
+        return _data_response('realtime', feed.get)
+
+    from downsample import downsample_lists
+    return _data_response('realtime', lambda: downsample_lists(feed.get(), max_points, method))
 
-@app.route('/api/history/<target_date>')
+@bp.route('/api/realtime/stats')
+def get_realtime_stats():
+    # 조위 캐시 적중/미스 카운터와 캐시 나이
+    return jsonify(_svc().tide_feed.get_stats())
+
+@bp.route('/api/history/<target_date>')
 def get_history_api(target_date):
-    global csv_df
-    if csv_df is None:
+    # ?sensor=hourly|raw(&device=ID) 를 주면 실제 기록된 센서 데이터를 'sensor' 키로 함께 반환
+    s = _svc()
+    sensor = request.args.get('sensor')
+    if sensor not in (None, 'hourly', 'raw'):
+        return jsonify({'error': 'sensor 는 hourly 또는 raw 여야 합니다.'}), 400
+
+    try:
+        max_points, method = _downsample_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    history_store = s.history.get()
+    if sensor is None:
+        if history_store is None:
+            return jsonify({'error': 'CSV 데이터가 로드되지 않았습니다.'}), 500
+        # 날짜별 응답은 형식별로 인코딩(+압축)해서 캐시, 지난 날짜는 브라우저도 캐시
+        max_age = PAST_MAX_AGE if _is_past(target_date) else 0
+        if max_points is None:
+            return _data_response('day', lambda: history_store.day(target_date), ('day', target_date), max_age)
+        return _data_response('day', lambda: history_store.day_points(target_date, max_points, method),
+                              ('day', target_date, max_points, method), max_age)
+
+    try:
+        device = request.args.get('device', 'main')
+        sensor_data = s.sensor_log.hourly(target_date, device) if sensor == 'hourly' else s.sensor_log.day(target_date, device)
+        if history_store is None:
+            result = {'sea': [], 'lake': [], 'times': []}
+        elif max_points is None:
+            result = dict(history_store.day(target_date))
+        else:
+            result = dict(history_store.day_points(target_date, max_points, method))
+    except ValueError:
+        return jsonify({'error': '날짜는 YYYY-MM-DD 형식이어야 합니다.'}), 400
+    # 센서 자료도 같은 점 수 상한으로 (head / waste 등 나머지 목록도 같은 인덱스로)
+    if max_points is not None:
+        from downsample import downsample_lists
+        sensor_data = downsample_lists(sensor_data, max_points, method)
+    result['sensor'] = sensor_data
+    return jsonify(result)
+
+@bp.route('/api/history')
+def get_history_range_api():
+    history_store = _svc().history.get()
+    if history_store is None:
         return jsonify({'error': 'CSV 데이터가 로드되지 않았습니다.'}), 500
 
-    result = csv_df[csv_df['date_only'] == target_date]
-    if result.empty:
-        return jsonify({'sea': [], 'lake': [], 'times': []})
+    start = request.args.get('start')
+    end = request.args.get('end', start)
+    if not start:
+        return jsonify({'error': 'start 파라미터가 필요합니다.'}), 400
+
+    resample = request.args.get('resample')
+    try:
+        max_points, method = _downsample_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return _data_response('range', lambda: history_store.range(start, end, resample, max_points, method),
+                          ('range', start, end, resample, max_points, method), PAST_MAX_AGE if _is_past(end) else 0)
+
+@bp.route('/api/baseline', methods=['GET', 'POST'])
+def baseline_api():
+    s = _svc()
+    baseline_learner = s.baseline.get()
+    if baseline_learner is None:
+        return jsonify({'error': '기준 효율 학습기가 로드되지 않았습니다.'}), 500
+
+    if request.method == 'POST':
+        # {"head": .., "kwh": .., "rain": .., "ts": ..} 하나 또는 {"rows": [...]}
+        # 상태 파일 저장은 매번 하지 않고 모아서 (baseline_changed)
+        try:
+            rows = _post_rows()
+            with s.baseline_lock:
+                used = sum(baseline_learner.update(float(r['head']), float(r['kwh']),
+                                                   float(r.get('rain', 0.0)), r.get('ts'))
+                           for r in rows)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'잘못된 입력: {e}'}), 400
+        if used:
+            s.baseline_changed()
+        return jsonify({'received': len(rows), 'used': used})
+
+    with s.baseline_lock:
+        return jsonify(baseline_learner.summary())
+
+@bp.route('/api/events', methods=['GET', 'POST'])
+def events_api():
+    s = _svc()
+    event_engine = s.events.get()
+    if event_engine is None:
+        return jsonify({'error': '기준 효율 학습기가 없어 이벤트 엔진을 사용할 수 없습니다.'}), 500
+
+    if request.method == 'POST':
+        import pandas as pd
+
+        # {"ts": .., "rain": .., "head": .., "kwh": ..} 하나 또는 {"rows": [...]}
+        alerts = []
+        try:
+            rows = _post_rows()
+            with s.event_lock:
+                for r in rows:
+                    alert = event_engine.process(pd.Timestamp(r['ts']), float(r['rain']),
+                                                 float(r['head']), float(r['kwh']))
+                    if alert:
+                        alerts.append(dict(alert, ts=alert['ts'].isoformat()))
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({'error': f'잘못된 입력: {e}'}), 400
+        return jsonify({'received': len(rows), 'alerts': alerts})
+
+    with s.event_lock:
+        return jsonify(event_engine.summary(limit=request.args.get('limit', default=50, type=int)))
+
+@bp.route('/api/events/replay')
+def events_replay_api():
+    # 2024 시간 데이터를 새 엔진으로 재생 (?smp=&clean_cost=&rain_threshold=&dry_hours=)
+    from data_loader import load_merged
+    from event_engine import replay_frame
+
+    s = _svc()
+    baseline_learner = s.baseline.get()
+    if baseline_learner is None:
+        return jsonify({'error': '기준 효율 학습기가 로드되지 않았습니다.'}), 500
+    params = {k: request.args.get(k, type=float) for k in ('smp', 'clean_cost', 'rain_threshold', 'dry_hours')}
+    params = {k: v for k, v in params.items() if v is not None}
+    with s.baseline_lock:
+        table = baseline_learner.as_table()
+    engine, elapsed = replay_frame(load_merged(), table, **params)
+    result = engine.summary(limit=request.args.get('limit', default=500, type=int))
+    result['elapsed_ms'] = round(elapsed * 1000, 2)
+    return jsonify(result)
+
+@bp.route('/api/predict', methods=['GET', 'POST'])
+def predict_api():
+    # GET ?head=&rain=&waste= 또는 POST {"head": .., ...} / {"rows": [...]} (빠진 값은 학습 데이터 중앙값)
+    predictor = _svc().predictor.get()
+    if predictor is None:
+        return jsonify({'error': '효율 예측 모델이 로드되지 않았습니다.'}), 500
 
+    body = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args.to_dict()
+    try:
+        if 'rows' in body:
+            return jsonify({'results': predictor.predict_batch(body['rows'])})
+        if 'head' not in body and '낙차' not in body:
+            return jsonify({'error': 'head(낙차) 값이 필요합니다.'}), 400
+        return jsonify(predictor.predict_one(body))
+    except TimeoutError:
+        # 배치 쓰레드가 밀려 있음 (concurrent.futures.TimeoutError 는 TimeoutError)
+        response = jsonify({'error': '예측 요청이 밀려 있습니다. 잠시 후 다시 시도하세요.'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'error': f'잘못된 입력: {e}'}), 400
+
+@bp.route('/api/predict/live')
+def predict_live_api():
+    # 가장 최근 실시간 측정값 + 예상 효율/출력
+    s = _svc()
+    predictor = s.predictor.get()
+    if predictor is None:
+        return jsonify({'error': '효율 예측 모델이 로드되지 않았습니다.'}), 500
+    return jsonify(predictor.live or s.ingestor.snapshot())
+
+@bp.route('/api/predict/stats')
+def predict_stats_api():
+    predictor = _svc().predictor.get()
+    if predictor is None:
+        return jsonify({'error': '효율 예측 모델이 로드되지 않았습니다.'}), 500
+    return jsonify(predictor.get_stats())
+
+@bp.route('/api/lag')
+def lag_api():
+    # 강수 -> 효율(시간, 낙차 구간별) / 강수 -> 쓰레기, 쓰레기 -> 효율(월) lag 상관 표 (?pair=&group=)
+    # 표는 data/.cache 에 저장되고 입력 CSV 가 바뀔 때만 다시 계산
+    # (웹 프로세스에서는 app.py 가 자식 프로세스에 다시 import 되지 않도록 순열 검정을 단일 프로세스로)
+    import lag_scan
+
+    table = lag_scan.load_or_build(max_workers=1)
+    pair, group = request.args.get('pair'), request.args.get('group')
+    rows = table
+    if pair:
+        rows = rows[rows['pair'] == pair]
+    if group:
+        rows = rows[rows['group'] == group]
     return jsonify({
-        'sea': result['해수위(EL.m)'].tolist(),
-        'lake': result['호수위(EL.m)'].tolist(),
-        'times': result['time_only'].tolist()
+        'summary': lag_scan.summary(table),
+        'applied_lag_hours': lag_scan.best_lag(table),
+        'rows': rows.astype(object).where(rows.notna(), None).to_dict(orient='records'),
     })
 
-@app.route('/simulator')
+@bp.route('/api/simulate', methods=['GET', 'POST'])
+def simulate_api():
+    # 수거 정책 몬테카를로: GET ?scenarios=10000&fixed_days=14&... 또는 POST {...}
+    # 정책별 연간 손실액 / 수거 비용 / 합계 분포 (평균, p5/p50/p95), 같은 파라미터는 메모리 캐시
+    # (웹 프로세스에서는 자식 프로세스가 app.py 를 다시 import 하지 않도록 단일 프로세스, 병렬은 python src/monte_carlo.py)
+    # 새 계산은 한 번에 하나, 시나리오는 SIMULATE_MAX_SCENARIOS 까지 (캐시된 결과는 기다리지 않음)
+    import monte_carlo
+
+    body = request.get_json(silent=True) if request.method == 'POST' else request.args.to_dict()
+    if body is None:
+        body = {}
+    try:
+        if not isinstance(body, dict):
+            raise ValueError('본문은 JSON 객체여야 합니다 ({"scenarios": 10000, ...})')
+        params = monte_carlo.normalize_params(body)
+        if params['scenarios'] > SIMULATE_MAX_SCENARIOS:
+            raise ValueError(f"웹 요청의 scenarios 는 {SIMULATE_MAX_SCENARIOS} 이하여야 합니다 "
+                             "(더 많은 시나리오는 python src/monte_carlo.py)")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    result = monte_carlo.cached_result(params)
+    if result is None:
+        lock = _svc().simulate_lock
+        if not lock.acquire(timeout=SIMULATE_WAIT_SECONDS):
+            response = jsonify({'error': '다른 시뮬레이션을 계산 중입니다. 잠시 후 다시 시도하세요.'})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        try:
+            result = monte_carlo.cached_simulate(params, max_workers=1)
+        finally:
+            lock.release()
+    return jsonify(result)
+
+@bp.route('/figures')
+def figures_list():
+    # 그릴 수 있는 분석 그래프와 기본 파라미터 (matplotlib/seaborn 은 처음 요청 때 import)
+    import figures
+
+    return jsonify(figures.list_figures())
+
+@bp.route('/figures/<name>.png')
+def figure_png(name):
+    # 예: /figures/pattern.png?metric=rain_peak&dpi=100, /figures/loss_event.png?date=2024-07-18
+    # 입력 데이터 + 파라미터가 같으면 디스크 캐시에서 바로, ETag/Last-Modified 로 304 응답 가능
+    import figures
+
+    try:
+        path = figures.render(name, **request.args.to_dict())
+    except KeyError:
+        return jsonify({'error': f'알 수 없는 그래프: {name}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return send_file(path, mimetype='image/png', max_age=3600)
+
+@bp.route('/simulator')
 def simulator():
     return render_template('simulator.html')
 
-@app.route('/history')
+@bp.route('/history')
 def history_page():
     return render_template('history.html')
 
 if __name__ == '__main__':
     # use_reloader=False는 아두이노 쓰레드 중복 실행 방지용
-    app.run(debug=True, port=5000, use_reloader=False)
\ No newline at end of file
+    create_app().run(debug=True, port=5000, use_reloader=False)
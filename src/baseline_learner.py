@@ -0,0 +1,190 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from loss_engine import HEAD_STEP, BaselineTable
+
+# 낙차 구간별 기준 효율을 온라인으로 학습하는 추정기
+# Baseline.py 의 '정상(Clean) 데이터' 조건(무강우 + 발전 중 + 낙차 발생)을 만족하는 샘플만 받아서
+# 구간별 가중 Welford 누산기(가중치합 / 평균 / M2)를 갱신한다. 샘플당 O(1), 과거 데이터 재스캔 없음.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.normpath(os.path.join(BASE_DIR, "..", "data", "baseline_state.npz"))
+
+HEAD_COL = '낙차'
+KWH_COL = '합계(킬로와트시)'
+RAIN_COL = '평균강수량(mm)'
+TIME_COL = '일시'
+
+# 정상 데이터 조건 (Baseline.py 와 동일)
+MAX_RAIN = 0.5
+MIN_HEAD = 1.0
+
+MAX_BINS = 40   # 0.5m x 40 = 20m 까지 (그 이상은 마지막 구간에 합산)
+
+
+class BaselineLearner:
+    def __init__(self, half_life_hours=None, step=HEAD_STEP, n_bins=MAX_BINS):
+        # half_life_hours 를 주면 오래된 샘플의 가중치가 지수적으로 줄어듦 (None 이면 단순 누적 평균)
+        self.half_life_hours = half_life_hours
+        self.step = step
+        self.weight = np.zeros(n_bins + 1)      # 마지막 칸은 전체(global) 누산기
+        self.mean = np.zeros(n_bins + 1)
+        self.m2 = np.zeros(n_bins + 1)
+        self.count = np.zeros(n_bins + 1, dtype=np.int64)
+        self.last_ts = np.full(n_bins + 1, np.nan)  # 구간별 마지막 갱신 시각 (epoch 시간 단위)
+        self.sources = {}                        # 증분 적재한 CSV 경로 -> 읽은 행 수
+
+    @property
+    def n_bins(self):
+        return len(self.weight) - 1
+
+    # --- 샘플 갱신 ---
+    @staticmethod
+    def is_clean(head, kwh, rain):
+        return rain <= MAX_RAIN and head > MIN_HEAD and kwh > 0
+
+    def _bin(self, head):
+        return min(int(head // self.step), self.n_bins - 1)
+
+    def _decay(self, i, ts_hours):
+        """구간 i 의 누산기를 ts 시점까지 감쇠 (마지막 갱신 이후 흐른 시간만큼)"""
+        if self.half_life_hours is None or ts_hours is None:
+            return
+        last = self.last_ts[i]
+        if not np.isnan(last) and ts_hours > last:
+            f = 0.5 ** ((ts_hours - last) / self.half_life_hours)
+            self.weight[i] *= f
+            self.m2[i] *= f
+        if np.isnan(last) or ts_hours > last:
+            self.last_ts[i] = ts_hours
+
+    def _push(self, i, x, ts_hours):
+        self._decay(i, ts_hours)
+        self.weight[i] += 1.0
+        self.count[i] += 1
+        delta = x - self.mean[i]
+        self.mean[i] += delta / self.weight[i]
+        self.m2[i] += delta * (x - self.mean[i])
+
+    def update(self, head, kwh, rain=0.0, ts=None):
+        """시간 단위 1행 반영. 정상 데이터 조건에 맞지 않으면 무시하고 False 반환"""
+        if not self.is_clean(head, kwh, rain):
+            return False
+        ts_hours = None if ts is None else pd.Timestamp(ts).value / 3.6e12
+        eff = kwh / head
+        self._push(self._bin(head), eff, ts_hours)
+        self._push(self.n_bins, eff, ts_hours)
+        return True
+
+    def update_frame(self, df):
+        """DataFrame(낙차 / 합계(킬로와트시) / 평균강수량(mm) [/ 일시]) 일괄 반영, 반영된 행 수 반환"""
+        head = df[HEAD_COL].to_numpy(dtype=np.float64)
+        kwh = df[KWH_COL].to_numpy(dtype=np.float64)
+        rain = df[RAIN_COL].to_numpy(dtype=np.float64) if RAIN_COL in df else np.zeros(len(df))
+        clean = (rain <= MAX_RAIN) & (head > MIN_HEAD) & (kwh > 0)
+
+        if self.half_life_hours is not None and TIME_COL in df:
+            # 감쇠가 있으면 시간 순서가 중요하므로 한 행씩
+            ts = pd.to_datetime(df[TIME_COL])[clean]
+            for h, k, r, t in zip(head[clean], kwh[clean], rain[clean], ts):
+                self.update(h, k, r, t)
+            return int(clean.sum())
+
+        # 감쇠가 없으면 배치 통계를 구해 기존 누산기와 병합 (Chan 병합 공식)
+        head, eff = head[clean], kwh[clean] / head[clean]
+        bins = np.minimum((head // self.step).astype(np.int64), self.n_bins - 1)
+        bins = np.concatenate([bins, np.full(len(eff), self.n_bins)])
+        eff = np.concatenate([eff, eff])
+        n_b = np.bincount(bins, minlength=len(self.weight)).astype(np.float64)
+        sum_b = np.bincount(bins, weights=eff, minlength=len(self.weight))
+        mean_b = np.divide(sum_b, n_b, out=np.zeros_like(sum_b), where=n_b > 0)
+        m2_b = np.bincount(bins, weights=(eff - mean_b[bins]) ** 2, minlength=len(self.weight))
+
+        total = self.weight + n_b
+        delta = mean_b - self.mean
+        nz = total > 0
+        self.mean = np.where(nz, self.mean + delta * np.divide(n_b, total, out=np.zeros_like(n_b), where=nz), 0.0)
+        self.m2 = self.m2 + m2_b + np.divide(delta ** 2 * self.weight * n_b, total, out=np.zeros_like(n_b), where=nz)
+        self.weight = total
+        self.count += n_b.astype(np.int64)
+        return int(clean.sum())
+
+    def ingest_csv(self, path, **read_kwargs):
+        """이어붙여지는 CSV 에서 지난번 이후 새로 추가된 행만 반영"""
+        key = os.path.abspath(path)
+        done = self.sources.get(key, 0)
+        read_kwargs.setdefault('encoding', 'utf-8-sig')
+        df = pd.read_csv(path, skiprows=range(1, done + 1), **read_kwargs)
+        if HEAD_COL not in df and {'해수위(ELm)', '호수위(ELm)'} <= set(df.columns):
+            df[HEAD_COL] = df['해수위(ELm)'] - df['호수위(ELm)']
+        used = self.update_frame(df) if len(df) else 0
+        self.sources[key] = done + len(df)
+        return used
+
+    # --- 조회 ---
+    @property
+    def global_baseline(self):
+        return float(self.mean[-1]) if self.weight[-1] > 0 else float('nan')
+
+    def group_baseline(self):
+        """낙차 구간 하한(m) -> 기준 효율 Series (샘플이 있는 구간만)"""
+        idx = np.flatnonzero(self.weight[:-1] > 0)
+        return pd.Series(self.mean[idx], index=pd.Index(idx * self.step, name='head_group'), name='효율')
+
+    def variance(self):
+        var = np.divide(self.m2, self.weight, out=np.full_like(self.m2, np.nan), where=self.weight > 0)
+        return pd.Series(var[:-1], index=np.arange(self.n_bins) * self.step)
+
+    def as_table(self):
+        return BaselineTable(self.group_baseline().to_dict(), self.global_baseline, step=self.step)
+
+    def summary(self):
+        groups = self.group_baseline()
+        return {
+            'global_baseline': self.global_baseline,
+            'by_head': {float(h): float(v) for h, v in groups.items()},
+            'count': {float(i * self.step): int(self.count[i]) for i in np.flatnonzero(self.weight[:-1] > 0)},
+            'half_life_hours': self.half_life_hours,
+        }
+
+    # --- 저장 / 로드 ---
+    def save(self, path=STATE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(
+            path, weight=self.weight, mean=self.mean, m2=self.m2, count=self.count, last_ts=self.last_ts,
+            meta=np.array(json.dumps({'half_life_hours': self.half_life_hours, 'step': self.step,
+                                      'sources': self.sources}))
+        )
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        with np.load(path) as z:
+            meta = json.loads(str(z['meta']))
+            learner = cls(meta['half_life_hours'], meta['step'], len(z['weight']) - 1)
+            learner.weight, learner.mean, learner.m2 = z['weight'], z['mean'], z['m2']
+            learner.count, learner.last_ts = z['count'], z['last_ts']
+        learner.sources = meta['sources']
+        return learner
+
+    @classmethod
+    def fit(cls, df, **kwargs):
+        """df 로 새로 학습 (저장된 상태는 읽지도 쓰지도 않음).
+        분석 스크립트 / 그림용: 결과가 입력 CSV 로만 정해지고 웹앱에 POST 된 행이 섞이지 않음"""
+        learner = cls(**kwargs)
+        learner.update_frame(df)
+        return learner
+
+    @classmethod
+    def load_or_fit(cls, df=None, path=STATE_PATH, **kwargs):
+        """저장된 상태가 있으면 불러오고, 없으면 df 로 처음 학습 후 저장 (웹앱 / 시뮬레이터의 온라인 상태)"""
+        if os.path.exists(path):
+            return cls.load(path)
+        if df is None:
+            from data_loader import load_merged
+            df = load_merged()
+        learner = cls.fit(df, **kwargs)
+        learner.save(path)
+        return learner
@@ -0,0 +1,80 @@
+import json
+import queue
+import threading
+
+# 센서 값이 새로 들어올 때마다 접속 중인 모든 클라이언트에게 한 번씩 밀어주는 SSE 브로드캐스터
+# - 메시지는 발행 시 한 번만 직렬화
+# - 클라이언트마다 크기가 정해진 큐를 두고, 큐가 가득 찬(느린) 클라이언트는 끊는다
+
+
+class Subscription:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = False
+
+
+class Broadcaster:
+    def __init__(self, queue_size=16, keepalive=15.0):
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self._lock = threading.Lock()
+        self._subs = set()
+        self._last = None
+        self.stats = {'published': 0, 'delivered': 0, 'dropped_clients': 0, 'total_clients': 0}
+
+    @staticmethod
+    def encode(data, event=None):
+        head = f"event: {event}\n" if event else ""
+        return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def subscribe(self):
+        sub = Subscription(self.queue_size)
+        with self._lock:
+            self._subs.add(sub)
+            self.stats['total_clients'] += 1
+            # 접속 직후 화면이 비어있지 않도록 마지막 값을 먼저 넣어줌
+            if self._last is not None:
+                sub.queue.put_nowait(self._last)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self, data, event=None):
+        message = self.encode(data, event)
+        with self._lock:
+            self._last = message
+            self.stats['published'] += 1
+            for sub in list(self._subs):
+                try:
+                    sub.queue.put_nowait(message)
+                    self.stats['delivered'] += 1
+                except queue.Full:
+                    # 따라오지 못하는 클라이언트는 끊음 (브라우저 EventSource 가 알아서 재접속)
+                    sub.dropped = True
+                    self._subs.discard(sub)
+                    self.stats['dropped_clients'] += 1
+
+    def client_count(self):
+        with self._lock:
+            return len(self._subs)
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, clients=len(self._subs))
+
+    def stream(self):
+        """Flask Response 에 넘길 SSE 제너레이터"""
+        sub = self.subscribe()
+        try:
+            # 재접속 대기시간 안내 (ms)
+            yield "retry: 2000\n\n"
+            while not sub.dropped:
+                try:
+                    yield sub.queue.get(timeout=self.keepalive)
+                except queue.Empty:
+                    # 프록시/브라우저 연결 유지용 주석 라인
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(sub)
@@ -0,0 +1,369 @@
+import argparse
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from baseline_learner import MAX_BINS, MAX_RAIN, MIN_HEAD
+from data_loader import COMPACT_COLS, DATA_DIR, SOURCES, TIME_COL, flag, to_compact
+from event_engine import CLEAN_COST, SMP, RainEventEngine
+from lag_scan import STATUS, best_lag, load_or_build
+from loss_engine import HEAD_STEP, BaselineTable, loss_won
+from rain_features import RAIN_COL, pattern_features, period_start
+
+# 분량에 상관없이 메모리를 일정하게 쓰는 chunk 단위 분석 (여러 해 치 1분 간격 SCADA 자료용)
+# 전체를 DataFrame 하나로 읽지 않고 CSV / Parquet 를 chunk_rows 행씩 읽어서 같은 결과를 계산
+# (메모리 내 기준 = 같은 파일을 load_compact() / load_rain() 으로 읽어 각 스크립트의 계산을 한 것):
+#   - Baseline.py    : 정상 데이터 낙차 구간별 / 전체 기준 효율 = BaselineLearner.fit 과 비트 단위로 같음
+#   - 00.py          : lag 행 뒤 강우 여부 x 낙차 구간별 평균 효율 비교 (lag 은 00.py 와 같이 lag_scan 에서)
+#                      = lag_scan.after_rain_comparison 과 float32 반올림 차이 이내 (아래 COMPARISON_RTOL)
+#   - decision.py    : 시간별 손실액(loss_won, 비트 단위로 같음)의 합계, 최대 강우일 전후 누적 손실, 이벤트 엔진 재생
+#   - 02_pattern.py  : 월별 강우 패턴 지표 = rain_features.pattern_features 와 비트 단위로 같음
+#
+# - chunk 마다 병합 가능한 부분 집계를 만들고 순서대로 합침
+#   기준 효율: BaselineLearner 와 같은 np.bincount 순차 합을 앞 chunk 의 합에 이어서 (BinSums)
+#   00.py 비교 / 손실액 합계: math.fsum 부분합 목록 (정확한 합, chunk 크기 / 병합 순서와 무관)
+#   00.py 는 float32 효율을 pandas groupby 로 평균내므로(float32 누산) 정확한 평균과 float32 몇 ulp 차이
+# - chunk 사이에 넘기는 상태: 직전 lag 행의 강우 여부, 아직 끝나지 않은 달의 강수량, 이벤트 엔진
+# - 원본의 시간 순서가 조금 뒤섞여 있어도(병합본의 24:00 행) REORDER_WINDOW 안이면 바로잡음
+#   (전체를 stable 정렬한 것과 같은 순서, 그보다 크게 뒤섞이면 ValueError)
+# - max_workers > 1 이면 chunk 부분 집계를 프로세스 풀에서 (동시에 떠 있는 chunk 는 2 x workers 개까지)
+# - chunk_rows=None 이면 파일 전체를 한 chunk 로 = 메모리 내 계산 (결과 비교 기준)
+#
+#   python src/chunked.py --chunk-rows 200000 --workers 4 [--merged 경로.csv|.parquet] [--rain 경로]
+
+CHUNK_ROWS = 500_000
+REORDER_WINDOW = pd.Timedelta(days=1)
+
+# 00.py 비교 표와 메모리 내 계산의 허용 상대 오차 (float32 ulp 2^-23 의 몇 배)
+COMPARISON_RTOL = 1e-6
+
+MERGED_PATH = os.path.join(DATA_DIR, SOURCES['merged'][0])
+RAIN_PATH = os.path.join(DATA_DIR, SOURCES['rain'][0])
+
+
+# --- 정확한 부분합 ---
+def exact_partials(values):
+    """합이 values 의 (반올림 없는) 정확한 합과 같은 float 목록. fsum(partials) == fsum(values)"""
+    values = list(values)
+    out = []
+    while True:
+        # 남은 차이(정확한 합 - 지금까지의 부분합)를 반올림한 값, 한 번에 53비트씩 줄어듦
+        s = math.fsum(values + [-p for p in out])
+        if s == 0:
+            return out
+        out.append(s)
+        if not math.isfinite(s):
+            return out
+
+
+class GroupSums:
+    """정수 키별 (개수, 정확한 합) 누산기. merge 순서와 무관하게 같은 결과"""
+
+    def __init__(self):
+        self.count = {}
+        self.partials = {}
+
+    def add(self, keys, values):
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        order = np.argsort(keys, kind='stable')
+        uniq, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        for key, start, n in zip(uniq.tolist(), starts.tolist(), counts.tolist()):
+            self._push(key, n, values[order[start:start + n]].tolist())
+        return self
+
+    def _push(self, key, n, values):
+        self.count[key] = self.count.get(key, 0) + n
+        self.partials[key] = exact_partials(self.partials.get(key, []) + values)
+
+    def merge(self, other):
+        for key, n in other.count.items():
+            self._push(key, n, other.partials[key])
+        return self
+
+    def mean(self, key):
+        return math.fsum(self.partials[key]) / self.count[key]
+
+    def keys(self):
+        return sorted(self.count)
+
+
+class BinSums:
+    """키(0 ~ size-1)별 (개수, 합). 합은 np.bincount 와 같은 앞에서부터의 순차 합이라
+    chunk 를 순서대로 add 하면 전체를 한 번에 bincount 한 것(BaselineLearner.update_frame)과 같은 값"""
+
+    def __init__(self, size):
+        self.count = np.zeros(size, dtype=np.int64)
+        self.sums = np.zeros(size)
+
+    def add(self, keys, values):
+        size = len(self.sums)
+        self.count += np.bincount(keys, minlength=size)
+        # 키마다 지금까지의 합을 맨 앞 원소로 넣고 이어서 더함
+        self.sums = np.bincount(np.concatenate([np.arange(size), keys]),
+                                weights=np.concatenate([self.sums, values]), minlength=size)
+        return self
+
+
+# --- 읽기 ---
+def read_chunks(path, columns, chunk_rows=CHUNK_ROWS, float_cols=(), encoding='utf-8-sig'):
+    """CSV / Parquet 를 chunk_rows 행씩 (float_cols 는 float32, 일시는 datetime64)"""
+    dtype = dict.fromkeys(float_cols, np.float32)
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        batches = pf.iter_batches(batch_size=chunk_rows or max(pf.metadata.num_rows, 1), columns=columns)
+        frames = (batch.to_pandas().astype(dtype) for batch in batches)
+    elif chunk_rows is None:
+        frames = [pd.read_csv(path, encoding=encoding, usecols=columns, dtype=dtype)]
+    else:
+        frames = pd.read_csv(path, encoding=encoding, usecols=columns, dtype=dtype, chunksize=chunk_rows)
+    for df in frames:
+        df[TIME_COL] = pd.to_datetime(df[TIME_COL])
+        yield df[columns]
+
+
+def ordered(chunks, window=REORDER_WINDOW):
+    """chunk 흐름을 시간 순으로. 마지막 시각에서 window 이내의 행은 다음 chunk 와 합쳐 다시 정렬"""
+    carry, last = None, None
+    for chunk in chunks:
+        chunk = chunk.sort_values(TIME_COL, kind='stable', ignore_index=True)
+        if carry is not None and len(carry):
+            chunk = pd.concat([carry, chunk], ignore_index=True).sort_values(TIME_COL, kind='stable',
+                                                                            ignore_index=True)
+        if not len(chunk):
+            continue
+        ts = chunk[TIME_COL]
+        if last is not None and ts.iloc[0] < last:
+            raise ValueError(f"시간 순서가 {window} 보다 크게 뒤섞여 있습니다: {ts.iloc[0]} < {last}")
+        cut = int(ts.searchsorted(ts.iloc[-1] - window, side='right'))
+        carry = chunk.iloc[cut:]
+        if cut:
+            last = ts.iloc[cut - 1]
+            yield chunk.iloc[:cut].reset_index(drop=True)
+    if carry is not None and len(carry):
+        yield carry.reset_index(drop=True)
+
+
+def merged_chunks(path=MERGED_PATH, chunk_rows=CHUNK_ROWS):
+    """병합 시간 자료 -> 시간 순 메모리 절약 스키마 chunk (data_loader.load_compact 와 같은 값)"""
+    raw = read_chunks(path, [TIME_COL] + COMPACT_COLS, chunk_rows, float_cols=COMPACT_COLS)
+    return ordered(to_compact(df) for df in raw)
+
+
+def rain_chunks(path=RAIN_PATH, chunk_rows=CHUNK_ROWS):
+    # 강수량은 float64 그대로 (load_rain 은 float32 로 정확히 표현될 때만 줄이므로 값이 같음)
+    return ordered(read_chunks(path, [TIME_COL, RAIN_COL], chunk_rows))
+
+
+def _map_ordered(fn, jobs, max_workers):
+    """jobs(인자 튜플) 를 순서대로 fn 에 (풀에서는 앞선 결과를 기다리며 최대 2 x workers 개만 대기)"""
+    if max_workers <= 1:
+        for args in jobs:
+            yield fn(*args)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for args in jobs:
+            pending.append(pool.submit(fn, *args))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# --- Baseline.py / 00.py / 최대 강우 시각: 한 번 읽으며 부분 집계 ---
+def _scan_partial(df, prev_raining):
+    """chunk 하나 -> ((기준 효율 키, 효율), 강우 후 비교 누산기, (최대 강수량, 시각))"""
+    head = df['낙차'].to_numpy(dtype=np.float64)
+    kwh = df['합계(킬로와트시)'].to_numpy(dtype=np.float64)
+    rain = df['평균강수량(mm)'].to_numpy(dtype=np.float64)
+
+    # Baseline.py / BaselineLearner: 무강우 + 낙차 > 1 + 발전 중, 마지막 키는 전체
+    # (순차 합이라 누산은 부모 프로세스에서 chunk 순서대로, 여기서는 키와 값만)
+    clean = (rain <= MAX_RAIN) & (head > MIN_HEAD) & (kwh > 0)
+    eff = kwh[clean] / head[clean]
+    bins = np.minimum((head[clean] // HEAD_STEP).astype(np.int64), MAX_BINS - 1)
+    baseline = (np.concatenate([bins, np.full(len(eff), MAX_BINS)]), np.concatenate([eff, eff]))
+
+    # 00.py: float32 그대로 효율 계산, lag 행 전의 강우 여부 (앞 chunk 의 끝부분을 이어 붙여 shift)
+    raining = flag(df, 'raining')
+    after_rain = np.concatenate([prev_raining, raining])[:len(df)]
+    valid = flag(df, 'head_ok', 'generating')
+    head32 = df['낙차'].to_numpy()[valid]
+    efficiency = df['합계(킬로와트시)'].to_numpy()[valid] / head32
+    group = (head32 // 0.5).astype(np.int64)
+    comparison = GroupSums().add(group * 2 + after_rain[valid], efficiency)
+
+    # decision.py: 첫 번째 최대 강수량 시각 (idxmax)
+    i = int(np.argmax(rain))
+    peak = (float(rain[i]), df[TIME_COL].iloc[i])
+    return baseline, comparison, peak
+
+
+def default_lag():
+    """00.py 와 같은 시차: lag 상관 스캔에서 유의하게 효율을 낮추는 lag (없으면 lag_scan.DEFAULT_LAG)"""
+    return best_lag(load_or_build(max_workers=1))
+
+
+def _scan_jobs(chunks, lag):
+    tail = np.zeros(lag, dtype=bool)        # 자료 시작 전은 비가 오지 않은 것으로 (shift 의 NaN > 0 == False)
+    for df in chunks:
+        yield df, tail
+        if lag:
+            tail = np.concatenate([tail, flag(df, 'raining')])[-lag:]
+
+
+def scan(path=MERGED_PATH, chunk_rows=CHUNK_ROWS, lag=None, max_workers=1):
+    """병합 시간 자료 한 번 읽기 -> 기준 효율 / 강우 후 비교 누산기, 최대 강수량과 시각 (lag=None 이면 default_lag())"""
+    lag = default_lag() if lag is None else lag
+    baseline, comparison, peak = BinSums(MAX_BINS + 1), GroupSums(), (-math.inf, None)
+    jobs = _scan_jobs(merged_chunks(path, chunk_rows), lag)
+    for b, c, p in _map_ordered(_scan_partial, jobs, max_workers):
+        baseline.add(*b)
+        comparison.merge(c)
+        if p[0] > peak[0]:
+            peak = p
+    return baseline, comparison, peak
+
+
+def baseline_result(baseline):
+    """(정상 데이터 행 수, 전체 기준 효율, 낙차 구간별 기준 효율 Series) - BaselineLearner 와 같은 값"""
+    count = baseline.count.astype(np.float64)
+    if not count[MAX_BINS]:
+        return 0, float('nan'), pd.Series(dtype=np.float64, name='효율')
+    mean = baseline.sums / np.where(count > 0, count, 1.0)
+    bins = np.flatnonzero(count[:MAX_BINS] > 0)
+    groups = pd.Series(mean[bins], index=pd.Index(bins * HEAD_STEP, name='head_group'), name='효율')
+    return int(baseline.count[MAX_BINS]), float(mean[MAX_BINS]), groups
+
+
+def comparison_result(comparison):
+    """00.py 의 낙차 구간 x 상태별 평균 효율 표 (+ 효율감소율(%))"""
+    rows = {}
+    for key in comparison.keys():
+        rows.setdefault(key // 2 * 0.5, {})[STATUS[key % 2]] = comparison.mean(key)
+    table = pd.DataFrame.from_dict(rows, orient='index', columns=STATUS).sort_index()
+    table.index.name = 'head_group'
+    table.columns.name = 'status'
+    if table[STATUS].notna().any().all():
+        table['효율감소율(%)'] = (table[STATUS[0]] - table[STATUS[1]]) / table[STATUS[0]] * 100
+    return table
+
+
+# --- decision.py: 손실액 (두 번째 읽기, 이벤트 엔진은 순서대로) ---
+def losses(path=MERGED_PATH, table=None, peak_ts=None, chunk_rows=CHUNK_ROWS, smp=SMP, clean_cost=CLEAN_COST):
+    """-> (손실액 합계, 최대 강우일 전후 누적 손실 Series, 재생이 끝난 RainEventEngine)
+    구간은 decision.py / figures.draw_loss_event 와 같이 날짜(일시의 0시) 기준: 최대 강우일 -1일 ~ +2일"""
+    engine = RainEventEngine(table, smp=smp, clean_cost=clean_cost)
+    total, window = [], []
+    start = end = None
+    if peak_ts is not None:
+        peak_day = peak_ts.normalize()
+        start, end = peak_day - pd.Timedelta(hours=24), peak_day + pd.Timedelta(hours=48)
+    for df in merged_chunks(path, chunk_rows):
+        loss = loss_won(df['낙차'].to_numpy(), df['합계(킬로와트시)'].to_numpy(), table, smp)
+        total = exact_partials(total + loss.tolist())
+        if start is not None:
+            day = df[TIME_COL].dt.normalize()
+            in_event = ((day >= start) & (day <= end)).to_numpy()
+            if in_event.any():
+                window.append(pd.Series(loss[in_event], index=df[TIME_COL][in_event].to_numpy()))
+        engine.replay(df)
+    cum = pd.concat(window).cumsum() if window else pd.Series(dtype=np.float64)
+    cum.index.name = TIME_COL
+    return math.fsum(total), cum, engine
+
+
+# --- 02_pattern.py: 월별 강우 패턴 (달이 chunk 경계에 걸치면 그 달의 강수량만 넘김) ---
+def _pattern_partial(df):
+    """chunk 하나 -> (첫 달, 첫 달 강수량, 안쪽 달들의 지표, 마지막 달, 마지막 달 강수량)"""
+    month = period_start(df[TIME_COL].to_numpy(), 'M')
+    rain = df[RAIN_COL].to_numpy()
+    first, last = month[0], month[-1]
+    inner = (month != first) & (month != last)
+    features = pattern_features(df[inner], freq='M') if inner.any() else None
+    return first, rain[month == first], features, last, rain[month == last]
+
+
+def _month_features(month, values):
+    values = np.concatenate(values)
+    return pattern_features(pd.DataFrame({TIME_COL: np.full(len(values), month), RAIN_COL: values}), freq='M')
+
+
+def monthly_patterns(path=RAIN_PATH, chunk_rows=CHUNK_ROWS, max_workers=1):
+    """시간별 강수량 -> 월별 지표 (rain_features.pattern_features(df, 'M') 와 같은 값)"""
+    frames, open_month, open_values = [], None, []
+
+    def feed(month, values):
+        nonlocal open_month, open_values
+        if month == open_month:
+            open_values.append(values)
+            return
+        close()
+        open_month, open_values = month, [values]
+
+    def close():
+        if open_month is not None:
+            frames.append(_month_features(open_month, open_values))
+
+    jobs = ((df,) for df in rain_chunks(path, chunk_rows))
+    for first, first_rain, features, last, last_rain in _map_ordered(_pattern_partial, jobs, max_workers):
+        feed(first, first_rain)
+        if features is not None:
+            close()
+            open_month, open_values = None, []
+            frames.append(features)
+        if last != first:
+            feed(last, last_rain)
+    close()
+    if not frames:
+        return pattern_features(pd.DataFrame({TIME_COL: pd.Series(dtype='datetime64[ns]'),
+                                              RAIN_COL: pd.Series(dtype=np.float32)}), freq='M')
+    return pd.concat(frames, ignore_index=True)
+
+
+def run(merged_path=MERGED_PATH, rain_path=RAIN_PATH, chunk_rows=CHUNK_ROWS, lag=None, table=None,
+        smp=SMP, clean_cost=CLEAN_COST, max_workers=1):
+    """네 가지 결과를 chunk 단위로 계산 (table 이 없으면 이번 자료의 정상 데이터 기준 효율로 손실 계산)"""
+    lag = default_lag() if lag is None else lag
+    baseline, comparison, (peak_rain, peak_ts) = scan(merged_path, chunk_rows, lag, max_workers)
+    clean_rows, global_baseline, group_baseline = baseline_result(baseline)
+    if table is None:
+        table = BaselineTable(group_baseline.to_dict(), global_baseline)
+    total_loss, event_cum_loss, engine = losses(merged_path, table, peak_ts, chunk_rows, smp, clean_cost)
+    return {
+        'clean_rows': clean_rows, 'global_baseline': global_baseline, 'group_baseline': group_baseline,
+        'lag': lag, 'comparison': comparison_result(comparison),
+        'peak_rain': peak_rain, 'peak_ts': peak_ts, 'total_loss_won': total_loss,
+        'event_cum_loss': event_cum_loss, 'engine': engine,
+        'monthly': monthly_patterns(rain_path, chunk_rows, max_workers),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="chunk 단위 분석 (Baseline / 00 / decision / 02_pattern)")
+    parser.add_argument('--merged', default=MERGED_PATH, help="병합 시간 자료 (CSV 또는 Parquet)")
+    parser.add_argument('--rain', default=RAIN_PATH, help="시간별 강수량 (CSV 또는 Parquet)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="0 이면 한 번에 읽음")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--lag', type=int, default=None, help="기본: 00.py 와 같이 lag_scan 에서 고른 시차")
+    args = parser.parse_args()
+
+    result = run(args.merged, args.rain, args.chunk_rows or None, args.lag, max_workers=args.workers)
+    print(f"🧹 정상상태 데이터: {result['clean_rows']:,}행")
+    print(f"📏 전체 평균 기준 효율: {result['global_baseline']:.3f} kWh/m")
+    print(result['group_baseline'])
+    print(f"\n=== 📊 낙차 구간별 강우 {result['lag']}행 후 효율 ===")
+    print(result['comparison'].dropna())
+    engine = result['engine']
+    print(f"\n💸 손실액 합계 {result['total_loss_won']:,.0f}원, 최대 강우 {result['peak_rain']:.1f}mm "
+          f"({result['peak_ts']}) 전후 누적 {result['event_cum_loss'].iloc[-1]:,.0f}원")
+    print(f"🌧️ 강우 이벤트 {len(engine.events) + (engine.active is not None)}건, 수거 권장 알림 {len(engine.alerts)}건")
+    print(f"\n=== 📊 월별 강우 패턴 ({len(result['monthly'])}개월) ===")
+    print(result['monthly'].tail())
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# 분석 스크립트 공용 데이터 로더
+# CSV 를 한 번만 파싱해서 data/.cache/ 에 Feather(타입 보존) 로 저장해두고,
+# 원본 CSV 가 바뀌면(mtime/크기 -> 해시 확인) 자동으로 다시 만든다.
+#
+# 병합 시간 자료는 메모리 절약 스키마(load_compact)로도 읽을 수 있음:
+#   - 시각은 '일시' 하나 (datetime64, 시간 순 정렬) - '날짜' / '시간' 문자열은 읽지 않음
+#   - 측정값은 float32 - '합계(와트시)' 와 호기별 와트시는 '합계(킬로와트시)' 와 중복이라 뺌
+#   - 자주 쓰는 조건(강우 / 발전 중 / 낙차 1m 이상)은 uint8 비트 플래그 한 컬럼 (flag() 로 마스크)
+#   행당 33바이트 (pd.read_csv 그대로는 ~140바이트, load_merged 는 ~110바이트)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.normpath(os.path.join(BASE_DIR, "..", "data"))
+CACHE_DIRNAME = ".cache"
+
+# 캐시 포맷이 바뀌면 올려서 기존 캐시를 무효화
+CACHE_VERSION = 2
+
+SEA_COL = '해수위(ELm)'
+LAKE_COL = '호수위(ELm)'
+HEAD_COL = '낙차'
+
+# 이름 -> (파일명, 날짜 파싱 컬럼, 낙차 계산 여부)
+SOURCES = {
+    'power': ('power_2024_hourly.csv', ['날짜'], True),
+    'rain': ('rain_hourly_2024_avg.csv', ['일시'], False),
+    'merged': ('power_rain_merged_2024.csv', ['날짜', '일시'], False),
+    'env_monthly': ('rain_waste_monthly_2020_2024_merged.csv', ['date'], False),
+}
+
+TIME_COL = '일시'
+COMPACT_COLS = ['시간별단가', '합계(킬로와트시)', LAKE_COL, SEA_COL, '평균강수량(mm)', HEAD_COL]
+FLAG_COL = 'flags'
+FLAGS = {'raining': 1, 'generating': 2, 'head_ok': 4}
+MIN_HEAD = 1.0
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_paths(path, variant=''):
+    cache_dir = os.path.join(os.path.dirname(path), CACHE_DIRNAME)
+    stem = os.path.splitext(os.path.basename(path))[0] + (f'.{variant}' if variant else '')
+    return cache_dir, os.path.join(cache_dir, stem + '.feather'), os.path.join(cache_dir, stem + '.meta.json')
+
+
+def _source_meta(path, options):
+    st = os.stat(path)
+    return {'version': CACHE_VERSION, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'options': options}
+
+
+def _cache_is_valid(path, meta_path, meta):
+    """mtime/크기가 같으면 바로 유효, 다르면 내용 해시로 한 번 더 확인"""
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, encoding='utf-8') as f:
+        old = json.load(f)
+
+    if old.get('version') != meta['version'] or old.get('options') != meta['options']:
+        return False
+    if old.get('mtime_ns') == meta['mtime_ns'] and old.get('size') == meta['size']:
+        return True
+
+    # touch 만 된 경우: 해시가 같으면 메타만 갱신하고 캐시 재사용
+    if old.get('size') == meta['size'] and old.get('sha256') == file_hash(path):
+        old.update(mtime_ns=meta['mtime_ns'])
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(old, f)
+        return True
+    return False
+
+
+def _parse_csv(path, parse_dates, derive_head, encoding):
+    df = pd.read_csv(path, encoding=encoding)
+    for col in parse_dates:
+        df[col] = pd.to_datetime(df[col])
+
+    if derive_head and HEAD_COL not in df.columns:
+        df[HEAD_COL] = df[SEA_COL] - df[LAKE_COL]
+
+    # 실수 컬럼 다운캐스트: float32 -> float64 로 되돌려도 모든 값이 그대로일 때만
+    # (pd.to_numeric(downcast='float') 는 오차 허용 범위 안이면 바꿔버려서 분석 값이 달라짐)
+    for col in df.select_dtypes('float64').columns:
+        values = df[col].to_numpy()
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+            df[col] = narrow
+    return df
+
+
+def _load_cached(path, options, parse, use_cache, variant=''):
+    """parse() 결과를 Feather 로 캐시 (options 가 다르거나 원본이 바뀌면 다시 파싱)"""
+    if not use_cache:
+        return parse()
+
+    cache_dir, cache_path, meta_path = _cache_paths(path, variant)
+    meta = _source_meta(path, options)
+
+    if os.path.exists(cache_path) and _cache_is_valid(path, meta_path, meta):
+        return pd.read_feather(cache_path)
+
+    df = parse()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        df.to_feather(cache_path)
+        meta['sha256'] = file_hash(path)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    except OSError as e:
+        print(f"⚠️ [주의] 캐시 저장 실패(원본 CSV 로 계속 진행): {e}")
+    return df
+
+
+def load_csv(path, parse_dates=(), derive_head=False, encoding='utf-8-sig', use_cache=True):
+    """CSV 를 타입이 정리된 DataFrame 으로 로드 (캐시가 유효하면 Feather 에서 바로 읽음)"""
+    path = os.path.abspath(path)
+    parse_dates = list(parse_dates)
+    options = {'parse_dates': parse_dates, 'derive_head': derive_head, 'encoding': encoding}
+    return _load_cached(path, options, lambda: _parse_csv(path, parse_dates, derive_head, encoding), use_cache)
+
+
+def load(name, path=None, use_cache=True):
+    """이름으로 프로젝트 데이터셋 로드: 'power', 'rain', 'merged', 'env_monthly'"""
+    filename, parse_dates, derive_head = SOURCES[name]
+    return load_csv(path or os.path.join(DATA_DIR, filename), parse_dates, derive_head, use_cache=use_cache)
+
+
+def load_power(path=None):
+    return load('power', path)
+
+
+def load_rain(path=None):
+    return load('rain', path)
+
+
+def load_merged(path=None):
+    return load('merged', path)
+
+
+def load_env_monthly(path=None):
+    return load('env_monthly', path)
+
+
+
+# --- 메모리 절약 스키마 (병합 시간 자료) ---
+def to_compact(df):
+    """병합 시간 자료(날짜 파싱 여부 무관) -> 메모리 절약 스키마, 시간 순 정렬"""
+    out = pd.DataFrame({TIME_COL: pd.to_datetime(df[TIME_COL])})
+    for col in COMPACT_COLS:
+        out[col] = df[col].to_numpy(dtype=np.float32)
+    flags = np.where(out['평균강수량(mm)'].to_numpy() > 0, FLAGS['raining'], 0)
+    flags |= np.where(out['합계(킬로와트시)'].to_numpy() > 0, FLAGS['generating'], 0)
+    flags |= np.where(out[HEAD_COL].to_numpy() >= MIN_HEAD, FLAGS['head_ok'], 0)
+    out[FLAG_COL] = flags.astype(np.uint8)
+    # 원본 병합 CSV 는 매일 00:00 행이 그날 23:00 뒤에 있음 -> 일시 순으로 정렬 (lag_scan 과 같은 순서).
+    # 그래서 행 단위 shift 결과는 파일 행 순서대로 shift 한 원래 스크립트와 다름 (benchmarks/bench_compact.py 참고)
+    if not out[TIME_COL].is_monotonic_increasing:
+        out = out.sort_values(TIME_COL, kind='stable', ignore_index=True)
+    return out
+
+
+def _parse_compact(path, encoding):
+    # 필요한 컬럼만, 처음부터 float32 로 읽어서 중간에 큰 프레임을 만들지 않음
+    df = pd.read_csv(path, encoding=encoding, usecols=[TIME_COL] + COMPACT_COLS,
+                     dtype=dict.fromkeys(COMPACT_COLS, np.float32))
+    return to_compact(df)
+
+
+def load_compact(path=None, encoding='utf-8-sig', use_cache=True):
+    """병합 시간 자료를 메모리 절약 스키마로 로드 (일시 / float32 측정값 / flags)"""
+    path = os.path.abspath(path or os.path.join(DATA_DIR, SOURCES['merged'][0]))
+    options = {'compact': COMPACT_COLS, 'flags': FLAGS, 'min_head': MIN_HEAD, 'encoding': encoding}
+    return _load_cached(path, options, lambda: _parse_compact(path, encoding), use_cache, variant='compact')
+
+
+def flag(df, *names):
+    """flags 컬럼에서 이름 붙은 조건을 모두 만족하는 행의 bool 마스크 (복사 없이 필터링할 때)"""
+    bits = 0
+    for name in names:
+        bits |= FLAGS[name]
+    return (df[FLAG_COL].to_numpy() & bits) == bits
+
+
+def memory_bytes(df):
+    """DataFrame 이 실제로 차지하는 바이트 (문자열 포함)"""
+    return int(df.memory_usage(deep=True).sum())
@@ -1,78 +1,37 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from data_loader import load_compact
+from event_engine import RainEventEngine
+from baseline_learner import BaselineLearner
+from figures import export
+from loss_engine import loss_won
 
-# 1. 환경 설정 및 데이터 로드
-plt.rcParams['font.family'] = 'Malgun Gothic'
-plt.rcParams['axes.unicode_minus'] = False
-df = pd.read_csv('data/power_rain_merged_2024.csv')
-df['날짜'] = pd.to_datetime(df['날짜'])
+# 1. 데이터 로드 (그래프 폰트/스타일은 figures.py 에서 설정)
+# 메모리 절약 스키마: 일시 하나 + float32 측정값 + 플래그 (시간 순 정렬돼 있어 재생 때 다시 정렬하지 않음)
+df = load_compact()
 
 # 2. 기준 효율 및 손실 계산 로직
-baseline_by_head = {
-    1.0: 28031.8, 1.5: 27965.5, 2.0: 29206.2, 2.5: 29979.2, 
-    3.0: 30260.5, 3.5: 31356.2, 4.0: 31609.8, 4.5: 31356.3,
-    5.0: 31438.4, 5.5: 33196.7, 6.0: 34972.5, 6.5: 33796.0,
-    7.0: 32895.8, 7.5: 28701.5, 8.0: 27065.4
-}
-global_baseline = 30844.9
+# 기준 효율은 이번에 읽은 데이터로 학습 (웹앱의 온라인 상태 data/baseline_state.npz 는 쓰지 않음)
+baseline_table = BaselineLearner.fit(df).as_table()
 SMP = 150 
 CLEAN_COST = 5_000_000 
 
-def calc_loss_won(row):
-    head_key = round(row['낙차'] * 2) / 2
-    eff = baseline_by_head.get(head_key, global_baseline)
-    expected_power = eff * row['낙차']
-    loss_kwh = expected_power - row['합계(킬로와트시)']
-    return max(0, loss_kwh) * SMP
-
-df['loss_won'] = df.apply(calc_loss_won, axis=1)
+# 낙차 0.5m 구간 반올림 -> 기준 효율 조회 -> max(0, 기대발전량 - 실제) * SMP 를 한 번에 계산
+df['loss_won'] = loss_won(df['낙차'].to_numpy(), df['합계(킬로와트시)'].to_numpy(), baseline_table, SMP)
 
 # ---------------------------------------------------------
-# 보완 ①: "대표 이벤트" 필터링 (괄호 오류 수정 완료)
+# 보완 ①: "대표 이벤트" = 최대 강우가 있었던 날 (그날 0시 기준 -24h ~ +48h 구간)
+# 구간 그래프와 누적 손실액(보완 ②)은 figures.draw_loss_event 가 같은 기준(날짜)으로 계산
 # ---------------------------------------------------------
-max_rain_idx = df['평균강수량(mm)'].idxmax()
-max_rain_date = df.loc[max_rain_idx, '날짜']
-event_start = max_rain_date - pd.Timedelta(hours=24)
-event_end = max_rain_date + pd.Timedelta(hours=48)
-
-# 조건을 각각 ( )로 감싸서 bitwise_and 오류를 방지합니다.
-sample_df = df[(df['날짜'] >= event_start) & (df['날짜'] <= event_end)].copy()
+max_rain_date = df.loc[df['평균강수량(mm)'].idxmax(), '일시'].normalize()
 
 # ---------------------------------------------------------
-# 보완 ②: 누적 손실액 계산
+# 보완 ③: 1년 전체를 스트리밍 엔진으로 재생해 모든 강우 이벤트의 수거 적기 확인
 # ---------------------------------------------------------
-sample_df['cum_loss_won'] = sample_df['loss_won'].cumsum()
-
-# 3. 시각화
-fig, ax1 = plt.subplots(figsize=(14, 7))
-ax2 = ax1.twinx()
-
-# X축 라벨 가독성 (월-일 시)
-x_labels = sample_df['날짜'].dt.strftime('%m-%d %H')
-
-# (1) 강수량 - 막대
-sns.barplot(x=x_labels, y=sample_df['평균강수량(mm)'], ax=ax1, color='blue', alpha=0.2, label='시간당 강수량(mm)')
-
-# (2) 시간당 손실액 - 빨간 점선
-sns.lineplot(x=x_labels, y=sample_df['loss_won'], ax=ax2, color='red', marker='o', alpha=0.4, label='순간 손실액(원)')
-
-# (3) 누적 손실액 - 진한 빨간 실선
-sns.lineplot(x=x_labels, y=sample_df['cum_loss_won'], ax=ax2, color='darkred', linewidth=3, label='누적 발전 손실액(원)')
-
-# (4) 수거 비용 기준선 (Threshold)
-ax2.axhline(CLEAN_COST, color='black', linestyle=':', linewidth=3, label=f'수거 비용 기준선 ({CLEAN_COST/10000:.0f}만원)')
-
-ax1.set_title(f'강우 이벤트에 따른 경제적 수거 적기 분석 (최대 강우일: {max_rain_date.date()})', fontsize=16, pad=20)
-ax1.set_xlabel('시간 (월-일 시)')
-ax1.set_ylabel('강수량 (mm)')
-ax2.set_ylabel('손실 금액 (원)')
-ax1.tick_params(axis='x', rotation=45)
-
-# 범례 통합
-lines1, labels1 = ax1.get_legend_handles_labels()
-lines2, labels2 = ax2.get_legend_handles_labels()
-ax2.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
-
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+engine = RainEventEngine(baseline_table, smp=SMP, clean_cost=CLEAN_COST).replay(df)
+print(f"🌧️ 강우 이벤트 {len(engine.events) + (engine.active is not None)}건, 수거 권장 알림 {len(engine.alerts)}건")
+for alert in engine.alerts:
+    print(f"  - 이벤트 {alert['event_id']}: {alert['ts']:%m-%d %H}시 (시작 후 {alert['hours_since_start']}시간, 누적 {alert['cum_loss']:,.0f}원)")
+
+# 3. 시각화 - figures.draw_loss_event (강수량 막대 + 순간/누적 손실액 + 수거 비용 기준선)
+# 입력 데이터와 파라미터가 같으면 캐시된 그림 재사용
+export({'data/power_loss_event_analysis.png': ('loss_event', {'smp': SMP, 'clean_cost': CLEAN_COST, 'dpi': 300})})
+print(f"✅ 그래프 저장: data/power_loss_event_analysis.png (최대 강우일 {max_rain_date.date()})")
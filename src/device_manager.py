@@ -0,0 +1,196 @@
+import json
+import os
+import random
+import selectors
+import threading
+import time
+
+import serial
+
+from ingest import ERROR_LOG_EVERY, SerialIngestor
+from metrics import REGISTRY, Sampler
+
+# 여러 시리얼 장치(수문/수차별 센서)를 쓰레드 하나로 읽는 관리자
+# - 포트마다 SerialIngestor 를 두되 읽기 쓰레드는 만들지 않고, 하나의 이벤트 루프에서
+#   selectors 로 읽을 데이터가 있는 포트만 깨워서 feed() 한다.
+# - fileno 가 없는 포트(Windows COM, loop://)는 같은 루프에서 in_waiting 폴링
+# - 연결 실패/끊김은 장치별 지수 백오프로 재연결
+# - 그 밖의 예외(로그 DB, 예측기, 브로드캐스트 등)는 장치별로 세고 기록만 하고 루프는 계속
+#   (쓰레드가 하나라 여기서 죽으면 모든 장치의 수집이 멈춤)
+#
+# 장치 설정: SIHWA_DEVICES 환경변수에 JSON 문자열 또는 JSON 파일 경로
+#   [{"id": "main", "port": "COM3"}, {"id": "gate2", "port": "COM4", "baudrate": 9600}]
+
+POLL_INTERVAL = 0.05
+BACKOFF_MIN = 1.0
+BACKOFF_MAX = 60.0
+# 읽기(파싱 + 리스너) 시간은 장치 읽기 4번에 한 번만 잼
+READ_SAMPLE_EVERY = 4
+
+READ_SECONDS = REGISTRY.histogram('sihwa_ingest_read_seconds', "시리얼 읽기 1회(파싱 + 리스너) 시간, 표본", ('device',))
+
+
+def load_device_config(default_port='COM3'):
+    raw = os.environ.get('SIHWA_DEVICES')
+    if not raw:
+        return [{'id': 'main', 'port': os.environ.get('SIHWA_SERIAL_PORT', default_port)}]
+    if os.path.exists(raw):
+        with open(raw, encoding='utf-8') as f:
+            raw = f.read()
+    return json.loads(raw)
+
+
+class DeviceManager:
+    def __init__(self, devices, history_hours=24, poll_interval=POLL_INTERVAL,
+                 backoff_min=BACKOFF_MIN, backoff_max=BACKOFF_MAX):
+        self.poll_interval = poll_interval
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+
+        self.devices = {}
+        for cfg in devices:
+            self.devices[cfg['id']] = SerialIngestor(cfg['port'], cfg.get('baudrate', 9600),
+                                                     history_hours=cfg.get('history_hours', history_hours),
+                                                     read_timeout=0, loss_cum=cfg.get('loss_cum', 0))
+        self._selector = selectors.DefaultSelector()
+        self._polled = set()                                    # fileno 없는 장치
+        self._retry_at = {dev_id: 0.0 for dev_id in self.devices}
+        self._backoff = {dev_id: backoff_min for dev_id in self.devices}
+        self._reconnects = {dev_id: 0 for dev_id in self.devices}
+        self._errors = {dev_id: 0 for dev_id in self.devices}
+        self._loop_errors = 0
+        self._sampler = Sampler(READ_SAMPLE_EVERY)
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __getitem__(self, dev_id):
+        return self.devices[dev_id]
+
+    def __contains__(self, dev_id):
+        return dev_id in self.devices
+
+    def primary(self):
+        return next(iter(self.devices.values()))
+
+    # --- 연결 관리 ---
+    def _connect(self, dev_id, now):
+        dev = self.devices[dev_id]
+        try:
+            ser = dev.open()
+        except (serial.SerialException, OSError, ValueError) as e:
+            if self._backoff[dev_id] == self.backoff_min:
+                print(f"⚠️ [주의] 장치 {dev_id}({dev.port}) 연결 실패, 재시도 예정: {e}")
+            self._schedule_retry(dev_id, now)
+            return False
+
+        try:
+            self._selector.register(ser.fileno(), selectors.EVENT_READ, dev_id)
+        except (AttributeError, ValueError, OSError, NotImplementedError, serial.SerialException):
+            # fileno 를 지원하지 않는 포트는 폴링 대상으로
+            self._polled.add(dev_id)
+        self._backoff[dev_id] = self.backoff_min
+        return True
+
+    def _schedule_retry(self, dev_id, now):
+        # 지수 백오프 + 약간의 jitter (여러 장치가 동시에 재시도하지 않도록)
+        delay = self._backoff[dev_id]
+        self._retry_at[dev_id] = now + delay * random.uniform(0.8, 1.2)
+        self._backoff[dev_id] = min(delay * 2, self.backoff_max)
+
+    def _disconnect(self, dev_id, error, now):
+        dev = self.devices[dev_id]
+        print(f"⚠️ [주의] 장치 {dev_id} 읽기 오류, 재연결 시도: {error}")
+        self._polled.discard(dev_id)
+        if dev.ser is not None:
+            try:
+                self._selector.unregister(dev.ser.fileno())
+            except (KeyError, ValueError, OSError, AttributeError, serial.SerialException):
+                pass
+        dev.close(error=True)
+        self._reconnects[dev_id] += 1
+        self._schedule_retry(dev_id, now)
+
+    def _connected(self, dev_id):
+        return self.devices[dev_id].ser is not None
+
+    # --- 이벤트 루프 ---
+    def _read(self, dev_id, now):
+        t0 = time.perf_counter() if self._sampler.hit() else None
+        try:
+            self.devices[dev_id].read_once()
+        except (serial.SerialException, OSError) as e:
+            self._disconnect(dev_id, e, now)
+            return
+        except Exception as e:
+            self._read_failed(dev_id, e)
+            return
+        if t0 is not None:
+            READ_SECONDS.observe(time.perf_counter() - t0, dev_id)
+
+    def _read_failed(self, dev_id, error):
+        # 시리얼 오류가 아니면 포트는 그대로 두고 다음 읽기로
+        self._errors[dev_id] += 1
+        count = self._errors[dev_id]
+        if count == 1 or count % ERROR_LOG_EVERY == 0:
+            print(f"❌ [오류] 장치 {dev_id} 처리 중 예외 (누적 {count}건), 수집은 계속: {error!r}")
+
+    def poll_once(self, timeout=None):
+        """한 번의 루프: 재연결 -> 읽을 수 있는 포트 읽기 -> 폴링 포트 읽기"""
+        timeout = self.poll_interval if timeout is None else timeout
+        now = time.monotonic()
+        for dev_id in self.devices:
+            if not self._connected(dev_id) and now >= self._retry_at[dev_id]:
+                self._connect(dev_id, now)
+
+        if self._selector.get_map():
+            # 폴링 대상이 있으면 그쪽도 돌아봐야 하므로 오래 막히지 않게
+            events = self._selector.select(timeout)
+            for key, _ in events:
+                self._read(key.data, now)
+        else:
+            time.sleep(timeout)
+
+        for dev_id in list(self._polled):
+            dev = self.devices[dev_id]
+            try:
+                waiting = dev.ser.in_waiting
+            except (serial.SerialException, OSError) as e:
+                self._disconnect(dev_id, e, now)
+                continue
+            if waiting:
+                self._read(dev_id, now)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                # 재연결 / select 단계의 예상 못 한 오류: 잠깐 쉬고 계속
+                self._loop_errors += 1
+                if self._loop_errors == 1 or self._loop_errors % ERROR_LOG_EVERY == 0:
+                    print(f"❌ [오류] 장치 루프 예외 (누적 {self._loop_errors}건), 계속 진행: {e!r}")
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # --- 조회 ---
+    def get_stats(self):
+        now = time.monotonic()
+        result = {}
+        for dev_id, dev in self.devices.items():
+            stats = dev.get_stats()
+            stats['port'] = dev.port
+            stats['reconnects'] = self._reconnects[dev_id]
+            stats['errors'] = self._errors[dev_id]
+            stats['mode'] = 'poll' if dev_id in self._polled else 'select'
+            if not self._connected(dev_id):
+                stats['retry_in'] = round(max(0.0, self._retry_at[dev_id] - now), 2)
+            result[dev_id] = stats
+        return result
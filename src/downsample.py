@@ -0,0 +1,154 @@
+import numpy as np
+
+# 차트용 서버측 다운샘플링: 점 n 개 -> max_points 개 이하의 인덱스 (첫 점 / 마지막 점은 항상 포함)
+# - lttb   : Largest-Triangle-Three-Buckets. 버킷마다 (앞에서 고른 점, 다음 버킷 평균) 과 만드는
+#            삼각형 넓이가 가장 큰 점을 고름. 다음 버킷 평균 / 버킷 경계는 한 번에 계산하고,
+#            순서 의존이 있는 선택만 버킷 단위로 돌며 버킷 안은 (버킷 수, 최대 버킷 길이) 2차원 배열로 계산
+#            버킷이 좁으면 (피라미드에서 고른 단계는 버킷당 점이 10개 안쪽) numpy 호출 비용이 더 커서
+#            파이썬 리스트로 직접 계산 (결과는 같음)
+# - minmax : 버킷마다 최소 / 최대 점 (같은 2차원 배열에서 argmin / argmax 한 번), 뾰족한 값을 절대 놓치지 않음
+# 여러 계열(해수위 / 호수위)은 같은 x 를 공유하므로 인덱스 하나로 고름
+#   lttb 는 계열별 값 범위로 정규화한 넓이의 합, minmax 는 계열별 최소 / 최대를 모두 포함 (버킷 수를 줄여서)
+
+METHODS = ('lttb', 'minmax')
+MIN_POINTS = 3
+NARROW_BUCKET = 16
+
+
+def _as_2d(ys):
+    ys = np.asarray(ys, dtype=np.float64)
+    return ys[None, :] if ys.ndim == 1 else ys
+
+
+def _bucket_edges(start, stop, n_buckets):
+    """[start, stop) 를 n_buckets 개의 연속 구간으로 (길이 차이 최대 1)"""
+    return np.linspace(start, stop, n_buckets + 1).astype(np.int64)
+
+
+def _bucket_positions(edges):
+    """버킷별 원소 인덱스 (버킷 수, 최대 길이) - 짧은 버킷은 마지막 원소를 반복해서 채움"""
+    starts, counts = edges[:-1], np.diff(edges)
+    width = int(counts.max())
+    return starts[:, None] + np.minimum(np.arange(width)[None, :], counts[:, None] - 1)
+
+
+def lttb_indices(x, ys, max_points):
+    x = np.asarray(x, dtype=np.float64)
+    ys = _as_2d(ys)
+    n = len(x)
+    if max_points >= n or n <= MIN_POINTS:
+        return np.arange(n)
+    max_points = max(int(max_points), MIN_POINTS)
+
+    # 계열마다 값 범위로 나눠서 넓이의 단위를 맞춤 (범위가 0 이면 그 계열은 영향 없음)
+    span = np.ptp(ys, axis=1, keepdims=True)
+    ys = (ys - ys.min(axis=1, keepdims=True)) / np.where(span > 0, span, 1.0)
+
+    # 첫 점 / 마지막 점을 뺀 가운데를 max_points - 2 개 버킷으로
+    n_buckets = max_points - 2
+    edges = _bucket_edges(1, n - 1, n_buckets)
+    starts, counts = edges[:-1], np.diff(edges)
+
+    # 다음 버킷 평균 (마지막 버킷의 "다음" 은 마지막 점)
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], starts - 1) / counts, x[-1])[1:]
+    avg_y = np.concatenate([np.add.reduceat(ys[:, 1:n - 1], starts - 1, axis=1) / counts, ys[:, -1:]], axis=1)[:, 1:]
+
+    chosen = np.empty(max_points, dtype=np.int64)
+    chosen[0], chosen[-1] = 0, n - 1
+    if counts.max() <= NARROW_BUCKET:
+        chosen[1:-1] = _lttb_narrow(x, ys, edges, avg_x, avg_y)
+        return chosen
+
+    # 버킷 안의 점들을 (버킷, 위치) 2차원으로
+    pos = _bucket_positions(edges)
+    bx, by = x[pos], ys[:, pos]
+    a = 0
+    for b in range(n_buckets):
+        ax, ay = x[a], ys[:, a:a + 1]
+        cx, cy = avg_x[b], avg_y[:, b:b + 1]
+        # 삼각형 넓이 x 2 = |(ax - cx)(y - ay) - (ax - x)(cy - ay)|, 계열 합
+        area = np.abs((ax - cx) * (by[:, b] - ay) - (ax - bx[b]) * (cy - ay)).sum(axis=0)
+        a = pos[b, int(np.argmax(area))]
+        chosen[b + 1] = a
+    return chosen
+
+
+def _lttb_narrow(x, ys, edges, avg_x, avg_y):
+    """lttb_indices 의 선택 단계를 파이썬 리스트로 (좁은 버킷용, 같은 식 / 같은 결과)"""
+    xs, points, edges = x.tolist(), list(zip(*ys.tolist())), edges.tolist()
+    next_x, next_y = avg_x.tolist(), list(zip(*avg_y.tolist()))
+    chosen = []
+    a = 0
+    for b in range(len(edges) - 1):
+        ax, ay = xs[a], points[a]
+        u = ax - next_x[b]
+        d = [c - p for c, p in zip(next_y[b], ay)]
+        best, a = -1.0, edges[b]
+        for j in range(edges[b], edges[b + 1]):
+            w = ax - xs[j]
+            area = 0.0
+            for yj, ayk, dk in zip(points[j], ay, d):
+                area += abs(u * (yj - ayk) - w * dk)
+            if area > best:
+                best, a = area, j
+        chosen.append(a)
+    return chosen
+
+
+def minmax_indices(ys, max_points):
+    ys = _as_2d(ys)
+    k, n = ys.shape
+    if max_points >= n or n <= MIN_POINTS:
+        return np.arange(n)
+
+    # 버킷마다 계열별 최소 / 최대 (2k 개) + 첫 점 / 마지막 점
+    n_buckets = (int(max_points) - 2) // (2 * k)
+    if n_buckets < 1:
+        return np.array([0, n - 1])
+    pos = _bucket_positions(_bucket_edges(0, n, n_buckets))
+    rows = np.arange(n_buckets)
+    picks = [np.array([0, n - 1])]
+    for y in ys:
+        values = y[pos]
+        picks += [pos[rows, values.argmin(axis=1)], pos[rows, values.argmax(axis=1)]]
+    return np.unique(np.concatenate(picks))
+
+
+def downsample_indices(x, ys, max_points, method='lttb'):
+    """max_points 개 이하로 고른 인덱스 (오름차순). max_points 가 None 이거나 점이 더 적으면 전부"""
+    if method not in METHODS:
+        raise ValueError(f"downsample 은 {', '.join(METHODS)} 중 하나여야 합니다.")
+    n = len(x)
+    if max_points is None or max_points >= n:
+        return np.arange(n)
+    if method == 'lttb':
+        return lttb_indices(x, ys, max_points)
+    return minmax_indices(ys, max_points)
+
+
+def parse_max_points(value):
+    """쿼리 문자열 값 -> int 또는 None (MIN_POINTS 보다 작거나 숫자가 아니면 ValueError)"""
+    if value in (None, ''):
+        return None
+    try:
+        points = int(value)
+    except ValueError:
+        raise ValueError(f"max_points 는 {MIN_POINTS} 이상의 정수여야 합니다.") from None
+    if points < MIN_POINTS:
+        raise ValueError(f"max_points 는 {MIN_POINTS} 이상의 정수여야 합니다.")
+    return points
+
+
+def downsample_lists(data, max_points, method='lttb', series=('sea', 'lake'), label='times'):
+    """{'sea': [...], 'lake': [...], 'times': [...], ...} -> series 로 고른 인덱스로 줄인 새 dict.
+    label 과 길이가 같은 목록은 모두 같은 인덱스로 줄임 (센서 자료의 head / waste 등도 정렬이 맞게)"""
+    n = len(data[label])
+    idx = downsample_indices(np.arange(n), [data[name] for name in series], max_points, method)
+    if len(idx) == n:
+        return data
+    idx = idx.tolist()
+    out = dict(data)
+    for name, values in data.items():
+        if isinstance(values, list) and len(values) == n:
+            out[name] = [values[i] for i in idx]
+    return out
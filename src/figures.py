@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')   # 화면 없이 렌더링 (pyplot 보다 먼저)
+import pandas as pd
+import seaborn as sns
+from matplotlib import font_manager
+from matplotlib.figure import Figure
+from scipy import stats
+
+from data_loader import DATA_DIR, file_hash, load_csv, load_env_monthly, load_merged, SOURCES
+
+# 분석 그래프 렌더링 서비스
+# - 그래프마다 파라미터(기간, 지표, dpi 등)를 받아 Figure 를 그리는 함수로 정의
+# - 결과 PNG 는 data/.cache/figures/ 에 (입력 데이터 해시 + 파라미터) 키로 저장, 같은 키면 다시 그리지 않음
+# - pyplot 대신 Figure 객체를 직접 써서 화면/전역 figure 상태 없이 그림
+# - 서로 독립인 그래프 여러 장은 render_all() 이 프로세스 풀로 병렬 렌더링
+
+FIGURE_DIR = os.path.join(DATA_DIR, ".cache", "figures")
+# 그리는 코드가 바뀌면 올려서 기존 그림을 무효화
+FIGURE_VERSION = 2
+
+PATTERN_CSV = os.path.join(DATA_DIR, "rain_pattern_vs_waste.csv")
+MODEL_FILE = os.path.join(DATA_DIR, "models", "efficiency_rf.joblib")
+
+# 한글 폰트: 설치된 것만 지정 (없는 폰트를 지정하면 그릴 때마다 경고)
+KOREAN_FONTS = ['Malgun Gothic', 'AppleGothic', 'NanumGothic', 'Noto Sans CJK KR']
+_installed = {f.name for f in font_manager.fontManager.ttflist}
+FONT_FAMILY = [f for f in KOREAN_FONTS if f in _installed] + ['DejaVu Sans']
+matplotlib.rcParams['font.family'] = FONT_FAMILY
+matplotlib.rcParams['axes.unicode_minus'] = False
+
+PATTERN_METRICS = {
+    'heavy_hours': ('집중 강우 시간', 'skyblue'),
+    'rain_peak': ('최대 시간 강수량', 'green'),
+    'rain_sum': ('월 누적 강수량', 'blue'),
+    'top10_ratio': ('강우 집중도', 'purple'),
+}
+
+# 모델이 아직 없을 때 쓰는 중요도 (00_randomforest.py 결과)
+FALLBACK_IMPORTANCE = {'낙차(물리)': 0.8080, '강수량(환경)': 0.1018, '쓰레기(환경)': 0.0902}
+
+
+# --- 그래프 정의 ---
+def _env_range(start, end):
+    df = load_env_monthly()
+    df['date'] = df['date'].dt.to_period('M').astype(str)
+    if start:
+        df = df[df['date'] >= start]
+    if end:
+        df = df[df['date'] <= end]
+    if df.empty:
+        raise ValueError(f"해당 기간의 데이터가 없습니다: {start} ~ {end}")
+    return df.reset_index(drop=True)
+
+
+def draw_correlation(start, end):
+    """강수량 vs 쓰레기 상관관계 (01_visual.py 그래프 1)"""
+    df = _env_range(start, end)
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    correlation, p_value = stats.pearsonr(df['rain_avg'], df['waste_sum'])
+    sns.regplot(x='rain_avg', y='waste_sum', data=df, ax=ax,
+                scatter_kws={'alpha': 0.6}, line_kws={'color': 'red', 'label': f'r={correlation:.4f}'})
+    ax.set_title(f'강수량과 쓰레기 수거량 상관분석 (p-value: {p_value:.2e})', fontsize=14)
+    ax.set_xlabel('월평균 강수량 (mm)')
+    ax.set_ylabel('쓰레기 수거량 (ton)')
+    ax.legend()
+    return fig
+
+
+def draw_monthly_trends(start, end):
+    """월별 강수량 / 쓰레기 추이 이중축 (01_visual.py 그래프 2)"""
+    df = _env_range(start, end)
+    fig = Figure(figsize=(12, 6))
+    ax1 = fig.add_subplot()
+    ax2 = ax1.twinx()
+    ax1.bar(df['date'], df['rain_avg'], color='skyblue', alpha=0.5, label='강수량(mm)')
+    ax2.plot(df['date'], df['waste_sum'], color='green', marker='o', label='쓰레기(ton)')
+    ax1.set_title(f"월별 강수량 및 쓰레기 수거량 추이 ({df['date'].iloc[0][:4]}-{df['date'].iloc[-1][:4]})", fontsize=14)
+    ax1.set_xticks(df['date'][::6])
+    ax1.tick_params(axis='x', rotation=45)
+    ax1.set_ylabel('강수량 (mm)', color='blue')
+    ax2.set_ylabel('쓰레기 (ton)', color='green')
+    return fig
+
+
+def draw_feature_importance():
+    """효율 결정 요인 중요도 (01_visual.py 그래프 3, 저장된 모델이 있으면 그 값 사용)"""
+    importance = FALLBACK_IMPORTANCE
+    if os.path.exists(MODEL_FILE):
+        from model_pipeline import load_exported
+        result = load_exported(MODEL_FILE)
+        labels = {'낙차': '낙차(물리)', 'rain_avg': '강수량(환경)', 'waste_sum': '쓰레기(환경)'}
+        importance = {labels.get(f, f): float(v)
+                      for f, v in zip(result['features'], result['model'].feature_importances_)}
+    df_imp = pd.DataFrame({'Feature': list(importance), 'Importance': list(importance.values())})
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.add_subplot()
+    sns.barplot(x='Importance', y='Feature', hue='Feature', data=df_imp, palette='magma', legend=False, ax=ax)
+    ax.set_title('발전 효율 결정 요인 중요도 분석', fontsize=14)
+    ax.set_xlim(0, 1)
+    for i, v in enumerate(df_imp['Importance']):
+        ax.text(v + 0.01, i, f'{v*100:.1f}%', va='center', fontweight='bold')
+    return fig
+
+
+def draw_pattern(metric):
+    """강우 패턴 지표 vs 쓰레기 수거량 (02_pattern_visual.py)"""
+    if metric not in PATTERN_METRICS:
+        raise ValueError(f"metric 은 {', '.join(PATTERN_METRICS)} 중 하나여야 합니다.")
+    label, color = PATTERN_METRICS[metric]
+    idx = list(PATTERN_METRICS).index(metric) + 1
+    df_p = load_csv(PATTERN_CSV)
+    df_p['month'] = df_p['month'].astype(str)
+    r, p = stats.pearsonr(df_p[metric], df_p['waste_sum'])
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    if metric == 'heavy_hours':
+        # 막대(강우시간) + 선(수거량)
+        ax_twin = ax.twinx()
+        sns.barplot(data=df_p, x='month', y=metric, ax=ax, color=color, alpha=0.6, label=f'막대: {label} (h)')
+        sns.lineplot(data=df_p, x='month', y='waste_sum', ax=ax_twin, color='red', marker='o', linewidth=2,
+                     label='선: 쓰레기 수거량 (ton)')
+        ax.set_ylabel(f'{label} (Hours)')
+        ax_twin.set_ylabel('쓰레기 수거량 (ton)')
+        ax.tick_params(axis='x', rotation=45)
+
+        # 범례를 하나로 합쳐서 상단 바깥에 표시
+        lines, labels = ax.get_legend_handles_labels()
+        lines2, labels2 = ax_twin.get_legend_handles_labels()
+        ax_twin.get_legend().remove()
+        ax.legend(lines + lines2, labels + labels2, loc='upper center', bbox_to_anchor=(0.5, 1.15), ncol=2)
+    else:
+        # 산점도 + 회귀선
+        sns.regplot(data=df_p, x=metric, y='waste_sum', ax=ax, color=color,
+                    line_kws={'color': 'orange', 'linestyle': '--', 'linewidth': 2},
+                    label=f'점/선: {label} 대비 수거량 상관관계')
+        ax.set_ylabel('쓰레기 수거량 (ton)')
+        ax.legend(loc='upper center', bbox_to_anchor=(0.5, 1.15))
+
+    ax.text(0.05, 0.95, f'상관계수(r): {r:.3f}\n유의확률(p): {p:.3e}', transform=ax.transAxes, fontsize=11,
+            verticalalignment='top', bbox=dict(boxstyle='round', facecolor='white', alpha=0.9))
+    ax.set_title(f'[{idx}] {label} vs 쓰레기 수거량', fontsize=15, pad=35)
+    ax.set_xlabel(f'{label} 수치')
+    return fig
+
+
+def draw_baseline():
+    """낙차 구간별 기준 효율 (Baseline.py)"""
+    from baseline_learner import BaselineLearner, MAX_RAIN, MIN_HEAD
+    df = load_merged()
+    df_base = df[(df['평균강수량(mm)'] <= MAX_RAIN) & (df['낙차'] > MIN_HEAD) & (df['합계(킬로와트시)'] > 0)].copy()
+    df_base['효율'] = df_base['합계(킬로와트시)'] / df_base['낙차']
+    learner = BaselineLearner.fit(df)
+    global_baseline = learner.global_baseline
+    group_baseline = learner.group_baseline()
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    sns.scatterplot(data=df_base, x='낙차', y='효율', alpha=0.3, color='gray', label='정상상태 개별 데이터', ax=ax)
+    sns.lineplot(x=group_baseline.index, y=group_baseline.values, color='red', marker='o', linewidth=3,
+                 label='기준선 (Baseline)', ax=ax)
+    ax.axhline(global_baseline, color='blue', linestyle='--', label=f'전체평균: {global_baseline:.1f}')
+    ax.set_title('발전 효율 기준선(Baseline) 설정 결과', fontsize=15, pad=20)
+    ax.set_xlabel('낙차 (m)')
+    ax.set_ylabel('발전 효율 (kWh/m)')
+    ax.legend(loc='upper right')
+    return fig
+
+
+def draw_loss_event(date, smp, clean_cost):
+    """강우 이벤트 누적 손실액 vs 수거 비용 (decision.py). date 를 주면 그날 최대 강우 시각 기준"""
+    from baseline_learner import BaselineLearner
+    from loss_engine import loss_won
+    df = load_merged()
+    table = BaselineLearner.fit(df).as_table()
+    df['loss_won'] = loss_won(df['낙차'].to_numpy(), df['합계(킬로와트시)'].to_numpy(), table, smp)
+
+    candidates = df if not date else df[df['날짜'].dt.strftime('%Y-%m-%d') == date]
+    if candidates.empty:
+        raise ValueError(f"해당 날짜의 데이터가 없습니다: {date}")
+    max_rain_date = candidates.loc[candidates['평균강수량(mm)'].idxmax(), '날짜']
+    window = (df['날짜'] >= max_rain_date - pd.Timedelta(hours=24)) & (df['날짜'] <= max_rain_date + pd.Timedelta(hours=48))
+    sample_df = df[window].copy()
+    sample_df['cum_loss_won'] = sample_df['loss_won'].cumsum()
+
+    fig = Figure(figsize=(14, 7))
+    ax1 = fig.add_subplot()
+    ax2 = ax1.twinx()
+    x_labels = sample_df['날짜'].dt.strftime('%m-%d %H')
+    sns.barplot(x=x_labels, y=sample_df['평균강수량(mm)'], ax=ax1, color='blue', alpha=0.2, label='시간당 강수량(mm)')
+    sns.lineplot(x=x_labels, y=sample_df['loss_won'], ax=ax2, color='red', marker='o', alpha=0.4, label='순간 손실액(원)')
+    sns.lineplot(x=x_labels, y=sample_df['cum_loss_won'], ax=ax2, color='darkred', linewidth=3, label='누적 발전 손실액(원)')
+    ax2.axhline(clean_cost, color='black', linestyle=':', linewidth=3, label=f'수거 비용 기준선 ({clean_cost/10000:.0f}만원)')
+
+    ax1.set_title(f'강우 이벤트에 따른 경제적 수거 적기 분석 (최대 강우일: {max_rain_date.date()})', fontsize=16, pad=20)
+    ax1.set_xlabel('시간 (월-일 시)')
+    ax1.set_ylabel('강수량 (mm)')
+    ax2.set_ylabel('손실 금액 (원)')
+    ax1.tick_params(axis='x', rotation=45)
+
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    if ax1.get_legend():
+        ax1.get_legend().remove()
+    ax2.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
+    return fig
+
+
+def draw_lag_efficiency(lag):
+    """낙차 구간별 맑음 / 비 온 후 평균 효율 (00.py). lag 이 음수면 lag 스캔에서 고른 시차"""
+    from data_loader import load_compact
+    from lag_scan import MAX_LAG_HOURS, STATUS, after_rain_comparison, best_lag, load_or_build
+    if lag > MAX_LAG_HOURS:
+        raise ValueError(f"lag 은 {MAX_LAG_HOURS} 시간 이하여야 합니다.")
+    if lag < 0:
+        lag = best_lag(load_or_build(max_workers=1))
+    active, _ = after_rain_comparison(load_compact(), lag)
+
+    fig = Figure(figsize=(12, 6))
+    ax = fig.add_subplot()
+    sns.lineplot(data=active, x='head_group', y='efficiency', hue='status', hue_order=STATUS, marker='o', ax=ax)
+    ax.set_title(f'낙차 구간별 쓰레기 유입에 따른 실제 효율 저하 (비 온 뒤 {lag}시간)', fontsize=15)
+    ax.set_xlabel('낙차 구간 (m)')
+    ax.set_ylabel('평균 발전 효율 (kWh/m)')
+    ax.grid(True, alpha=0.3)
+    return fig
+
+
+def _data(name):
+    return os.path.join(DATA_DIR, SOURCES[name][0])
+
+
+# 이름 -> (그리는 함수, 기본 파라미터, 입력 파일 목록, seaborn 스타일)
+FIGURES = {
+    'correlation': (draw_correlation, {'start': '', 'end': ''}, [_data('env_monthly')], 'whitegrid'),
+    'monthly_trends': (draw_monthly_trends, {'start': '', 'end': ''}, [_data('env_monthly')], 'whitegrid'),
+    'feature_importance': (draw_feature_importance, {}, [MODEL_FILE], 'whitegrid'),
+    'pattern': (draw_pattern, {'metric': 'heavy_hours'}, [PATTERN_CSV], 'whitegrid'),
+    'baseline': (draw_baseline, {}, [_data('merged')], None),
+    'loss_event': (draw_loss_event, {'date': '', 'smp': 150.0, 'clean_cost': 5_000_000.0},
+                   [_data('merged')], None),
+    'lag_efficiency': (draw_lag_efficiency, {'lag': -1}, [_data('merged')], None),
+}
+DEFAULT_DPI = 150
+MAX_DPI = 600
+
+
+# --- 캐시 ---
+_hash_memo = {}
+# 스타일(rcParams)이 전역이라 한 프로세스 안에서는 한 번에 한 장씩 그림 (병렬은 프로세스 풀로)
+_render_lock = threading.Lock()
+
+
+def _input_digest(paths):
+    """입력 파일 해시 (mtime/크기가 그대로면 프로세스 안에서 다시 읽지 않음)"""
+    parts = []
+    for path in paths:
+        if not os.path.exists(path):
+            parts.append(f"{os.path.basename(path)}:missing")
+            continue
+        st = os.stat(path)
+        stamp = (path, st.st_mtime_ns, st.st_size)
+        if stamp not in _hash_memo:
+            _hash_memo[stamp] = file_hash(path)
+        parts.append(_hash_memo[stamp])
+    return parts
+
+
+def normalize_params(name, params):
+    """쿼리 문자열 등으로 받은 파라미터를 기본값 타입에 맞춰 정리 (모르는 파라미터는 ValueError)"""
+    if name not in FIGURES:
+        raise KeyError(name)
+    _, defaults, _, _ = FIGURES[name]
+    params = dict(params)
+    dpi = int(params.pop('dpi', DEFAULT_DPI))
+    if not 30 <= dpi <= MAX_DPI:
+        raise ValueError(f"dpi 는 30 ~ {MAX_DPI} 사이여야 합니다.")
+    unknown = set(params) - set(defaults)
+    if unknown:
+        raise ValueError(f"알 수 없는 파라미터: {', '.join(sorted(unknown))}")
+    out = {k: type(v)(params.get(k, v)) for k, v in defaults.items()}
+    return out, dpi
+
+
+def figure_path(name, params, dpi):
+    _, _, sources, _ = FIGURES[name]
+    spec = {'name': name, 'params': params, 'dpi': dpi, 'version': FIGURE_VERSION,
+            'inputs': _input_digest(sources)}
+    key = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:20]
+    return os.path.join(FIGURE_DIR, f"{name}_{key}.png")
+
+
+def render(name, **params):
+    """그래프 PNG 경로 반환 (캐시에 있으면 그대로, 없으면 그려서 저장)"""
+    params, dpi = normalize_params(name, params)
+    path = figure_path(name, params, dpi)
+    if os.path.exists(path):
+        return path
+
+    draw, _, _, style = FIGURES[name]
+    with _render_lock:
+        # 기다리는 동안 다른 요청이 같은 그림을 그렸을 수 있음
+        if os.path.exists(path):
+            return path
+        rc = {'font.family': FONT_FAMILY}
+        with sns.axes_style(style, rc=rc) if style else matplotlib.rc_context(rc):
+            fig = draw(**params)
+            os.makedirs(FIGURE_DIR, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            fig.savefig(tmp, dpi=dpi, bbox_inches='tight', format='png')
+        os.replace(tmp, path)
+    return path
+
+
+def _render_job(job):
+    name, params = job
+    return render(name, **params)
+
+
+def render_all(jobs=None, max_workers=None):
+    """[(이름, 파라미터), ...] 를 병렬 렌더링. 캐시에 없는 것만 프로세스 풀로 보냄"""
+    jobs = jobs if jobs is not None else [(name, {}) for name in FIGURES]
+    paths = [None] * len(jobs)
+    todo = []
+    for i, (name, params) in enumerate(jobs):
+        p, dpi = normalize_params(name, params)
+        path = figure_path(name, p, dpi)
+        if os.path.exists(path):
+            paths[i] = path
+        else:
+            todo.append(i)
+
+    if len(todo) == 1:
+        paths[todo[0]] = _render_job(jobs[todo[0]])
+    elif todo:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for i, path in zip(todo, pool.map(_render_job, [jobs[i] for i in todo])):
+                paths[i] = path
+    return paths
+
+
+def export(targets, max_workers=None):
+    """{저장 경로: (이름, 파라미터)} -> 렌더링(캐시) 후 지정 경로로 복사. 새로 그린 개수 반환"""
+    jobs = list(targets.values())
+    before = sum(os.path.exists(figure_path(n, *normalize_params(n, p))) for n, p in jobs)
+    for dest, path in zip(targets, render_all(jobs, max_workers)):
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+        shutil.copyfile(path, dest)
+    return len(jobs) - before
+
+
+def list_figures():
+    return {name: dict(defaults, dpi=DEFAULT_DPI) for name, (_, defaults, _, _) in FIGURES.items()}
@@ -0,0 +1,244 @@
+import os
+import shutil
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from downsample import downsample_indices
+
+SEA_COL = '해수위(EL.m)'
+LAKE_COL = '호수위(EL.m)'
+TIME_COL = '일자'
+
+# float32 값을 내보낼 때 자릿수: 수위계 정밀도(cm) 까지만 (float32 잡음 제거 + 응답 크기 감소)
+VALUE_DECIMALS = 2
+
+DAY_NS = 86_400 * 10**9
+
+# CSV 를 파싱한 배열을 .npy 로 저장해 두고 np.load(mmap_mode='r') 로 여는 공유 캐시
+# (웹 worker 여러 개가 같은 파일을 memory-map -> 물리 메모리에는 한 벌만, worker 마다 CSV 파싱 안 함)
+CACHE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", ".cache"))
+NPY_VERSION = 1
+ARRAYS = ('ts', 'sea', 'lake')
+
+# 기간 조회 시 resample 을 생략하면 기간 길이에 따라 자동 선택
+AUTO_RESAMPLE = [
+    (1, None),        # 1일 이하: 원본
+    (7, '10min'),     # 1주 이하: 10분 평균
+    (62, '1h'),       # 2달 이하: 1시간 평균
+    (None, '1D'),     # 그 이상: 일 평균
+]
+
+# 차트용 max_points 조회: 날짜별로 원본(1분) / 10분 평균 / 1시간 평균 단계를 만들어 캐시해 두고,
+# 점이 max_points 개 이상 있는 가장 성긴 단계를 LTTB(또는 min/max)로 줄임 -> 기간이 길어도 응답 점 수 / 계산량 일정
+PYRAMID_LEVELS = ('raw', '10min', '1h')
+PYRAMID_CACHE_DAYS = 2048
+
+# 기간 조회에 쓸 수 있는 resample 간격, 한 번에 조회할 수 있는 최대 일수 (피라미드 캐시를 넘지 않도록)
+RESAMPLE_RULES = ('raw', '1min', '5min', '10min', '15min', '30min', '1h', '3h', '6h', '12h', '1D')
+MAX_RANGE_DAYS = PYRAMID_CACHE_DAYS
+# max_points 없이 resample 을 직접 줄 때 응답 행 수 상한 (1분 데이터 약 2주). 넘으면 max_points 나 더 큰 간격을 쓰도록 400
+# (raw 로 2048일이면 300만 행 가까이 한 응답에 직렬화됨)
+MAX_RANGE_POINTS = 20_000
+
+
+def _to_day_ns(date_str):
+    """'YYYY-MM-DD' -> 그 날 00:00 의 epoch ns (형식이 틀리면 ValueError, '2024-01' 같은 줄임 형식도)"""
+    try:
+        day = np.datetime64(date_str, 'D')
+    except (ValueError, TypeError):
+        day = None
+    if day is None or str(day) != date_str:
+        raise ValueError(f"날짜는 YYYY-MM-DD 형식이어야 합니다: {date_str}")
+    return int(day.astype('datetime64[ns]').astype(np.int64))
+
+
+def _round_list(values):
+    return values.astype(np.float64).round(VALUE_DECIMALS).tolist()
+
+
+class HistoryStore:
+    """sihwa_history.csv 를 날짜 인덱스로 조회하는 저장소
+
+    시각은 정렬된 int64(ns) 배열 하나, 수위는 float32 배열로만 보관하고
+    날짜별 조회는 searchsorted(O(log n)) 로 구간을 찾는다.
+    """
+
+    def __init__(self, ts_ns, sea, lake, cache_size=256, presorted=False, pyramid_cache_size=PYRAMID_CACHE_DAYS):
+        if not presorted:
+            order = np.argsort(ts_ns, kind='stable')
+            ts_ns, sea, lake = ts_ns[order], sea[order], lake[order]
+        # 이미 정렬된 memmap 배열은 복사하지 않고 그대로 씀
+        self.ts = np.ascontiguousarray(ts_ns, dtype=np.int64)
+        self.sea = np.ascontiguousarray(sea, dtype=np.float32)
+        self.lake = np.ascontiguousarray(lake, dtype=np.float32)
+        # 날짜별 응답 메모이제이션 (인코딩/압축본 캐시는 app 의 api_codec.PayloadCache)
+        self.day = lru_cache(maxsize=cache_size)(self._day)
+        self.pyramid = lru_cache(maxsize=pyramid_cache_size)(self._pyramid)
+
+    @classmethod
+    def from_csv(cls, path, encoding='cp949'):
+        df = pd.read_csv(path, encoding=encoding, usecols=[TIME_COL, SEA_COL, LAKE_COL],
+                         dtype={SEA_COL: np.float32, LAKE_COL: np.float32})
+        ts = pd.to_datetime(df[TIME_COL]).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        return cls(ts, df[SEA_COL].to_numpy(), df[LAKE_COL].to_numpy())
+
+    @classmethod
+    def from_npy(cls, directory, mmap_mode='r', **kwargs):
+        arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS]
+        return cls(*arrays, presorted=True, **kwargs)
+
+    def save_npy(self, directory):
+        """임시 폴더에 쓰고 이름 바꾸기 (다른 프로세스가 반쯤 쓴 파일을 열지 않도록)"""
+        tmp = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(tmp, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp, f"{name}.npy"), getattr(self, name))
+        try:
+            os.rename(tmp, directory)
+        except OSError:
+            # 다른 프로세스가 먼저 만들었으면 그쪽을 씀
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @classmethod
+    def from_csv_cached(cls, path, encoding='cp949', cache_dir=CACHE_DIR):
+        """CSV 내용 해시별 .npy 캐시를 memory-map 으로 열기 (없으면 CSV 를 한 번 파싱해서 만듦)"""
+        from data_loader import file_hash
+
+        directory = os.path.join(cache_dir, f"history_v{NPY_VERSION}_{file_hash(path)[:16]}")
+        if not os.path.isdir(directory):
+            os.makedirs(cache_dir, exist_ok=True)
+            cls.from_csv(path, encoding=encoding).save_npy(directory)
+        return cls.from_npy(directory)
+
+    def __len__(self):
+        return len(self.ts)
+
+    # --- 인덱스 조회 ---
+    def _bounds(self, start_ns, end_ns):
+        lo = np.searchsorted(self.ts, start_ns, side='left')
+        hi = np.searchsorted(self.ts, end_ns, side='left')
+        return lo, hi
+
+    def day_bounds(self, date_str):
+        day = _to_day_ns(date_str)
+        return self._bounds(day, day + DAY_NS)
+
+    def _format_times(self, ts, fmt_len):
+        # 'YYYY-MM-DDTHH:MM' -> 필요한 부분만 잘라 사용
+        text = np.datetime_as_string(np.asarray(ts, dtype=np.int64).view('datetime64[ns]').astype('datetime64[m]'))
+        if fmt_len == 5:
+            return [s[11:16] for s in text.tolist()]
+        return [s.replace('T', ' ') for s in text.tolist()]
+
+    def _day(self, date_str):
+        lo, hi = self.day_bounds(date_str)
+        return {
+            'sea': _round_list(self.sea[lo:hi]),
+            'lake': _round_list(self.lake[lo:hi]),
+            'times': self._format_times(self.ts[lo:hi], 5)
+        }
+
+    def _pyramid(self, date_str):
+        """그 날의 {단계: (ts, sea, lake)} - 원본은 복사 없는 view, 나머지는 버킷 평균"""
+        day = _to_day_ns(date_str)
+        lo, hi = self.day_bounds(date_str)
+        raw = (self.ts[lo:hi], self.sea[lo:hi], self.lake[lo:hi])
+        levels = {'raw': raw}
+        for rule in PYRAMID_LEVELS[1:]:
+            levels[rule] = _bucket_mean(*raw, day, pd.Timedelta(rule).value)
+        return levels
+
+    def day_points(self, date_str, max_points, method='lttb'):
+        """날짜 하나를 max_points 개 이하로 (시각은 HH:MM)"""
+        return self.points(date_str, date_str, max_points, method, fmt_len=5)
+
+    def points(self, start_date, end_date, max_points, method='lttb', fmt_len=16):
+        """[start, end] 기간을 max_points 개 이하로: 날짜별 피라미드에서 단계를 골라 이어 붙인 뒤 다운샘플"""
+        start, end = _parse_range(start_date, end_date)
+        # 자료가 있는 날짜만 (범위 밖 날짜는 빈 피라미드라 캐시만 차지)
+        first, last = (self.ts[0] // DAY_NS * DAY_NS, self.ts[-1]) if len(self.ts) else (start, start - 1)
+        days = np.arange(max(start, first), min(end, last + 1), DAY_NS)
+        days = days.view('datetime64[ns]').astype('datetime64[D]').astype(str)
+        pyramids = [self.pyramid(day) for day in days.tolist()]
+        if not pyramids:
+            return {'sea': [], 'lake': [], 'times': [], 'resample': 'raw', 'downsample': method}
+
+        level = 'raw'
+        for rule in reversed(PYRAMID_LEVELS):
+            if sum(len(p[rule][0]) for p in pyramids) >= max_points:
+                level = rule
+                break
+        ts, sea, lake = (np.concatenate([p[level][i] for p in pyramids]) for i in range(3))
+
+        idx = downsample_indices(ts - start, [sea, lake], max_points, method)
+        return {
+            'sea': _round_list(sea[idx]),
+            'lake': _round_list(lake[idx]),
+            'times': self._format_times(ts[idx], fmt_len),
+            'resample': level,
+            'downsample': method,
+        }
+
+    # --- 기간 조회 (서버측 다운샘플링) ---
+    def range(self, start_date, end_date, resample=None, max_points=None, method='lttb'):
+        if resample is not None and resample not in RESAMPLE_RULES:
+            raise ValueError(f"resample 은 {', '.join(RESAMPLE_RULES)} 중 하나여야 합니다.")
+        if max_points is not None and resample is None:
+            return self.points(start_date, end_date, max_points, method)
+        start, end = _parse_range(start_date, end_date)
+
+        if resample is None:
+            days = (end - start) // DAY_NS
+            resample = next(rule for limit, rule in AUTO_RESAMPLE if limit is None or days <= limit)
+        elif resample == 'raw':
+            resample = None
+
+        lo, hi = self._bounds(start, end)
+        if max_points is None:
+            # 버킷 수는 기간 / 간격을 넘지 않음 (원본은 실제 행 수)
+            rows = hi - lo if resample is None else min(hi - lo, -(-(end - start) // pd.Timedelta(resample).value))
+            if rows > MAX_RANGE_POINTS:
+                raise ValueError(f"응답이 {rows}행으로 최대 {MAX_RANGE_POINTS}행을 넘습니다. "
+                                 "max_points 를 주거나 기간을 줄이거나 더 큰 resample 간격을 쓰세요.")
+        ts, sea, lake = self.ts[lo:hi], self.sea[lo:hi], self.lake[lo:hi]
+
+        if resample is not None and len(ts):
+            step = pd.Timedelta(resample).value
+            ts, sea, lake = _bucket_mean(ts, sea, lake, start, step)
+
+        result = {'resample': resample or 'raw'}
+        if max_points is not None:
+            idx = downsample_indices(ts - start, [sea, lake], max_points, method)
+            ts, sea, lake = ts[idx], sea[idx], lake[idx]
+            result['downsample'] = method
+        return {
+            'sea': _round_list(sea),
+            'lake': _round_list(lake),
+            'times': self._format_times(ts, 16),
+            **result,
+        }
+
+
+def _parse_range(start_date, end_date):
+    """'YYYY-MM-DD' 두 개 -> [start, end + 1일) epoch ns (start <= end, 최대 MAX_RANGE_DAYS 일)"""
+    start = _to_day_ns(start_date)
+    end = _to_day_ns(end_date)
+    if end < start:
+        raise ValueError("start 는 end 보다 늦을 수 없습니다.")
+    if (end - start) // DAY_NS + 1 > MAX_RANGE_DAYS:
+        raise ValueError(f"한 번에 조회할 수 있는 기간은 최대 {MAX_RANGE_DAYS}일입니다.")
+    return start, end + DAY_NS  # end 날짜 포함
+
+
+def _bucket_mean(ts, sea, lake, origin, step):
+    """origin 부터 step 간격 버킷별 평균 (정렬돼 있으므로 같은 버킷은 연속 구간 -> reduceat)"""
+    if not len(ts):
+        return ts, sea.astype(np.float64), lake.astype(np.float64)
+    bucket = (ts - origin) // step
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    counts = np.diff(np.r_[starts, len(ts)])
+    sea = np.add.reduceat(sea.astype(np.float64), starts) / counts
+    lake = np.add.reduceat(lake.astype(np.float64), starts) / counts
+    return origin + bucket[starts] * step, sea, lake
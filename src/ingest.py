@@ -0,0 +1,217 @@
+import threading
+import time
+
+import numpy as np
+import serial
+
+# 아두이노 시리얼 수집기
+# - 시리얼 버퍼에 쌓인 만큼 한 번에 읽어서(batch) 줄 단위로 파싱
+# - 최근 N 시간치 측정값을 미리 할당한 NumPy 링버퍼에 보관
+# - Flask 핸들러는 lock 으로 보호된 스냅샷(복사본)만 읽음
+# - 파싱 실패 / 버린 줄 / 시리얼 오류 / 리스너 오류 횟수 집계
+#   (리스너 하나가 예외를 내도 다른 리스너와 수집은 계속, 로그는 첫 번째와 이후 ERROR_LOG_EVERY 번마다)
+# serial.serial_for_url 을 쓰므로 'COM3' 외에 'loop://' 나 pty 경로로도 하드웨어 없이 돌릴 수 있다.
+
+FIELDS = ('ts', 'sea', 'lake', 'head', 'waste')
+MAX_LINE = 128          # 이보다 긴 줄은 깨진 데이터로 보고 버림
+SENSOR_HZ = 2           # sihwa.ino 의 delay(500)
+ERROR_LOG_EVERY = 100
+
+
+def parse_line(line):
+    """b'sea|lake|waste' -> (sea, lake, waste), 형식이 틀리면 ValueError"""
+    parts = line.decode('utf-8').strip().split('|')
+    if len(parts) != 3:
+        raise ValueError(f"필드 수가 3이 아님: {line!r}")
+    return float(parts[0]), float(parts[1]), int(parts[2])
+
+
+class RingBuffer:
+    """(ts, sea, lake, head, waste) 행을 고정 크기 배열에 순환 저장"""
+
+    def __init__(self, capacity):
+        self.data = np.zeros((capacity, len(FIELDS)), dtype=np.float64)
+        self.capacity = capacity
+        self.next = 0       # 다음에 쓸 위치
+        self.size = 0
+
+    def extend(self, rows):
+        rows = np.asarray(rows, dtype=np.float64)[-self.capacity:]
+        n = len(rows)
+        end = self.next + n
+        if end <= self.capacity:
+            self.data[self.next:end] = rows
+        else:
+            split = self.capacity - self.next
+            self.data[self.next:] = rows[:split]
+            self.data[:n - split] = rows[split:]
+        self.next = end % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def last(self, n=None):
+        """최근 n 행(오래된 순) 복사본"""
+        n = self.size if n is None else min(n, self.size)
+        start = (self.next - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.data[start:start + n].copy()
+        return np.concatenate([self.data[start:], self.data[:self.next]])
+
+    def since(self, ts):
+        rows = self.last()
+        return rows[np.searchsorted(rows[:, 0], ts, side='left'):]
+
+
+class SerialIngestor:
+    def __init__(self, port=None, baudrate=9600, history_hours=24, read_timeout=1.0, ser=None, loss_cum=0):
+        self.port = port
+        self.baudrate = baudrate
+        self.read_timeout = read_timeout
+        self.ser = ser
+
+        self._lock = threading.Lock()
+        self._pending = bytearray()
+        self._listeners = []
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.ring = RingBuffer(int(history_hours * 3600 * SENSOR_HZ))
+        # loss_cum 은 재시작 시 저장된 값에서 이어감
+        self.latest = {"sea": 0.0, "lake": 0.0, "head": 0.0, "waste": 0, "loss_cum": loss_cum, "ts": None}
+        self.counters = {'lines': 0, 'parse_errors': 0, 'dropped_lines': 0, 'serial_errors': 0,
+                         'listener_errors': 0, 'batches': 0, 'bytes': 0}
+        self.backlog = 0        # 마지막 읽기 때 시리얼 버퍼에 쌓여 있던 바이트 (읽기가 밀리면 커짐)
+
+    # --- 포트 ---
+    def open(self):
+        if self.ser is None:
+            self.ser = serial.serial_for_url(self.port, self.baudrate, timeout=self.read_timeout)
+        return self.ser
+
+    def add_listener(self, fn):
+        """측정값 한 건마다 fn(snapshot) 호출 (수집 쓰레드에서 실행됨)"""
+        self._listeners.append(fn)
+
+    # --- 수집 ---
+    def feed(self, chunk, now=None):
+        """읽어온 바이트 묶음을 줄 단위로 파싱해서 반영, 반영된 측정값 수 반환"""
+        now = time.time() if now is None else now
+        self._pending += chunk
+        *lines, rest = self._pending.split(b'\n')
+        self._pending = bytearray(rest)
+
+        rows, errors, dropped = [], 0, 0
+        if len(self._pending) > MAX_LINE:
+            # 줄바꿈 없이 계속 쌓이는 쓰레기 데이터
+            self._pending.clear()
+            dropped += 1
+
+        for line in lines:
+            if not line.strip():
+                continue
+            if len(line) > MAX_LINE:
+                dropped += 1
+                continue
+            try:
+                sea, lake, waste = parse_line(line)
+            except (ValueError, UnicodeDecodeError):
+                errors += 1
+                continue
+            rows.append((now, sea, lake, abs(sea - lake), waste))
+
+        snapshots = []
+        with self._lock:
+            self.counters['batches'] += 1
+            self.counters['bytes'] += len(chunk)
+            self.counters['lines'] += len(rows)
+            self.counters['parse_errors'] += errors
+            self.counters['dropped_lines'] += dropped
+            if rows:
+                self.ring.extend(rows)
+                for ts, sea, lake, head, waste in rows:
+                    self.latest.update(sea=sea, lake=lake, head=head, waste=waste, ts=ts)
+                    self.latest['loss_cum'] += int(waste / 10)
+                    if self._listeners:
+                        snapshots.append(dict(self.latest))
+
+        for snap in snapshots:
+            for fn in self._listeners:
+                try:
+                    fn(snap)
+                except Exception as e:
+                    self._listener_failed(fn, e)
+        return len(rows)
+
+    def _listener_failed(self, fn, error):
+        with self._lock:
+            self.counters['listener_errors'] += 1
+            count = self.counters['listener_errors']
+        if count == 1 or count % ERROR_LOG_EVERY == 0:
+            name = getattr(fn, '__qualname__', repr(fn))
+            print(f"⚠️ [주의] 측정값 리스너 오류 ({name}, 누적 {count}건), 수집은 계속: {error!r}")
+
+    def read_once(self):
+        ser = self.open()
+        # 버퍼에 쌓인 만큼 한 번에, 비어 있으면 최소 1바이트를 timeout 까지 기다림
+        self.backlog = ser.in_waiting
+        chunk = ser.read(self.backlog or 1)
+        if chunk:
+            self.feed(chunk)
+        return len(chunk)
+
+    def run(self):
+        failing = False
+        while not self._stop.is_set():
+            try:
+                self.read_once()
+                failing = False
+            except (serial.SerialException, OSError) as e:
+                self.close(error=True)
+                if not failing:
+                    # 연결이 끊긴 동안 같은 메시지를 반복 출력하지 않음
+                    print(f"⚠️ [주의] 시리얼 읽기 오류(재연결 시도 중): {e}")
+                    failing = True
+                self._stop.wait(1.0)
+
+    def close(self, error=False):
+        """포트를 닫고 읽다 만 줄은 버림 (error=True 면 시리얼 오류로 집계)"""
+        with self._lock:
+            if error:
+                self.counters['serial_errors'] += 1
+            if self._pending:
+                self.counters['dropped_lines'] += 1
+                self._pending.clear()
+        if self.ser is not None and self.port is not None:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+            self.ser = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # --- 조회 (스냅샷) ---
+    def snapshot(self):
+        with self._lock:
+            return dict(self.latest)
+
+    def history(self, seconds=None):
+        with self._lock:
+            rows = self.ring.last() if seconds is None else self.ring.since(time.time() - seconds)
+        return {name: rows[:, i].tolist() for i, name in enumerate(FIELDS)}
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['buffered_rows'] = self.ring.size
+            stats['capacity'] = self.ring.capacity
+            stats['last_ts'] = self.latest['ts']
+        stats['backlog_bytes'] = self.backlog
+        stats['connected'] = self.ser is not None and getattr(self.ser, 'is_open', False)
+        return stats
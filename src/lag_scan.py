@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_DIR, SOURCES, file_hash, flag, load_env_monthly, load_merged
+
+# 시차(lag) 상관 스캔 엔진: 강수 -> 쓰레기 -> 효율 지연 시간을 데이터로 결정
+# - corr(x[t-k], y[t]) 를 k = 0..L 전부, 낙차 구간(head group) 전부에 대해 FFT 교차상관 한 번으로 계산
+#   (shift + pearsonr 를 lag x 구간 수만큼 반복하지 않음, 결측은 마스크로 처리)
+# - p-value 는 x 를 원형 이동(circular shift)시킨 순열 검정 (자기상관 구조 보존), 프로세스 풀로 병렬
+#   p_value : 칸별, p_max : 모든 lag 중 최대 |r| 기준 (여러 lag 을 본 것에 대한 보정)
+# - 결과 표는 입력 파일 해시 + 파라미터 키로 data/.cache/ 에 저장
+
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+# 계산 방식이 바뀌면 올려서 기존 표를 무효화
+LAG_VERSION = 1
+
+MAX_LAG_HOURS = 72
+MAX_LAG_MONTHS = 6
+N_PERM = 200
+HEAD_STEP = 0.5
+MIN_HEAD = 1.0          # 00.py 와 같은 유효 데이터 조건
+MIN_GROUP_ROWS = 200    # 이보다 적은 낙차 구간은 제외
+DEFAULT_LAG = 3         # 유의한 lag 이 없을 때 (기존 00.py 의 3시간)
+
+COLUMNS = ['pair', 'unit', 'group', 'lag', 'r', 'n', 'p_value', 'p_max']
+STATUS = ['맑음', '비 온 후(쓰레기유입)']
+
+
+# --- 핵심 계산 ---
+def _standardize(v, m):
+    """유효값 기준 평균 0, 표준편차 1 로 맞추고 결측은 0 (FFT 합의 자릿수 손실 방지)"""
+    v = np.where(m, v, 0.0)
+    cnt = np.maximum(m.sum(axis=-1, keepdims=True), 1)
+    mean = v.sum(axis=-1, keepdims=True) / cnt
+    v = np.where(m, v - mean, 0.0)
+    std = np.sqrt((v ** 2).sum(axis=-1, keepdims=True) / cnt)
+    return np.where(m, v / np.where(std > 0, std, 1.0), 0.0)
+
+
+def _lag_corr(x, mx, y, my, max_lag, min_pairs):
+    """x, mx: (P, n) / y, my: (G, n) -> r, n_pairs: (P, G, L+1)
+    S_ab[k] = sum_t a[t-k] b[t] 를 rfft 교차상관으로 한 번에"""
+    n = x.shape[-1]
+    size = 1 << int(np.ceil(np.log2(2 * n)))
+    fx = {name: np.conj(np.fft.rfft(a, size))[:, None, :]
+          for name, a in (('m', mx), ('x', x * mx), ('xx', x * x * mx))}
+    fy = {name: np.fft.rfft(b, size)[None, :, :]
+          for name, b in (('m', my), ('y', y * my), ('yy', y * y * my))}
+
+    def cross(a, b):
+        return np.fft.irfft(fx[a] * fy[b], size)[..., :max_lag + 1]
+
+    cnt = np.rint(cross('m', 'm'))
+    sx, sy = cross('x', 'm'), cross('m', 'y')
+    sxx, syy, sxy = cross('xx', 'm'), cross('m', 'yy'), cross('x', 'y')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = cnt * sxy - sx * sy
+        var = (cnt * sxx - sx ** 2) * (cnt * syy - sy ** 2)
+        r = np.where((cnt >= min_pairs) & (var > 0), cov / np.sqrt(var), np.nan)
+    return np.clip(r, -1.0, 1.0), cnt
+
+
+def _perm_counts(args):
+    """원형 이동 offsets 에 대해 |r_perm| >= |r_obs| 횟수 (칸별 / lag 전체 최대값 기준)"""
+    x, mx, y, my, offsets, max_lag, min_pairs, r_obs, chunk = args
+    obs = np.abs(r_obs)                             # (G, L+1), NaN 은 비교 결과 False
+    cell = np.zeros(obs.shape, dtype=np.int64)
+    fam = np.zeros(obs.shape, dtype=np.int64)
+    for s in range(0, len(offsets), chunk):
+        off = offsets[s:s + chunk]
+        px = np.stack([np.roll(x, o) for o in off])
+        pm = np.stack([np.roll(mx, o) for o in off])
+        r, _ = _lag_corr(px, pm, y, my, max_lag, min_pairs)
+        r = np.nan_to_num(np.abs(r), nan=0.0)      # (P, G, L+1)
+        cell += (r >= obs[None]).sum(axis=0)
+        fam += (r.max(axis=2, keepdims=True) >= obs[None]).sum(axis=0)
+    return cell, fam
+
+
+def lag_scan(x, y, max_lag, x_mask=None, y_mask=None, n_perm=N_PERM, seed=0, min_pairs=30,
+             max_workers=None, chunk=8):
+    """x: (n,), y: (n,) 또는 (G, n). 반환 dict: r, n, p_value, p_max 모두 (G, L+1)"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    mx = np.isfinite(x) if x_mask is None else np.asarray(x_mask, dtype=bool) & np.isfinite(x)
+    my = np.isfinite(y) if y_mask is None else np.atleast_2d(y_mask).astype(bool) & np.isfinite(y)
+    mx, my = mx.astype(np.float64), my.astype(np.float64)
+    xs = _standardize(x, mx > 0)
+    ys = _standardize(y, my > 0)
+
+    r, cnt = _lag_corr(xs[None], mx[None], ys, my, max_lag, min_pairs)
+    r, cnt = r[0], cnt[0]
+    result = {'r': r, 'n': cnt.astype(np.int64)}
+    if n_perm <= 0:
+        return result
+
+    # 원래 위치와 너무 가까운 이동은 제외 (전체 길이의 10% ~ 90%)
+    n = len(x)
+    rng = np.random.default_rng(seed)
+    offsets = rng.integers(max(1, n // 10), max(2, n - n // 10), size=n_perm)
+    workers = max_workers or os.cpu_count() or 1
+    parts = [p for p in np.array_split(offsets, workers) if p.size]
+    jobs = [(xs, mx, ys, my, p, max_lag, min_pairs, r, chunk) for p in parts]
+    if len(jobs) == 1:
+        counts = [_perm_counts(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            counts = list(pool.map(_perm_counts, jobs))
+    cell = sum(c for c, _ in counts)
+    fam = sum(f for _, f in counts)
+    result['p_value'] = np.where(np.isnan(r), np.nan, (1 + cell) / (n_perm + 1))
+    result['p_max'] = np.where(np.isnan(r), np.nan, (1 + fam) / (n_perm + 1))
+    return result
+
+
+# --- 프로젝트 데이터 ---
+def _hourly_frame():
+    """2024 시간별 통합 데이터를 빈 시간 없이 1시간 간격으로 정렬 (없는 시간은 NaN)"""
+    # '날짜' 는 날짜만 있으므로 시각은 강수 쪽 '일시' 사용
+    df = load_merged().sort_values('일시').drop_duplicates('일시').set_index('일시')
+    full = pd.date_range(df.index.min(), df.index.max(), freq='h')
+    return df.reindex(full)
+
+
+def _monthly_frame():
+    """월별 강수/쓰레기 + 2024 월평균 효율 (효율은 00.py 와 같은 유효 조건)"""
+    env = load_env_monthly()
+    env['month'] = env['date'].dt.to_period('M')
+    hourly = _hourly_frame()
+    valid = (hourly['낙차'] >= MIN_HEAD) & (hourly['합계(킬로와트시)'] > 0)
+    eff = (hourly['합계(킬로와트시)'] / hourly['낙차'])[valid]
+    monthly_eff = eff.groupby(eff.index.to_period('M')).mean().rename('efficiency')
+    return env.set_index('month').join(monthly_eff).sort_index()
+
+
+def _rows(pair, unit, groups, res):
+    L = res['r'].shape[1]
+    out = pd.DataFrame({
+        'pair': pair, 'unit': unit,
+        'group': np.repeat(groups, L),
+        'lag': np.tile(np.arange(L), len(groups)),
+        'r': res['r'].ravel(), 'n': res['n'].ravel(),
+        'p_value': res.get('p_value', np.full(res['r'].shape, np.nan)).ravel(),
+        'p_max': res.get('p_max', np.full(res['r'].shape, np.nan)).ravel(),
+    })
+    return out[COLUMNS]
+
+
+def build_table(max_lag_hours=MAX_LAG_HOURS, max_lag_months=MAX_LAG_MONTHS, n_perm=N_PERM,
+                seed=0, max_workers=None):
+    """강수->효율(시간, 낙차 구간별), 강수->쓰레기(월), 쓰레기->효율(월) lag 상관 표"""
+    tables = []
+
+    # 1) 강수 -> 효율 (시간 단위), 전체 + 낙차 구간별을 한 번에
+    hourly = _hourly_frame()
+    rain = hourly['평균강수량(mm)'].to_numpy(dtype=np.float64)
+    head = hourly['낙차'].to_numpy(dtype=np.float64)
+    kwh = hourly['합계(킬로와트시)'].to_numpy(dtype=np.float64)
+    valid = (head >= MIN_HEAD) & (kwh > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        eff = np.where(valid, kwh / head, np.nan)
+    group = np.floor(head / HEAD_STEP) * HEAD_STEP
+    labels = ['all']
+    masks = [valid]
+    for g in np.unique(group[valid]):
+        m = valid & (group == g)
+        if m.sum() >= MIN_GROUP_ROWS:
+            labels.append(f"{g:.1f}")
+            masks.append(m)
+    masks = np.array(masks)
+    res = lag_scan(rain, np.broadcast_to(eff, masks.shape), max_lag_hours, y_mask=masks,
+                   n_perm=n_perm, seed=seed, max_workers=max_workers)
+    tables.append(_rows('rain->efficiency', 'hour', labels, res))
+
+    # 2) 월 단위: 강수 -> 쓰레기 (2020~2024), 쓰레기 -> 효율 (효율은 2024 만 있음)
+    monthly = _monthly_frame()
+    rain_m = monthly['rain_avg'].to_numpy(dtype=np.float64)
+    waste_m = monthly['waste_sum'].to_numpy(dtype=np.float64)
+    eff_m = monthly['efficiency'].to_numpy(dtype=np.float64)
+    res = lag_scan(rain_m, waste_m, max_lag_months, n_perm=n_perm, seed=seed, min_pairs=12, max_workers=1)
+    tables.append(_rows('rain->waste', 'month', ['all'], res))
+    res = lag_scan(waste_m, eff_m, min(max_lag_months, 3), n_perm=n_perm, seed=seed, min_pairs=6, max_workers=1)
+    tables.append(_rows('waste->efficiency', 'month', ['all'], res))
+
+    return pd.concat(tables, ignore_index=True)
+
+
+# --- 캐시 ---
+_memo = {}
+
+
+def _cache_path(params):
+    sources = [os.path.join(DATA_DIR, SOURCES[name][0]) for name in ('merged', 'env_monthly')]
+    stamps = [(p, os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in sources]
+    digest = _memo.get(tuple(stamps))
+    if digest is None:
+        digest = _memo[tuple(stamps)] = [file_hash(p) for p in sources]
+    spec = {'inputs': digest, 'params': params, 'version': LAG_VERSION}
+    key = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:20]
+    return os.path.join(CACHE_DIR, f"lag_scan_{key}.feather")
+
+
+def load_or_build(max_lag_hours=MAX_LAG_HOURS, max_lag_months=MAX_LAG_MONTHS, n_perm=N_PERM, seed=0,
+                  max_workers=None):
+    """캐시된 표가 있으면 읽고, 없으면 계산해서 저장 (입력 CSV 가 바뀌면 자동으로 다시 계산)"""
+    params = {'max_lag_hours': max_lag_hours, 'max_lag_months': max_lag_months, 'n_perm': n_perm, 'seed': seed}
+    path = _cache_path(params)
+    if path in _memo:
+        return _memo[path]
+    if os.path.exists(path):
+        table = pd.read_feather(path)
+    else:
+        table = build_table(max_workers=max_workers, **params)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            table.to_feather(path)
+        except OSError as e:
+            print(f"⚠️ [주의] lag 표 캐시 저장 실패: {e}")
+    _memo[path] = table
+    return table
+
+
+def best_lag(table, pair='rain->efficiency', group='all', sign=-1, alpha=0.05, p_col='p_max',
+             min_lag=1, default=DEFAULT_LAG):
+    """sign 방향(-1: 효율 감소)으로 가장 강한 유의한 lag. 없으면 default
+    기본은 p_max(여러 lag 을 본 것까지 보정한 p-value) 기준"""
+    rows = table[(table['pair'] == pair) & (table['group'] == group) & (table['lag'] >= min_lag)].dropna(subset=['r'])
+    if rows[p_col].notna().any():
+        rows = rows[rows[p_col] <= alpha]
+    rows = rows[np.sign(rows['r']) == sign]
+    if rows.empty:
+        return default
+    return int(rows.loc[(rows['r'] * sign).idxmax(), 'lag'])
+
+
+def after_rain_comparison(df, lag):
+    """00.py: lag 행 전에 비가 왔는지(맑음 / 비 온 후) x 낙차 0.5m 구간별 평균 효율 (+ 효율감소율(%))
+    df 는 data_loader.load_compact() 스키마 (시간 순, float32, flags). 반환: (유효 행 DataFrame, 비교 표)"""
+    # 필터링 전에 shift 해야 행 단위가 아닌 실제 시간 단위 시차가 됨 (자료 시작 전은 비가 오지 않은 것으로)
+    raining = flag(df, 'raining')
+    after_rain = np.zeros(len(df), dtype=bool)
+    after_rain[lag:] = raining[:len(df) - lag]
+
+    # 유효 데이터 (낙차 1.0m 이상 + 발전 중) 만, 상태는 2값 범주형
+    valid = flag(df, 'head_ok', 'generating')
+    head = df['낙차'].to_numpy()[valid]
+    active = pd.DataFrame({
+        'head_group': (head // HEAD_STEP) * HEAD_STEP,
+        'status': pd.Categorical.from_codes(after_rain[valid].astype(np.int8), STATUS),
+        'efficiency': df['합계(킬로와트시)'].to_numpy()[valid] / head,
+    })
+    comparison = active.groupby(['head_group', 'status'], observed=True)['efficiency'].mean().unstack()
+    if set(STATUS) <= set(comparison.columns):
+        comparison['효율감소율(%)'] = (comparison[STATUS[0]] - comparison[STATUS[1]]) / comparison[STATUS[0]] * 100
+    return active, comparison
+
+
+def summary(table, alpha=0.05):
+    """쌍/구간별 가장 강한 lag 과 채택된 lag (대시보드용)"""
+    out = []
+    for (pair, group), rows in table.dropna(subset=['r']).groupby(['pair', 'group'], sort=False):
+        top = rows.loc[rows['r'].abs().idxmax()]
+        out.append({'pair': pair, 'group': group, 'unit': top['unit'],
+                    'strongest_lag': int(top['lag']), 'r': float(top['r']), 'p_max': float(top['p_max']),
+                    'best_negative_lag': best_lag(table, pair, group, alpha=alpha, default=None)})
+    return out
+
+
+if __name__ == '__main__':
+    # 순열 검정을 프로세스 풀로 병렬 계산해서 캐시 (python src/lag_scan.py)
+    table = load_or_build()
+    print("=== ⏱️ 시차 상관 스캔 결과 (|r| 최대 lag) ===")
+    for row in summary(table):
+        print(f"[{row['pair']} / {row['group']}] lag {row['strongest_lag']}{'h' if row['unit'] == 'hour' else '개월'}"
+              f" r = {row['r']:.3f}, p_max = {row['p_max']:.3f}")
+    print(f"✅ 00.py 에 적용될 강우 후 시차: {best_lag(table)}시간")
@@ -0,0 +1,42 @@
+import threading
+import time
+
+# 처음 쓸 때 한 번만 만드는 무거운 객체 (과거 CSV, 기준효율 학습기, 예측 모델 등)
+# - get(): 아직 없으면 지금 로드하고, 다른 쓰레드(앱의 백그라운드 로드)가 로드 중이면 끝날 때까지 기다림
+# - 로더가 None 을 돌려주면 'missing', 예외가 나면 'failed' (다시 시도하지 않음)
+
+DONE = ('ready', 'missing', 'failed')
+
+
+class LazyResource:
+    def __init__(self, name, loader):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self.value = None
+        self.state = 'pending'
+        self.error = None
+        self.seconds = None
+
+    def get(self):
+        if self.state in DONE:
+            return self.value
+        with self._lock:
+            if self.state not in DONE:
+                self.state = 'loading'
+                t0 = time.perf_counter()
+                try:
+                    self.value = self._loader()
+                    self.state = 'ready' if self.value is not None else 'missing'
+                except Exception as e:
+                    self.error = str(e)
+                    self.state = 'failed'
+                self.seconds = round(time.perf_counter() - t0, 3)
+        return self.value
+
+    def peek(self):
+        """로드를 기다리지 않고 지금 값 (아직이면 None)"""
+        return self.value if self.state == 'ready' else None
+
+    def status(self):
+        return {'state': self.state, 'seconds': self.seconds, 'error': self.error}
@@ -0,0 +1,82 @@
+import numpy as np
+
+# 발전 손실액 계산 엔진 (decision.py 의 행 단위 apply 를 NumPy 벡터 연산으로 대체)
+# 손실(kWh) = max(0, 기준효율(낙차 구간) * 낙차 - 실제 발전량), 손실액 = 손실(kWh) * SMP
+
+HEAD_STEP = 0.5
+
+
+class BaselineTable:
+    """낙차 구간(0.5m) -> 기준 효율 조회 배열
+
+    round(낙차 / 0.5) 를 정수 구간 번호로 쓰고, 번호에서 offset 을 뺀 값을 배열 인덱스로 사용.
+    표에 없는 구간은 전체 평균(global_baseline) 으로 채운다.
+    """
+
+    def __init__(self, by_head, global_baseline, step=HEAD_STEP):
+        self.step = step
+        self.global_baseline = float(global_baseline)
+
+        heads = np.array(sorted(by_head), dtype=np.float64)
+        bins = np.rint(heads / step).astype(np.int64)
+        self.offset = int(bins.min()) if len(bins) else 0
+        size = int(bins.max()) - self.offset + 1 if len(bins) else 0
+        self.values = np.full(size, self.global_baseline, dtype=np.float64)
+        self.values[bins - self.offset] = [by_head[h] for h in sorted(by_head)]
+
+    def as_dict(self):
+        heads = (np.arange(len(self.values)) + self.offset) * self.step
+        return {float(h): float(v) for h, v in zip(heads, self.values)}
+
+    def lookup(self, head):
+        """낙차 배열 -> 기준 효율 배열 (Python round 와 같은 짝수 반올림)"""
+        head = np.asarray(head, dtype=np.float64)
+        idx = np.rint(head / self.step) - self.offset
+        inside = (idx >= 0) & (idx < len(self.values))
+        safe_idx = np.where(inside, idx, 0).astype(np.int64)
+        if not len(self.values):
+            return np.full(head.shape, self.global_baseline)
+        return np.where(inside, self.values[safe_idx], self.global_baseline)
+
+
+def loss_kwh(head, actual_kwh, table):
+    head = np.asarray(head, dtype=np.float64)
+    expected = table.lookup(head) * head
+    return np.maximum(0, expected - np.asarray(actual_kwh, dtype=np.float64))
+
+
+def loss_won(head, actual_kwh, table, smp):
+    """시간별 손실액(원)"""
+    return loss_kwh(head, actual_kwh, table) * smp
+
+
+def evaluate_scenarios(head, actual_kwh, tables, smp_values, clean_costs=()):
+    """여러 시나리오(기준표 x SMP x 수거비용) 를 한 번에 평가
+
+    반환값:
+      loss_kwh     (T, n)    기준표별 시간 손실량
+      total_won    (T, P)    기준표 x SMP 별 총 손실액
+      cross_index  (T, P, C) 누적 손실액이 수거 비용을 처음 넘는 행 번호 (넘지 않으면 -1)
+    """
+    head = np.asarray(head, dtype=np.float64)
+    actual_kwh = np.asarray(actual_kwh, dtype=np.float64)
+    smp_values = np.asarray(smp_values, dtype=np.float64)
+    clean_costs = np.asarray(clean_costs, dtype=np.float64)
+
+    # (T, n): 기준표마다 조회 한 번
+    expected = np.stack([t.lookup(head) for t in tables]) * head
+    loss = np.maximum(0, expected - actual_kwh)
+
+    # 손실액은 kWh 에 SMP 를 곱한 것이므로 누적/합계도 kWh 기준으로 한 번만 계산
+    cum_kwh = np.cumsum(loss, axis=1)
+    total_won = cum_kwh[:, -1:] * smp_values if loss.shape[1] else np.zeros((len(tables), len(smp_values)))
+
+    cross = np.full((len(tables), len(smp_values), len(clean_costs)), -1, dtype=np.int64)
+    if len(clean_costs) and loss.shape[1]:
+        # 손실은 0 이상이라 누적값이 단조 증가 -> searchsorted 로 임계 도달 시점 탐색
+        need_kwh = clean_costs[None, :] / smp_values[:, None]      # (P, C)
+        for ti in range(len(tables)):
+            idx = np.searchsorted(cum_kwh[ti], need_kwh, side='left')
+            cross[ti] = np.where(idx < loss.shape[1], idx, -1)
+
+    return {'loss_kwh': loss, 'total_won': total_won, 'cross_index': cross}
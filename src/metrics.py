@@ -0,0 +1,247 @@
+import abc
+import bisect
+import cProfile
+import itertools
+import math
+import os
+import threading
+import time
+
+# 앱 내부 계측 (Prometheus text 형식으로 /metrics 에 노출)
+# - Counter / Histogram 은 쓰레드별 샤드(dict)에 기록: 쓰는 쪽은 락 없이 자기 샤드만 갱신하고,
+#   /metrics 를 읽을 때 모든 샤드를 합침 (끝난 쓰레드의 샤드는 새 샤드를 등록할 때와 읽을 때
+#   retired 로 접어 둠 - 요청마다 쓰레드를 새로 띄우는 서버에서도 샤드 수는 살아 있는 쓰레드 수로 유지)
+# - 자주 불리는 구간은 Sampler 로 N 번에 한 번만 시간을 잼 (카운터는 매번)
+# - 장치 / 조위 캐시 / 로그 / 브로드캐스터가 이미 갖고 있는 get_stats() 값은 읽을 때 변환 (from_stats)
+# - serve.py 로 여러 worker 를 띄우면 각 worker 가 자기 값만 보고함
+#
+# cProfile 훅: SIHWA_PROFILE=1 로 켜고 요청에 ?profile=1 을 붙이면 그 요청을 프로파일해서
+# data/.cache/profiles/ 에 .prof 저장 (python -m pstats 나 snakeviz 로 열기)
+
+# 초 단위 기본 버킷 (0.5ms ~ 10s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", ".cache", "profiles"))
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Sharded(abc.ABC):
+    """쓰레드별 {라벨값 튜플: 값} 샤드"""
+
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []           # (쓰레드, 샤드)
+        self._retired = {}
+
+    def _shard(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._retire_dead()
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _retire_dead(self):
+        """끝난 쓰레드의 샤드를 retired 로 합치고 목록에서 뺌 (self._lock 을 잡은 채로)"""
+        alive = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                alive.append((thread, values))
+            else:
+                self._merge(self._retired, values)
+        self._shards = alive
+
+    @abc.abstractmethod
+    def _merge(self, into, values):
+        """values 를 into 에 더함"""
+
+    @abc.abstractmethod
+    def samples(self):
+        """[(이름, 라벨 dict, 값), ...]"""
+
+    def _totals(self):
+        with self._lock:
+            self._retire_dead()
+            totals = {}
+            self._merge(totals, self._retired)
+            for _, values in self._shards:
+                self._merge(totals, values)
+        return totals
+
+    def _labels(self, labelvalues, **extra):
+        labels = dict(zip(self.labelnames, labelvalues))
+        labels.update(extra)
+        return labels
+
+
+class Counter(_Sharded):
+    type = 'counter'
+
+    def inc(self, *labelvalues, value=1):
+        shard = self._shard()
+        shard[labelvalues] = shard.get(labelvalues, 0) + value
+
+    def _merge(self, into, values):
+        for key, value in dict(values).items():
+            into[key] = into.get(key, 0) + value
+
+    def samples(self):
+        return [(self.name, self._labels(key), value) for key, value in sorted(self._totals().items())]
+
+
+class Histogram(_Sharded):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labelvalues):
+        shard = self._shard()
+        row = shard.get(labelvalues)
+        if row is None:
+            # 버킷별 개수 (+Inf 포함) 다음 칸에 합계
+            row = shard[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def time(self, *labelvalues):
+        return _Timer(self, labelvalues)
+
+    def _merge(self, into, values):
+        for key, row in dict(values).items():
+            row = list(row)
+            total = into.get(key)
+            into[key] = row if total is None else [a + b for a, b in zip(total, row)]
+
+    def samples(self):
+        out = []
+        for key, row in sorted(self._totals().items()):
+            cumulative = list(itertools.accumulate(row[:-1]))
+            for le, count in zip(self.buckets + (math.inf,), cumulative):
+                out.append((f"{self.name}_bucket", self._labels(key, le=_format_value(le)), count))
+            out.append((f"{self.name}_sum", self._labels(key), row[-1]))
+            out.append((f"{self.name}_count", self._labels(key), cumulative[-1]))
+        return out
+
+
+class _Timer:
+    def __init__(self, histogram, labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.t0, *self.labelvalues)
+
+
+class Sampler:
+    """N 번에 한 번 True (itertools.count 의 next 는 GIL 아래에서 원자적이라 락이 필요 없음)"""
+
+    def __init__(self, every=1):
+        self.every = max(1, int(every))
+        self._count = itertools.count()
+
+    def hit(self):
+        return self.every == 1 or next(self._count) % self.every == 0
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labelnames, **kwargs):
+        # 같은 이름으로 다시 만들면 기존 것을 돌려줌 (create_app 을 여러 번 불러도 한 벌)
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get(Counter, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def families(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [(m.name, m.type, m.help, m.samples()) for m in metrics]
+
+
+REGISTRY = Registry()
+
+
+def from_stats(prefix, rows, label, counters=(), gauges=(), help=''):
+    """{라벨값: get_stats() dict} -> 메트릭 패밀리 목록 (숫자가 아닌 값과 없는 키는 건너뜀)"""
+    families = []
+    for kind, keys in (('counter', counters), ('gauge', gauges)):
+        for key in keys:
+            name = f"{prefix}_{key}_total" if kind == 'counter' else f"{prefix}_{key}"
+            samples = [(name, {label: value} if label else {}, stats[key])
+                       for value, stats in rows.items() if _is_number(stats.get(key))]
+            if samples:
+                families.append((name, kind, help or key, samples))
+    return families
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not (isinstance(value, float) and math.isnan(value))
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def render(families):
+    """Prometheus text exposition format 0.0.4"""
+    lines = []
+    for name, kind, help, samples in families:
+        lines.append(f"# HELP {name} {_escape(help)}")
+        lines.append(f"# TYPE {name} {kind}")
+        for sample_name, labels, value in samples:
+            label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}" if label_text
+                         else f"{sample_name} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+class RequestProfile:
+    """요청 하나를 cProfile 로 (cProfile 은 enable 한 쓰레드만 잼)"""
+
+    def __init__(self, label, directory=PROFILE_DIR):
+        self.label = label
+        self.directory = directory
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+        return self
+
+    def stop(self):
+        self.profile.disable()
+        os.makedirs(self.directory, exist_ok=True)
+        safe = ''.join(c if c.isalnum() else '_' for c in self.label).strip('_') or 'root'
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{safe}.prof")
+        self.profile.dump_stats(path)
+        return path
@@ -0,0 +1,227 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import TimeSeriesSplit, train_test_split
+
+from data_loader import load_env_monthly, load_power
+
+# 효율 RandomForest 학습 파이프라인
+# - 학습 데이터 해시 + 파라미터를 키로 학습된 모델을 joblib 으로 캐시 (같은 조건이면 다시 학습하지 않음)
+# - 시계열 교차검증(TimeSeriesSplit, cv_splits > 0 일 때만) 점수와 학습 시간/메모리를 함께 기록
+#   메모리는 학습 중 늘어난 RSS 최대치 (sklearn C/Cython 할당 포함). 리눅스에서 학습 직전에 프로세스의
+#   최대 RSS(VmHWM)를 현재 값으로 되돌려 놓고 재므로 설정마다 따로 잼. 다른 OS 에서는 None
+# - 여러 설정(파라미터 x 특성 조합)은 프로세스 풀로 병렬 학습
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.normpath(os.path.join(BASE_DIR, "..", "data", "models"))
+# 웹앱이 불러가는 현재 모델
+MODEL_PATH = os.path.join(MODEL_DIR, "efficiency_rf.joblib")
+
+TARGET = '효율'
+FEATURE_SETS = {
+    'full': ['낙차', 'rain_avg', 'waste_sum'],
+    'head_rain': ['낙차', 'rain_avg'],
+    'head_only': ['낙차'],
+}
+DEFAULT_PARAMS = {'n_estimators': 100, 'random_state': 42, 'n_jobs': -1}
+PARAM_GRID = {
+    'n_estimators': [100, 300],
+    'max_depth': [None, 12],
+    'min_samples_leaf': [1, 5],
+}
+
+# 캐시된 결과 dict 의 형식이 바뀌면 올려서 예전 캐시를 다시 학습
+# (2: feature_medians 추가, 3: 메모리를 fit_rss_mb 하나로, 4: CV 만 시간 순 정렬)
+RESULT_VERSION = 4
+
+
+def build_training_frame():
+    """00_randomforest.py 와 같은 학습 데이터 (시간별 발전 + 2024년 월별 환경).
+    행 순서는 기존 스크립트의 merge 결과 그대로 (80/20 랜덤 분할이 같아지도록). 시간 순서는 time_order 참고"""
+    df_env = load_env_monthly()
+    df_env['date'] = df_env['date'].dt.to_period('M')
+    df_env_2024 = df_env[df_env['date'].dt.year == 2024]
+
+    df_gen = load_power()
+    df_gen['YM'] = df_gen['날짜'].dt.to_period('M')
+
+    df_train = pd.merge(df_gen, df_env_2024, left_on='YM', right_on='date', how='inner')
+    df_train = df_train[(df_train['낙차'] > 0) & (df_train['합계(킬로와트시)'] > 0)].copy()
+    df_train[TARGET] = df_train['합계(킬로와트시)'] / df_train['낙차']
+    return df_train.reset_index(drop=True)
+
+
+def time_order(df):
+    """시계열 CV 용 행 위치 (날짜, 시간 순). 학습 데이터 자체의 순서는 바꾸지 않음"""
+    return np.lexsort((df['시간'].to_numpy(), df['날짜'].to_numpy()))
+
+
+def data_hash(X, y):
+    h = hashlib.sha256()
+    h.update(json.dumps(list(X.columns)).encode())
+    h.update(pd.util.hash_pandas_object(X, index=False).values.tobytes())
+    h.update(pd.util.hash_pandas_object(y, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def cache_key(data_digest, features, params, cv_splits, cv_order=None):
+    # n_jobs 는 결과에 영향이 없으므로 키에서 제외
+    params = {k: v for k, v in params.items() if k != 'n_jobs'}
+    spec = {'data': data_digest, 'features': list(features), 'params': params,
+            'cv_splits': cv_splits, 'cv_order': _order_digest(cv_splits, cv_order), 'sklearn': sklearn.__version__, 'version': RESULT_VERSION}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:24]
+
+
+def _order_digest(cv_splits, cv_order):
+    # CV 를 돌릴 때만 행 순서가 결과에 영향
+    if not cv_splits or cv_order is None:
+        return None
+    return hashlib.sha256(np.asarray(cv_order, dtype=np.int64).tobytes()).hexdigest()[:16]
+
+
+def _proc_status_mb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def _start_rss_peak():
+    """최대 RSS 를 현재 값으로 되돌리고 현재 RSS(MB) 반환 (리눅스 전용, 안 되면 None)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return _proc_status_mb('VmRSS')
+    except OSError:
+        return None
+
+
+def _rss_peak_since(start_mb):
+    if start_mb is None:
+        return None
+    peak = _proc_status_mb('VmHWM')
+    return None if peak is None else round(max(0.0, peak - start_mb), 1)
+
+
+def fit_config(X, y, features, params, cv_splits=0, model_dir=MODEL_DIR, digest=None, cv_order=None):
+    """설정 하나 학습 (캐시에 있으면 불러오기만 함). 결과 dict 에 'model' 포함.
+    cv_splits 가 2 이상이면 시계열 CV 로 모델을 그만큼 더 학습 (0 이면 CV 없이 cv_r2 / cv_mae 는 None).
+    cv_order 는 CV 에서만 쓰는 시간 순 행 위치 (time_order), None 이면 들어온 순서가 시간 순이라고 봄"""
+    params = dict(DEFAULT_PARAMS, **params)
+    digest = digest or data_hash(X, y)
+    key = cache_key(digest, features, params, cv_splits, cv_order)
+    path = os.path.join(model_dir, f"rf_{key}.joblib")
+
+    if os.path.exists(path):
+        t0 = time.perf_counter()
+        result = joblib.load(path)
+        result['cached'] = True
+        result['load_seconds'] = round(time.perf_counter() - t0, 4)
+        return result
+
+    X = X[list(features)]
+    rss_start = _start_rss_peak()
+    t0 = time.perf_counter()
+
+    # 시계열 교차검증: 과거로 학습 -> 바로 다음 구간으로 검증
+    cv_r2, cv_mae = [], []
+    if cv_splits:
+        X_cv, y_cv = (X, y) if cv_order is None else (X.iloc[cv_order], y.iloc[cv_order])
+        for train_idx, test_idx in TimeSeriesSplit(n_splits=cv_splits).split(X_cv):
+            m = RandomForestRegressor(**params).fit(X_cv.iloc[train_idx], y_cv.iloc[train_idx])
+            pred = m.predict(X_cv.iloc[test_idx])
+            cv_r2.append(r2_score(y_cv.iloc[test_idx], pred))
+            cv_mae.append(mean_absolute_error(y_cv.iloc[test_idx], pred))
+
+    # 최종 모델은 기존 스크립트와 같은 80/20 분할로 학습 (원래 행 순서 그대로)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = RandomForestRegressor(**params).fit(X_train, y_train)
+    holdout_r2 = r2_score(y_test, model.predict(X_test))
+
+    fit_seconds = time.perf_counter() - t0
+
+    result = {
+        'key': key, 'features': list(features), 'params': params, 'data_hash': digest,
+        'cv_r2': float(np.mean(cv_r2)) if cv_r2 else None, 'cv_mae': float(np.mean(cv_mae)) if cv_mae else None,
+        'holdout_r2': float(holdout_r2), 'fit_seconds': round(fit_seconds, 3),
+        'fit_rss_mb': _rss_peak_since(rss_start), 'rows': len(X), 'model': model,
+        'feature_medians': {k: float(v) for k, v in X.median().items()},
+    }
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(result, path)
+    result['cached'] = False
+    return result
+
+
+def _fit_worker(args):
+    X, y, features, params, cv_splits, model_dir, digest, cv_order = args
+    result = fit_config(X, y, features, params, cv_splits, model_dir, digest, cv_order)
+    result.pop('model')     # 모델 본체는 캐시 파일에 있으므로 프로세스 간 전송하지 않음
+    return result
+
+
+def expand_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def sweep(df=None, feature_sets=None, grid=None, cv_splits=5, max_workers=None, model_dir=MODEL_DIR):
+    """파라미터 x 특성 조합을 프로세스 풀로 병렬 학습, 결과 표(cv_r2 내림차순) 반환"""
+    df = build_training_frame() if df is None else df
+    feature_sets = feature_sets or FEATURE_SETS
+    all_features = sorted({f for feats in feature_sets.values() for f in feats})
+    X, y = df[all_features], df[TARGET]
+    digest = data_hash(X, y)
+    order = time_order(df)
+
+    # 각 모델은 1코어, 설정 간 병렬 (코어 과다 할당 방지)
+    configs = [(name, feats, dict(params, n_jobs=1))
+               for name, feats in feature_sets.items()
+               for params in expand_grid(grid or PARAM_GRID)]
+    jobs = [(X, y, feats, params, cv_splits, model_dir, digest, order) for _, feats, params in configs]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(_fit_worker, jobs))
+
+    rows = []
+    for (name, _, _), res in zip(configs, results):
+        row = {'feature_set': name, **{k: v for k, v in res.items() if k not in ('features', 'params')}}
+        row.update({f'param_{k}': v for k, v in res['params'].items() if k not in ('n_jobs', 'random_state')})
+        rows.append(row)
+    return pd.DataFrame(rows).sort_values('cv_r2', ascending=False).reset_index(drop=True)
+
+
+def export(result, path=MODEL_PATH):
+    """웹앱에서 쓸 모델로 내보내기 (모델 + 특성 목록 + 지표)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    joblib.dump({k: v for k, v in result.items() if k != 'cached'}, path)
+    return path
+
+
+def load_exported(path=MODEL_PATH):
+    result = joblib.load(path)
+    if 'feature_medians' not in result:
+        # RESULT_VERSION 1 때 내보낸 모델: 중앙값을 학습 데이터에서 다시 계산
+        print("⚠️ [주의] 내보낸 모델에 특성 중앙값이 없어 학습 데이터에서 다시 계산합니다 (00_randomforest.py 재실행 권장)")
+        result['feature_medians'] = {k: float(v) for k, v in build_training_frame()[result['features']].median().items()}
+    return result
+
+
+if __name__ == '__main__':
+    # 파라미터 x 특성 조합 스윕 (python src/model_pipeline.py)
+    table = sweep()
+    print("=== 🔍 하이퍼파라미터 스윕 결과 (시계열 CV R2 순) ===")
+    print(table.drop(columns=['key', 'data_hash']).to_string(index=False))
+    best = table.iloc[0]
+    print(f"✅ 최고 설정: {best['feature_set']} (CV R2 {best['cv_r2']:.4f})")
@@ -0,0 +1,286 @@
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from baseline_learner import STATE_PATH, BaselineLearner
+from data_loader import DATA_DIR, SOURCES, file_hash, load_env_monthly, load_merged
+from event_engine import CLEAN_COST, DRY_HOURS, RAIN_THRESHOLD, SMP
+
+# 수거 일정 몬테카를로 시뮬레이터
+# - 합성 연도: 2024 시간별 자료(강수, 낙차/조위에 따른 기준 발전량)에서 같은 계절의 며칠 단위 블록을 뽑아 이어붙이고,
+#   월 강수량은 2020~2024 월별 자료 중 임의의 해 비율로 다시 맞춤 (블록 부트스트랩)
+# - 쓰레기 유입: 월별 자료의 회귀 (쓰레기 = 기본 유입 + 기울기 x 강수량), 기본 유입은 뽑힌 해의 잔차를 그 달 시간에 고르게
+# - 손실 모델: 스크린에 쌓인 쓰레기(톤) 만큼 기준 발전량(기준효율 x 낙차)이 줄어듦, 쌓인 쓰레기는 반감기로 일부 흘러감
+# - 정책(안 함 / 누적 손실 임계 / 고정 주기 / 강우 후) 을 시나리오 축으로 묶은 (정책, 시나리오) 배열로
+#   시간(8,760) 반복 한 번에 모두 평가, 시나리오 chunk 는 프로세스 풀로 병렬 (chunk 마다 고정 시드라 worker 수와 무관한 결과)
+
+SIM_YEAR_DAYS = 365
+BLOCK_DAYS = 3              # 블록 길이 (여러 날 이어지는 강우를 끊지 않도록)
+SEASON_WINDOW = 15          # 블록 시작일을 같은 날짜 ±15일 안에서 뽑음
+MAX_RAIN_SCALE = 5.0        # 월 강수 비율 상한 (강수가 거의 없는 달의 과대 확대 방지)
+MIN_HEAD = 1.0
+
+# 쓰레기 -> 효율 손실 가정 (관측 자료가 없어 파라미터로 조정)
+PENALTY_PER_TON = 0.0005    # 쌓인 쓰레기 1톤당 발전량 0.05% 감소
+MAX_PENALTY = 0.2
+DEBRIS_HALF_LIFE_HOURS = 30 * 24
+
+N_SCENARIOS = 10_000
+MAX_SCENARIOS = 100_000
+CHUNK = 1_000               # 한 번에 만드는 시나리오 수 (chunk 당 (8760, 1000) float32 배열 몇 개)
+FIXED_DAYS = 14
+RAIN_MM = 10.0              # 강우 후 수거: 마지막 수거 이후 누적 강수량 기준
+
+POLICIES = ['none', 'threshold', 'fixed', 'rain_triggered']
+PERCENTILES = (5, 50, 95)
+
+DEFAULTS = {
+    'scenarios': N_SCENARIOS, 'seed': 0, 'smp': SMP, 'clean_cost': CLEAN_COST,
+    'loss_threshold': CLEAN_COST, 'fixed_days': FIXED_DAYS, 'rain_mm': RAIN_MM, 'dry_hours': DRY_HOURS,
+    'penalty_per_ton': PENALTY_PER_TON, 'max_penalty': MAX_PENALTY, 'half_life_hours': DEBRIS_HALF_LIFE_HOURS,
+    'block_days': BLOCK_DAYS,
+}
+INT_PARAMS = {'scenarios', 'seed', 'fixed_days', 'dry_hours', 'block_days'}
+
+
+# --- 입력 (과거 자료 -> 일 단위 풀) ---
+def build_inputs(table=None):
+    """시간별/월별 과거 자료 -> 시뮬레이션 입력 dict (모두 작은 NumPy 배열이라 worker 에 그대로 전달)"""
+    if table is None:
+        table = BaselineLearner.load_or_fit().as_table()
+
+    df = load_merged().sort_values('일시').drop_duplicates('일시').set_index('일시')
+    start = df.index.min().normalize()
+    full = pd.date_range(start, start + pd.DateOffset(years=1), freq='h', inclusive='left')
+    df = df.reindex(full)
+
+    rain = df['평균강수량(mm)'].fillna(0).clip(lower=0).to_numpy(dtype=np.float64)
+    head = df['낙차'].to_numpy(dtype=np.float64)
+    kwh = df['합계(킬로와트시)'].to_numpy(dtype=np.float64)
+    # 실제로 발전한 시간에만 기준 발전량(쓰레기가 없을 때의 발전량)을 둠
+    gen = (head >= MIN_HEAD) & (kwh > 0)
+    expected = np.where(gen, table.lookup(np.nan_to_num(head)) * np.nan_to_num(head), 0.0)
+
+    n_days = len(full) // 24
+    day_month = full[::24].month.to_numpy() - 1
+
+    env = load_env_monthly()
+    env['year'], env['month'] = env['date'].dt.year, env['date'].dt.month - 1
+    rain_m = env.pivot(index='year', columns='month', values='rain_avg').to_numpy(dtype=np.float64)
+    waste_m = env.pivot(index='year', columns='month', values='waste_sum').to_numpy(dtype=np.float64)
+    slope, intercept = np.polyfit(env['rain_avg'], env['waste_sum'], 1)
+    base_year = int(start.year)
+    years = sorted(env['year'].unique())
+    ref = rain_m[years.index(base_year)] if base_year in years else rain_m.mean(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rain_scale = np.where(ref > 0, rain_m / ref, 1.0)
+    return {
+        'rain_days': rain[:n_days * 24].reshape(n_days, 24).astype(np.float32),
+        'expected_days': expected[:n_days * 24].reshape(n_days, 24).astype(np.float32),
+        'day_month': day_month[:n_days],
+        'rain_scale': np.clip(np.nan_to_num(rain_scale, nan=1.0), 0, MAX_RAIN_SCALE),   # (년, 12)
+        'waste_base': np.maximum(waste_m - slope * rain_m, 0),                           # (년, 12) 톤/월
+        'waste_slope': float(slope), 'waste_intercept': float(intercept),
+        'years': [int(y) for y in years],
+    }
+
+
+_INPUTS = OrderedDict()
+_RESULTS = OrderedDict()
+RESULT_CACHE_SIZE = 32
+
+
+def _input_key():
+    key = tuple(file_hash(os.path.join(DATA_DIR, SOURCES[n][0])) for n in ('merged', 'env_monthly'))
+    return key + (os.path.getmtime(STATE_PATH) if os.path.exists(STATE_PATH) else None,)
+
+
+def load_inputs():
+    """입력 파일 해시 + 기준효율 상태 파일 시각이 같으면 메모리에 있는 입력 재사용"""
+    key = _input_key()
+    if key not in _INPUTS:
+        _INPUTS.clear()
+        _INPUTS[key] = build_inputs()
+    return _INPUTS[key]
+
+
+# --- 합성 연도 ---
+def synth_years(inputs, n, rng, block_days=BLOCK_DAYS):
+    """(시간, 시나리오) 배열: 강수량(mm), 기준 발전량(kWh), 쓰레기 유입(톤)"""
+    n_days = len(inputs['day_month'])
+    n_blocks = -(-SIM_YEAR_DAYS // block_days)
+    block_doy = np.arange(n_blocks) * block_days
+    offset = rng.integers(-SEASON_WINDOW, SEASON_WINDOW + 1, size=(n, n_blocks))
+    starts = np.clip(block_doy + offset, 0, n_days - block_days)
+    days = (starts[:, :, None] + np.arange(block_days)).reshape(n, -1)[:, :SIM_YEAR_DAYS]   # (S, 365)
+
+    # 합성 연도의 달력 (윤년이 아닌 해) 기준으로 달마다 과거 한 해를 뽑아 강수/기본 유입을 맞춤
+    month = np.repeat(np.arange(12), np.diff(np.r_[0, np.cumsum([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])]))
+    year_pick = rng.integers(0, len(inputs['years']), size=(n, 12))
+    scale = inputs['rain_scale'][year_pick, np.arange(12)]                     # (S, 12)
+    base = inputs['waste_base'][year_pick, np.arange(12)]                      # 톤/월
+    month_hours = np.bincount(month, minlength=12) * 24
+
+    rain = inputs['rain_days'][days] * scale[:, month, None].astype(np.float32)          # (S, 365, 24)
+    expected = inputs['expected_days'][days]
+    inflow = (base / month_hours)[:, month, None].astype(np.float32) + np.float32(inputs['waste_slope']) * rain
+
+    # 시간 축을 앞으로 두어 매 시간 한 행(연속 메모리)씩 읽음
+    T = SIM_YEAR_DAYS * 24
+    return (np.ascontiguousarray(rain.reshape(n, T).T), np.ascontiguousarray(expected.reshape(n, T).T),
+            np.ascontiguousarray(inflow.reshape(n, T).T))
+
+
+# --- 정책 평가 ---
+def run_policies(rain, expected, inflow, p):
+    """(T, S) 배열 -> 정책별 (연간 손실액, 수거 횟수) 각각 (P, S).
+    매 시간: 쓰레기 누적 -> 손실 -> 정책 조건을 만족한 시나리오만 수거(쌓인 쓰레기 0)"""
+    T, S = rain.shape
+    P = len(POLICIES)
+    keep = 0.5 ** (1.0 / p['half_life_hours']) if p['half_life_hours'] > 0 else 1.0
+    won_per_kwh = p['smp'] * p['penalty_per_ton']
+    max_won = p['smp'] * p['max_penalty']
+    period = max(int(p['fixed_days']), 1) * 24
+    i_thr, i_fix, i_rain = POLICIES.index('threshold'), POLICIES.index('fixed'), POLICIES.index('rain_triggered')
+
+    debris = np.zeros((P, S))
+    loss = np.zeros((P, S))
+    since = np.zeros((P, S))            # 마지막 수거 이후 누적 손실액
+    cleanups = np.zeros((P, S), dtype=np.int32)
+    rain_since = np.zeros(S)
+    dry = np.zeros(S)
+    clean = np.zeros((P, S), dtype=bool)
+    hour_loss = np.empty((P, S))
+
+    for t in range(T):
+        debris *= keep
+        debris += inflow[t]
+        # 손실액 = 기준 발전량 x min(톤당 감소율 x 쓰레기, 최대 감소율) x SMP
+        np.minimum(debris * won_per_kwh, max_won, out=hour_loss)
+        hour_loss *= expected[t]
+        loss += hour_loss
+        since += hour_loss
+
+        r = rain[t]
+        rain_since += r
+        dry += 1
+        np.copyto(dry, 0, where=r >= RAIN_THRESHOLD)
+
+        clean[i_thr] = since[i_thr] >= p['loss_threshold']
+        clean[i_fix] = (t + 1) % period == 0
+        clean[i_rain] = (rain_since >= p['rain_mm']) & (dry == p['dry_hours'])
+        # 불리언 인덱싱 대신 where 복사 (매 시간 새 배열을 만들지 않음)
+        np.copyto(debris, 0, where=clean)
+        np.copyto(since, 0, where=clean)
+        cleanups += clean
+        np.copyto(rain_since, 0, where=clean[i_rain])
+    return loss, cleanups
+
+
+def _run_chunk(job):
+    inputs, n, seed_seq, p = job
+    rng = np.random.default_rng(seed_seq)
+    rain, expected, inflow = synth_years(inputs, n, rng, p['block_days'])
+    loss, cleanups = run_policies(rain, expected, inflow, p)
+    return loss.astype(np.float32), cleanups
+
+
+def normalize_params(params):
+    """API/CLI 파라미터 -> 숫자 dict (모르는 이름, 범위 밖 값은 ValueError)"""
+    unknown = set(params) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"알 수 없는 파라미터: {', '.join(sorted(unknown))}")
+    p = dict(DEFAULTS)
+    for k, v in params.items():
+        try:
+            p[k] = int(v) if k in INT_PARAMS else float(v)
+        except (TypeError, ValueError):
+            raise ValueError(f"{k} 는 숫자여야 합니다: {v}")
+    if not 1 <= p['scenarios'] <= MAX_SCENARIOS:
+        raise ValueError(f"scenarios 는 1 ~ {MAX_SCENARIOS} 사이여야 합니다")
+    if not 1 <= p['block_days'] <= 31 or p['fixed_days'] < 1 or p['dry_hours'] < 1:
+        raise ValueError("block_days(1~31), fixed_days, dry_hours 는 1 이상이어야 합니다")
+    if min(p['smp'], p['clean_cost'], p['loss_threshold'], p['penalty_per_ton'], p['max_penalty']) < 0:
+        raise ValueError("비용/손실 파라미터는 0 이상이어야 합니다")
+    return p
+
+
+def _dist(v):
+    pct = np.percentile(v, PERCENTILES)
+    out = {'mean': float(v.mean()), 'std': float(v.std())}
+    out.update({f"p{q}": float(x) for q, x in zip(PERCENTILES, pct)})
+    return out
+
+
+def simulate(inputs=None, max_workers=None, chunk=CHUNK, **params):
+    """정책별 연간 손실액 / 수거 비용 / 합계 분포. max_workers=1 이면 현재 프로세스에서 계산"""
+    p = normalize_params(params)
+    inputs = load_inputs() if inputs is None else inputs
+    t0 = time.perf_counter()
+
+    sizes = [min(chunk, p['scenarios'] - s) for s in range(0, p['scenarios'], chunk)]
+    seeds = np.random.SeedSequence(p['seed']).spawn(len(sizes))
+    jobs = [(inputs, n, ss, p) for n, ss in zip(sizes, seeds)]
+    if max_workers == 1 or len(jobs) == 1:
+        parts = [_run_chunk(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            parts = list(pool.map(_run_chunk, jobs))
+    loss = np.concatenate([l for l, _ in parts], axis=1).astype(np.float64)
+    cleanups = np.concatenate([c for _, c in parts], axis=1)
+    cost = cleanups * p['clean_cost']
+    total = loss + cost
+
+    policies = {}
+    for i, name in enumerate(POLICIES):
+        policies[name] = {
+            'annual_loss': _dist(loss[i]), 'cleanup_cost': _dist(cost[i]), 'total_cost': _dist(total[i]),
+            'cleanups_mean': float(cleanups[i].mean()),
+        }
+    best = min(policies, key=lambda k: policies[k]['total_cost']['mean'])
+    return {
+        'params': p, 'policies': policies, 'best_policy': best,
+        'waste_model': {'slope_ton_per_mm': inputs['waste_slope'], 'intercept_ton': inputs['waste_intercept']},
+        'seconds': round(time.perf_counter() - t0, 3),
+    }
+
+
+def _result_key(params):
+    return (_input_key(), tuple(sorted(normalize_params(params).items())))
+
+
+def cached_result(params=None):
+    """캐시에 있는 결과 (없으면 None, 계산하지 않음)"""
+    return _RESULTS.get(_result_key(params or {}))
+
+
+def cached_simulate(params=None, max_workers=1):
+    """같은 입력 + 파라미터(시드 포함) 결과는 메모리 LRU 에서 바로 (API 용)"""
+    params = params or {}
+    key = _result_key(params)
+    if key in _RESULTS:
+        _RESULTS.move_to_end(key)
+        return _RESULTS[key]
+    result = simulate(max_workers=max_workers, **params)
+    _RESULTS[key] = result
+    while len(_RESULTS) > RESULT_CACHE_SIZE:
+        _RESULTS.popitem(last=False)
+    return result
+
+
+if __name__ == '__main__':
+    # 시나리오 chunk 를 프로세스 풀로 병렬 계산 (python src/monte_carlo.py [시나리오 수])
+    import sys
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N_SCENARIOS
+    res = simulate(scenarios=n)
+    print(f"=== 🎲 수거 정책 몬테카를로 ({n:,}개 합성 연도, {res['seconds']:.1f}초) ===")
+    for name, r in res['policies'].items():
+        print(f"[{name}] 손실 {r['annual_loss']['mean'] / 1e8:,.2f}억 + 수거 {r['cleanup_cost']['mean'] / 1e8:,.2f}억"
+              f" (연 {r['cleanups_mean']:.1f}회) = {r['total_cost']['mean'] / 1e8:,.2f}억"
+              f" [p5 {r['total_cost']['p5'] / 1e8:,.2f} ~ p95 {r['total_cost']['p95'] / 1e8:,.2f}]")
+    print(f"✅ 기대 총비용이 가장 낮은 정책: {res['best_policy']}")
@@ -0,0 +1,225 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from model_pipeline import MODEL_PATH, load_exported
+
+# 효율 예측 서비스 (00_randomforest.py 가 내보낸 모델을 앱 시작 시 한 번만 로드)
+# - 입력은 낙차(head), 강수량(rain), 쓰레기양(waste). 빠진 값은 학습 데이터 중앙값으로 채움
+# - 입력을 양자화(낙차 head_step m 단위 등)한 키로 결과를 LRU 메모이즈
+# - 동시에 들어온 단건 요청은 배치 쓰레드가 max_wait 동안 모아서 model.predict 한 번으로 처리
+# - 실시간 센서 값은 score_reading() 으로 예상 효율/출력을 붙여서 대시보드에 전달
+#   (수집 쓰레드에서 불리므로 기다리지 않음: 캐시에 없는 낙차는 배치 쓰레드에 예측만 맡기고 이번 값은 예측 없이)
+
+HEAD_STEP = 0.1         # m
+RAIN_STEP = 0.1         # mm
+WASTE_STEP = 1.0
+
+# 모델 특성 이름 -> API 입력 이름
+INPUT_KEYS = {'낙차': 'head', 'rain_avg': 'rain', 'waste_sum': 'waste'}
+STEPS = {'낙차': HEAD_STEP, 'rain_avg': RAIN_STEP, 'waste_sum': WASTE_STEP}
+
+
+class EfficiencyPredictor:
+    def __init__(self, model, features, defaults=None, max_batch=64, max_wait=0.002, cache_size=4096):
+        self.model = model
+        # 한두 행짜리 예측은 쓰레드 분배 비용이 더 크므로 1코어
+        if hasattr(model, 'n_jobs'):
+            model.n_jobs = 1
+        self.features = list(features)
+        self.defaults = {f: (defaults or {}).get(f, 0.0) for f in self.features}
+        self.steps = np.array([STEPS.get(f, 1.0) for f in self.features])
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = set()       # predict_nowait 로 맡겨 두고 아직 결과가 없는 키
+        self._thread = None
+        self.live = None
+        self.stats = {'requests': 0, 'rows': 0, 'cache_hits': 0, 'predict_calls': 0,
+                      'predicted_rows': 0, 'batches': 0, 'max_batch_seen': 0, 'live_misses': 0, 'live_errors': 0}
+
+    @classmethod
+    def load(cls, path=MODEL_PATH, **kwargs):
+        result = load_exported(path)
+        return cls(result['model'], result['features'], result.get('feature_medians'), **kwargs)
+
+    # --- 입력 정리 ---
+    def _matrix(self, rows):
+        """[{'head': .., 'rain': .., 'waste': ..}, ...] -> (n, 특성 수) 배열"""
+        out = np.empty((len(rows), len(self.features)))
+        for j, f in enumerate(self.features):
+            key, default = INPUT_KEYS.get(f, f), self.defaults[f]
+            for i, r in enumerate(rows):
+                v = r.get(key, r.get(f))
+                out[i, j] = default if v is None else float(v)
+        return out
+
+    def _keys(self, X):
+        # 양자화한 정수 격자 좌표가 메모이즈 키
+        return [tuple(k) for k in np.rint(X / self.steps).astype(np.int64).tolist()]
+
+    # --- 예측 ---
+    def _predict_keys(self, keys):
+        """키 목록 -> 효율 배열. 캐시에 없는 키만 모아서 predict 한 번"""
+        values = [None] * len(keys)
+        missing = {}
+        with self._cache_lock:
+            for i, k in enumerate(keys):
+                v = self._cache.get(k)
+                if v is None:
+                    missing.setdefault(k, []).append(i)
+                else:
+                    self._cache.move_to_end(k)
+                    values[i] = v
+            self.stats['cache_hits'] += len(keys) - sum(len(ix) for ix in missing.values())
+
+        if missing:
+            miss_keys = list(missing)
+            X = pd.DataFrame(np.array(miss_keys, dtype=np.float64) * self.steps, columns=self.features)
+            pred = self.model.predict(X).tolist()
+            with self._cache_lock:
+                self.stats['predict_calls'] += 1
+                self.stats['predicted_rows'] += len(miss_keys)
+                for k, v in zip(miss_keys, pred):
+                    self._cache[k] = v
+                    for i in missing[k]:
+                        values[i] = v
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return np.array(values, dtype=np.float64)
+
+    def _results(self, X, eff):
+        head = X[:, self.features.index('낙차')] if '낙차' in self.features else np.full(len(X), np.nan)
+        return [{'efficiency': round(e, 3), 'expected_kwh': round(e * h, 1), 'head': h}
+                for e, h in zip(eff.tolist(), head.tolist())]
+
+    def predict_batch(self, rows):
+        """여러 행을 한 번에 (캐시 미스만 predict 한 번)"""
+        X = self._matrix(rows)
+        with self._cache_lock:
+            self.stats['requests'] += 1
+            self.stats['rows'] += len(rows)
+        return self._results(X, self._predict_keys(self._keys(X)))
+
+    def predict_one(self, row, timeout=5.0):
+        """단건 요청: 캐시에 있으면 바로, 없으면 배치 쓰레드에 넘겨서 다른 요청과 함께 예측
+        (배치 쓰레드가 timeout 안에 처리하지 못하면 TimeoutError)"""
+        X = self._matrix([row])
+        key = self._keys(X)[0]
+        with self._cache_lock:
+            self.stats['requests'] += 1
+            self.stats['rows'] += 1
+            eff = self._cache.get(key)
+            if eff is not None:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+        if eff is None:
+            self.start()
+            fut = Future()
+            self._queue.put((key, fut))
+            eff = fut.result(timeout)
+        return self._results(X, np.array([eff]))[0]
+
+    def predict_nowait(self, row):
+        """캐시에 있으면 결과, 없으면 배치 쓰레드에 예측을 맡기고 바로 None (같은 키는 한 번만 맡김)"""
+        X = self._matrix([row])
+        key = self._keys(X)[0]
+        with self._cache_lock:
+            self.stats['requests'] += 1
+            self.stats['rows'] += 1
+            eff = self._cache.get(key)
+            if eff is not None:
+                self._cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+                return self._results(X, np.array([eff]))[0]
+            self.stats['live_misses'] += 1
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        self.start()
+        fut = Future()
+        fut.add_done_callback(lambda f: self._nowait_done(key, f))
+        self._queue.put((key, fut))
+        return None
+
+    def _nowait_done(self, key, fut):
+        # 결과는 배치 쓰레드가 이미 캐시에 넣었으므로 대기 목록에서만 뺌
+        with self._cache_lock:
+            self._pending.discard(key)
+            if fut.exception() is not None:
+                self.stats['live_errors'] += 1
+        if fut.exception() is not None:
+            print(f"⚠️ [주의] 실시간 예측 실패: {fut.exception()}")
+
+    # --- 마이크로 배치 쓰레드 ---
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                eff = self._predict_keys([k for k, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            with self._cache_lock:
+                self.stats['batches'] += 1
+                self.stats['max_batch_seen'] = max(self.stats['max_batch_seen'], len(batch))
+            for (_, fut), v in zip(batch, eff.tolist()):
+                fut.set_result(v)
+
+    def start(self):
+        if self._thread is None:
+            with self._cache_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+        return self
+
+    # --- 실시간 센서 ---
+    def score_reading(self, snap):
+        """센서 스냅샷에 예상 효율/출력을 붙인 dict 반환 (수집 쓰레드를 막지 않도록 기다리지 않음).
+        센서에는 낙차만 있으므로 강수량/쓰레기양(월 단위 특성)은 학습 데이터 중앙값 사용.
+        처음 보는 낙차 구간이면 예측을 맡겨 두고 스냅샷을 그대로 반환 (다음 측정값부터 캐시에서)"""
+        pred = self.predict_nowait({'head': snap['head']})
+        if pred is None:
+            return snap
+        # expected_kwh 는 시간 단위 발전량 -> 시간당 MWh
+        scored = dict(snap, expected_eff=pred['efficiency'],
+                      expected_mwh=round(pred['expected_kwh'] / 1000, 3))
+        self.live = scored
+        return scored
+
+    def get_stats(self):
+        with self._cache_lock:
+            stats = dict(self.stats)
+            stats['cache_size'] = len(self._cache)
+            stats['live_pending'] = len(self._pending)
+        stats['queue'] = self._queue.qsize()
+        stats['features'] = self.features
+        return stats
+
+
+def load_predictor(path=MODEL_PATH, **kwargs):
+    """저장된 모델이 없으면 None (먼저 python src/00_randomforest.py 실행)"""
+    if not os.path.exists(path):
+        return None
+    return EfficiencyPredictor.load(path, **kwargs)
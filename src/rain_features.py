@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+# 강우 패턴 특성 계산 (02_pattern.py 의 groupby 여러 번 + 월별 np.percentile apply 대체)
+# - (관측소, 기간, 강수량) 으로 한 번 정렬한 배열 위에서 구간(segment) 단위 reduce 로 모든 지표를 계산
+#   rain_sum / rain_peak / heavy_hours : np.add.reduceat, np.maximum.reduceat
+#   top10_ratio : 구간 안이 이미 정렬돼 있으므로 백분위수는 위치 계산 + 선형 보간 (np.percentile 과 같은 값)
+# - 기간은 일(D) / 주(W, 월요일 시작) / 월(M), 또는 이동 창('72h' 처럼 시간 수)
+# - station_col 을 주면 여러 관측소를 한 번에 계산 (Python 반복문 없음)
+
+TIME_COL = '일시'
+RAIN_COL = '평균강수량(mm)'
+HEAVY_MM = 10.0         # 집중 강우 기준 (mm/h)
+TOP_PCT = 90            # 상위 10% 집중도
+
+METRICS = ['rain_sum', 'rain_peak', 'heavy_hours', 'top10_ratio']
+
+
+def period_start(ts, freq):
+    """datetime64 배열 -> 각 시각이 속한 기간의 시작 시각 (D / W / M)"""
+    ts = np.asarray(ts, dtype='datetime64[ns]')
+    if freq == 'D':
+        return ts.astype('datetime64[D]')
+    if freq == 'W':
+        days = ts.astype('datetime64[D]').astype(np.int64)
+        # 1970-01-01 은 목요일 -> 월요일 시작 주로 내림
+        return (days - (days + 3) % 7).astype('datetime64[D]')
+    if freq == 'M':
+        return ts.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"freq 는 D, W, M 또는 '72h' 형식이어야 합니다: {freq}")
+
+
+def _lerp(a, b, t):
+    # np.percentile(method='linear') 와 같은 보간식 (t >= 0.5 이면 b 쪽에서 계산)
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+
+def segment_features(values, keys, heavy_mm=HEAVY_MM, top_pct=TOP_PCT):
+    """keys(정수 배열 여러 개, 앞쪽이 우선) 가 같은 행끼리 묶어서 지표 계산.
+    반환: (구간 대표 행 인덱스(정렬 후 순서), 지표 dict)"""
+    values = np.asarray(values, dtype=np.float64)
+    order = np.lexsort((values, *reversed(keys)))
+    v = values[order]
+    k = [np.asarray(key)[order] for key in keys]
+
+    change = np.zeros(len(v), dtype=bool)
+    change[0] = True
+    for key in k:
+        change[1:] |= key[1:] != key[:-1]
+    starts = np.flatnonzero(change)
+    counts = np.diff(np.append(starts, len(v)))
+
+    rain_sum = np.add.reduceat(v, starts)
+    # 구간 안은 강수량 오름차순 -> 최대값은 마지막 원소
+    rain_peak = v[starts + counts - 1]
+    heavy_hours = np.add.reduceat((v >= heavy_mm).astype(np.int64), starts)
+
+    # 구간별 백분위수: 위치 (n-1)*q 의 앞뒤 원소를 보간
+    pos = (counts - 1) * (top_pct / 100)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, counts - 1)
+    threshold = _lerp(v[starts + lo], v[starts + hi], pos - lo)
+
+    seg = np.repeat(np.arange(len(starts)), counts)
+    top_sum = np.add.reduceat(np.where(v >= threshold[seg], v, 0.0), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        top10_ratio = np.where(rain_sum == 0, 0.0, top_sum / rain_sum)
+
+    return order[starts], {'hours': counts, 'rain_sum': rain_sum, 'rain_peak': rain_peak,
+                           'heavy_hours': heavy_hours, 'top10_ratio': top10_ratio}
+
+
+def _rolling_features(df, hours, time_col, value_col, station_col, heavy_mm, top_pct, chunk_rows=200_000):
+    """각 시각에서 끝나는 hours 시간 이동 창 (관측소 경계를 넘지 않음, 창이 덜 찬 행은 NaN).
+    시간 단위로 빠짐없이 이어진 자료를 가정"""
+    keys = [df[time_col].to_numpy()]
+    if station_col:
+        keys.insert(0, df[station_col].to_numpy())
+    order = np.lexsort(tuple(reversed(keys)))
+    data = df.iloc[order]
+    v = data[value_col].to_numpy(dtype=np.float64)
+    n = len(v)
+
+    # 창 안에 다른 관측소가 섞이면 제외
+    if station_col:
+        codes = pd.factorize(data[station_col])[0]
+        first = np.r_[0, np.flatnonzero(codes[1:] != codes[:-1]) + 1]
+        start_of = np.repeat(first, np.diff(np.r_[first, n]))
+    else:
+        start_of = np.zeros(n, dtype=np.int64)
+    full = np.arange(n) - start_of >= hours - 1
+
+    csum = np.r_[0.0, np.cumsum(v)]
+    cheavy = np.r_[0, np.cumsum(v >= heavy_mm)]
+    idx = np.arange(hours - 1, n)
+    out = {name: np.full(n, np.nan) for name in METRICS}
+    out['rain_sum'][idx] = csum[idx + 1] - csum[idx + 1 - hours]
+    out['heavy_hours'][idx] = cheavy[idx + 1] - cheavy[idx + 1 - hours]
+
+    # 최대값 / 백분위수는 창을 정렬해서 계산 (메모리 때문에 chunk 단위)
+    windows = np.lib.stride_tricks.sliding_window_view(v, hours)
+    pos = (hours - 1) * (top_pct / 100)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, hours - 1)
+    for s in range(0, len(windows), chunk_rows):
+        w = np.sort(windows[s:s + chunk_rows], axis=1)
+        rows = idx[s:s + len(w)]
+        threshold = _lerp(w[:, lo], w[:, hi], pos - lo)
+        total = w.sum(axis=1)
+        top = np.where(w >= threshold[:, None], w, 0.0).sum(axis=1)
+        out['rain_peak'][rows] = w[:, -1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out['top10_ratio'][rows] = np.where(total == 0, 0.0, top / total)
+
+    result = data[[c for c in (station_col, time_col) if c]].reset_index(drop=True)
+    for name in METRICS:
+        col = out[name]
+        col[~full] = np.nan
+        result[name] = col
+    return result
+
+
+def pattern_features(df, freq='M', time_col=TIME_COL, value_col=RAIN_COL, station_col=None,
+                     heavy_mm=HEAVY_MM, top_pct=TOP_PCT):
+    """시간별 강수량 -> 기간(D/W/M) 또는 이동 창('72h') 별 강우 패턴 지표.
+    기간 집계 결과 컬럼: [station_col,] period, hours, rain_sum, rain_peak, heavy_hours, top10_ratio"""
+    if isinstance(freq, str) and freq.lower().endswith('h'):
+        return _rolling_features(df, int(freq[:-1]), time_col, value_col, station_col, heavy_mm, top_pct)
+
+    period = period_start(df[time_col].to_numpy(), freq)
+    keys = [period.astype(np.int64)]
+    if station_col:
+        codes, uniques = pd.factorize(df[station_col], sort=True)
+        keys.insert(0, codes)
+
+    first_rows, feats = segment_features(df[value_col].to_numpy(), keys, heavy_mm, top_pct)
+    result = pd.DataFrame({'period': period[first_rows]})
+    if station_col:
+        result.insert(0, station_col, np.asarray(uniques)[codes[first_rows]])
+    for name in ['hours'] + METRICS:
+        result[name] = feats[name]
+    return result
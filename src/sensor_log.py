@@ -0,0 +1,214 @@
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+# 센서 측정값 영구 저장 (SQLite WAL)
+# - 측정값은 메모리 버퍼에 모았다가 N 행마다 또는 T 초마다 한 트랜잭션으로 기록
+# - 시간 단위 요약(hourly)은 같은 트랜잭션 안에서 UPSERT 로 누적 갱신
+# - device 컬럼이 있어 여러 수문/센서를 한 파일에 기록할 수 있음
+# - readonly=True: serve.py 의 worker 용, 기록은 수집 프로세스 하나만 하고 worker 는 읽기 전용 연결로 조회만
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.normpath(os.path.join(BASE_DIR, "..", "data", "sensor_log.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    device TEXT NOT NULL,
+    ts REAL NOT NULL,
+    sea REAL, lake REAL, head REAL, waste INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings(ts);
+CREATE TABLE IF NOT EXISTS hourly (
+    device TEXT NOT NULL,
+    hour INTEGER NOT NULL,          -- 로컬 시각 기준 epoch 초를 3600 으로 내림
+    n INTEGER NOT NULL,
+    sea_sum REAL, lake_sum REAL, head_sum REAL, waste_sum INTEGER,
+    head_min REAL, head_max REAL, waste_max INTEGER,
+    PRIMARY KEY (device, hour)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    device TEXT PRIMARY KEY,
+    loss_cum INTEGER NOT NULL
+);
+"""
+
+UPSERT_HOURLY = """
+INSERT INTO hourly (device, hour, n, sea_sum, lake_sum, head_sum, waste_sum, head_min, head_max, waste_max)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(device, hour) DO UPDATE SET
+    n = n + excluded.n,
+    sea_sum = sea_sum + excluded.sea_sum,
+    lake_sum = lake_sum + excluded.lake_sum,
+    head_sum = head_sum + excluded.head_sum,
+    waste_sum = waste_sum + excluded.waste_sum,
+    head_min = min(head_min, excluded.head_min),
+    head_max = max(head_max, excluded.head_max),
+    waste_max = max(waste_max, excluded.waste_max)
+"""
+
+UPSERT_COUNTER = """
+INSERT INTO counters (device, loss_cum) VALUES (?, ?)
+ON CONFLICT(device) DO UPDATE SET loss_cum = excluded.loss_cum
+"""
+
+
+def _local_epoch(ts):
+    """UTC epoch 초 -> 로컬 벽시계 기준 epoch 초 (날짜 경계를 로컬 시각으로 맞추기 위함)"""
+    return ts + time.localtime(ts).tm_gmtoff
+
+
+class SensorLog:
+    def __init__(self, path=DB_PATH, flush_rows=500, flush_seconds=5.0, readonly=False):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.readonly = readonly
+        self._conn = self._connect()
+
+        self._lock = threading.Lock()       # 버퍼 보호
+        self._db_lock = threading.Lock()    # 연결 공유 보호
+        self._buffer = []
+        self._loss_cum = {}
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._stop = threading.Event()
+        self.stats = {'rows_written': 0, 'flushes': 0, 'last_flush_ms': 0.0}
+
+    def _connect(self):
+        if self.readonly:
+            # 수집 프로세스가 아직 파일을 만들지 않았으면 None (다음 조회 때 다시 시도)
+            if not os.path.exists(self.path):
+                return None
+            uri = pathlib.Path(os.path.abspath(self.path)).as_uri() + '?mode=ro'
+            return sqlite3.connect(uri, uri=True, check_same_thread=False)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _query(self, sql, params):
+        with self._db_lock:
+            if self._conn is None:
+                self._conn = self._connect()
+                if self._conn is None:
+                    return []
+            try:
+                return self._conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError:
+                if self.readonly:
+                    return []       # 수집 프로세스가 스키마를 만드는 중
+                raise
+
+    # --- 기록 ---
+    def append(self, device, ts, sea, lake, head, waste, loss_cum=None):
+        if self.readonly:
+            raise RuntimeError("읽기 전용 SensorLog 에는 기록할 수 없습니다 (기록은 수집 프로세스에서)")
+        with self._lock:
+            self._buffer.append((device, ts, sea, lake, head, waste))
+            if loss_cum is not None:
+                self._loss_cum[device] = loss_cum
+            full = len(self._buffer) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def listener(self, device='main'):
+        """SerialIngestor.add_listener 에 넘길 콜백"""
+        def on_reading(snap):
+            self.append(device, snap['ts'], snap['sea'], snap['lake'], snap['head'], snap['waste'],
+                        snap.get('loss_cum'))
+        return on_reading
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            counters = list(self._loss_cum.items())
+            self._last_flush = time.monotonic()
+        if not rows and not counters:
+            return 0
+
+        # 시간 단위 요약을 먼저 메모리에서 합친 뒤 시간 버킷당 UPSERT 한 번
+        hourly = {}
+        for device, ts, sea, lake, head, waste in rows:
+            key = (device, int(_local_epoch(ts) // 3600))
+            acc = hourly.get(key)
+            if acc is None:
+                hourly[key] = [1, sea, lake, head, waste, head, head, waste]
+            else:
+                acc[0] += 1
+                acc[1] += sea
+                acc[2] += lake
+                acc[3] += head
+                acc[4] += waste
+                acc[5] = min(acc[5], head)
+                acc[6] = max(acc[6], head)
+                acc[7] = max(acc[7], waste)
+
+        t0 = time.perf_counter()
+        with self._db_lock, self._conn:
+            self._conn.executemany("INSERT INTO readings VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany(UPSERT_HOURLY, [(d, h, *acc) for (d, h), acc in hourly.items()])
+            self._conn.executemany(UPSERT_COUNTER, counters)
+        self.stats['rows_written'] += len(rows)
+        self.stats['flushes'] += 1
+        self.stats['last_flush_ms'] = round((time.perf_counter() - t0) * 1000, 3)
+        return len(rows)
+
+    def start(self):
+        """flush_seconds 마다 남은 버퍼를 기록하는 쓰레드"""
+        if self._thread is None and not self.readonly:
+            def loop():
+                while not self._stop.wait(self.flush_seconds / 2):
+                    if time.monotonic() - self._last_flush >= self.flush_seconds:
+                        self.flush()
+            self._thread = threading.Thread(target=loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+
+    # --- 조회 ---
+    def loss_cum(self, device='main'):
+        rows = self._query("SELECT loss_cum FROM counters WHERE device = ?", (device,))
+        return rows[0][0] if rows else 0
+
+    def _day_range(self, date_str):
+        start = time.mktime(time.strptime(date_str, '%Y-%m-%d'))
+        return start, start + 86400
+
+    def day(self, date_str, device='main'):
+        """해당 날짜(로컬)의 원본 측정값"""
+        start, end = self._day_range(date_str)
+        rows = self._query(
+            "SELECT ts, sea, lake, head, waste FROM readings WHERE device = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (device, start, end))
+        return {
+            'times': [time.strftime('%H:%M:%S', time.localtime(r[0])) for r in rows],
+            'sea': [r[1] for r in rows], 'lake': [r[2] for r in rows],
+            'head': [r[3] for r in rows], 'waste': [r[4] for r in rows],
+        }
+
+    def hourly(self, date_str, device='main'):
+        """해당 날짜(로컬)의 시간 단위 요약 (평균/최소/최대)"""
+        start, end = self._day_range(date_str)
+        first = int(_local_epoch(start) // 3600)
+        rows = self._query(
+            "SELECT hour, n, sea_sum, lake_sum, head_sum, waste_sum, head_min, head_max, waste_max "
+            "FROM hourly WHERE device = ? AND hour >= ? AND hour < ? ORDER BY hour",
+            (device, first, first + 24))
+        return {
+            'times': [f"{r[0] - first:02d}:00" for r in rows],
+            'n': [r[1] for r in rows],
+            'sea': [r[2] / r[1] for r in rows], 'lake': [r[3] / r[1] for r in rows],
+            'head': [r[4] / r[1] for r in rows], 'waste': [r[5] / r[1] for r in rows],
+            'head_min': [r[6] for r in rows], 'head_max': [r[7] for r in rows],
+            'waste_max': [r[8] for r in rows],
+        }
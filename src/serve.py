@@ -0,0 +1,160 @@
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import threading
+
+# 운영 실행 모드: 수집 프로세스 1개 + WSGI worker 프로세스 N개
+# - 수집 프로세스: 시리얼 장치를 읽어서 SQLite(sensor_log) 에 기록하고, 장치별 공유 링버퍼(shared_ring)에 씀
+#   K-water 조위 API 도 여기서만 호출해 공유 파일(shared_ring.tide_path)에 씀
+# - worker: create_app() 을 SIHWA_SENSOR_SOURCE=shared 로 띄워 링버퍼, 센서 로그(읽기 전용), 조위 공유 파일,
+#   과거 데이터(.npy memory-map)를 읽기만 함
+#   (과거 데이터 .npy 캐시는 worker 를 띄우기 전에 여기서 한 번 만들어 둠)
+# - Linux/macOS 는 gunicorn(gthread worker), gunicorn 을 쓸 수 없는 Windows 는 같은 구성으로 단일 프로세스 쓰레드 서버
+#
+#   python serve.py --workers 4 --threads 8 --bind 0.0.0.0:5000
+
+HEARTBEAT_SECONDS = 1.0
+
+
+def run_collector(stop):
+    """수집 프로세스 본체: 장치 읽기 + SQLite 기록 + 공유 링버퍼 기록 + 조위 갱신 (stop 이 set 될 때까지)"""
+    from app import KWATER_SERVICE_KEY, KWATER_URL, default_config
+    from device_manager import DeviceManager, load_device_config
+    from sensor_log import DB_PATH, SensorLog
+    from shared_ring import SensorRingWriter, ring_path, tide_path
+    from tide_feed import TideFeed
+
+    sensor_log = SensorLog(os.environ.get('SIHWA_SENSOR_DB', DB_PATH), flush_rows=500, flush_seconds=5.0).start()
+    device_config = load_device_config('COM3')
+    for cfg in device_config:
+        cfg.setdefault('loss_cum', sensor_log.loss_cum(cfg['id']))
+    devices = DeviceManager(device_config, history_hours=24)
+    writers = {}
+    for dev_id, dev in devices.devices.items():
+        writers[dev_id] = SensorRingWriter(ring_path(dev_id), history_hours=24)
+        dev.add_listener(sensor_log.listener(dev_id))
+        dev.add_listener(writers[dev_id].append)
+    devices.start()
+    tide_feed = TideFeed(KWATER_URL, KWATER_SERVICE_KEY, ttl=300, stale_ttl=3600, share_path=tide_path())
+    if default_config()['START_TIDE_FEED']:
+        tide_feed.start()
+    print(f"✅ [성공] 수집 프로세스 시작 (장치: {', '.join(writers)}, pid {os.getpid()})")
+
+    try:
+        # worker 들은 heartbeat 로 수집기가 살아있는지 판단
+        while not stop.wait(HEARTBEAT_SECONDS):
+            stats = devices.get_stats()
+            for dev_id, writer in writers.items():
+                writer.heartbeat(stats[dev_id]['connected'])
+    finally:
+        devices.stop()
+        tide_feed.stop()
+        sensor_log.close()
+        for writer in writers.values():
+            writer.close()
+
+
+def collector_main():
+    # SIGTERM / Ctrl+C 를 받으면 남은 버퍼를 기록하고 종료
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    run_collector(stop)
+
+
+def start_collector():
+    # multiprocessing 대신 별도 인터프리터로 실행 (gunicorn 이 fork 한 worker 에 Process 객체가 섞이지 않도록)
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), '--collector'])
+
+
+def prepare_history():
+    """worker 들이 memory-map 할 과거 데이터 .npy 캐시를 미리 만들어 둠 (worker 마다 CSV 를 파싱하지 않도록)"""
+    from app import default_config
+    from history_store import HistoryStore
+
+    path = default_config()['HISTORY_CSV']
+    if os.path.exists(path):
+        store = HistoryStore.from_csv_cached(path, encoding="cp949")
+        print(f"✅ [성공] 과거 데이터 공유 캐시 준비 ({len(store)} 행)")
+    else:
+        print(f"⚠️ [주의] 과거 CSV 가 없어 공유 캐시를 만들지 않습니다: {path}")
+
+
+def _has_gunicorn():
+    if sys.platform == 'win32':
+        return False
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_gunicorn(args):
+    from gunicorn.app.base import BaseApplication
+
+    class SihwaServer(BaseApplication):
+        def load_config(self):
+            options = {'bind': args.bind, 'workers': args.workers, 'threads': args.threads,
+                       'worker_class': 'gthread', 'timeout': args.timeout, 'accesslog': args.accesslog}
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # worker 프로세스마다 따로 초기화 (preload 하지 않음 -> 쓰레드를 fork 하지 않음)
+            from app import create_app
+            return create_app()
+
+    SihwaServer().run()
+
+
+def run_threaded(args):
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    host, port = args.bind.rsplit(':', 1)
+    print("⚠️ [주의] gunicorn 을 쓸 수 없어 단일 프로세스 쓰레드 서버로 실행합니다")
+    make_server(host, int(port), create_app(), threaded=True).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시화 대시보드 운영 서버 (수집 프로세스 + WSGI worker)")
+    parser.add_argument('--bind', default='127.0.0.1:5000')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=8, help="worker 당 쓰레드 수 (SSE 연결도 하나씩 차지)")
+    parser.add_argument('--timeout', type=int, default=30)
+    parser.add_argument('--accesslog', default=None, help="'-' 이면 표준출력")
+    parser.add_argument('--no-collector', action='store_true', help="수집 프로세스를 띄우지 않음 (다른 곳에서 실행 중일 때)")
+    parser.add_argument('--collector', action='store_true', help="수집 프로세스만 실행 (serve.py 가 내부적으로 사용)")
+    args = parser.parse_args()
+    if args.collector:
+        collector_main()
+        return
+
+    # worker 들이 물려받는 설정: 센서는 공유 링버퍼에서 읽음
+    os.environ['SIHWA_SENSOR_SOURCE'] = 'shared'
+    prepare_history()
+    collector = None if args.no_collector else start_collector()
+    master_pid = os.getpid()
+
+    try:
+        if _has_gunicorn():
+            run_gunicorn(args)
+        else:
+            run_threaded(args)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # gunicorn 이 fork 한 worker 도 여기를 지나가므로 수집 프로세스 정리는 처음 프로세스에서만
+        if collector is not None and os.getpid() == master_pid:
+            collector.terminate()
+            try:
+                collector.wait(10)
+            except subprocess.TimeoutExpired:
+                collector.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+import mmap
+import os
+import threading
+import time
+
+import numpy as np
+
+from ingest import ERROR_LOG_EVERY, FIELDS, SENSOR_HZ
+
+# 여러 웹 worker 프로세스가 공유하는 센서 링버퍼 (memory-mapped 파일)
+# - 시리얼을 읽는 수집 프로세스(serve.py) 하나만 쓰고, worker 들은 같은 파일을 mmap 해서 읽기만 함
+#   (multiprocessing.shared_memory 와 달리 Windows 에서도 같고, 수집기가 재시작돼도 이어서 쓸 수 있음)
+# - 헤더의 seq 로 seqlock: 쓰기 전 seq 를 홀수로, 다 쓰면 짝수로 -> 읽는 쪽은 seq 가 짝수이고 읽는 동안
+#   바뀌지 않았을 때만 값을 씀 (락 없음, 쓰는 쪽이 여러 프로세스의 읽기를 기다리지 않음)
+# - 장치마다 파일 하나: data/.cache/shared/sensor_<id>.ring
+# - 리스너(SSE, 예측, 이벤트 엔진) 하나가 예외를 내도 폴링 쓰레드는 계속 (ingest.SerialIngestor 와 같은 방식)
+
+SHARED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", ".cache", "shared"))
+
+RING_FIELDS = FIELDS + ('loss_cum',)
+MAGIC = int.from_bytes(b'SIHWARNG', 'little')
+RING_VERSION = 1
+HEADER_SLOTS = 8
+# 헤더 (uint64 8칸): magic, version, 필드 수, capacity, seq, 누적 기록 수, heartbeat(float64), 장치 연결 여부
+H_MAGIC, H_VERSION, H_FIELDS, H_CAPACITY, H_SEQ, H_COUNT, H_HEARTBEAT, H_CONNECTED = range(HEADER_SLOTS)
+HEARTBEAT_TIMEOUT = 5.0     # 이보다 오래 heartbeat 가 없으면 수집기가 멈춘 것으로 봄
+
+
+def ring_path(device_id, directory=SHARED_DIR):
+    return os.path.join(directory, f"sensor_{device_id}.ring")
+
+
+def tide_path(directory=SHARED_DIR):
+    """수집 프로세스가 받아 둔 조위 API 응답 (tide_feed.SharedTideFeed 가 읽음)"""
+    return os.path.join(directory, "tide.json")
+
+def _views(buf, n_fields, capacity):
+    header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=buf)
+    heartbeat = np.ndarray((1,), dtype=np.float64, buffer=buf, offset=H_HEARTBEAT * 8)
+    data = np.ndarray((capacity, n_fields), dtype=np.float64, buffer=buf, offset=HEADER_SLOTS * 8)
+    return header, heartbeat, data
+
+
+class SensorRingWriter:
+    """수집 프로세스 쪽: SerialIngestor.add_listener 에 append 를 넘겨서 측정값마다 기록"""
+
+    def __init__(self, path, history_hours=24):
+        self.path = path
+        self.capacity = int(history_hours * 3600 * SENSOR_HZ)
+        size = (HEADER_SLOTS + self.capacity * len(RING_FIELDS)) * 8
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        if not self._compatible(path, size):
+            # 새 파일은 임시 이름으로 만든 뒤 교체 (이미 열어 둔 worker 는 inode 가 바뀐 것을 보고 다시 엶)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.truncate(size)
+            with open(tmp, 'r+b') as f, mmap.mmap(f.fileno(), size) as buf:
+                header, _, _ = _views(buf, len(RING_FIELDS), self.capacity)
+                header[[H_MAGIC, H_VERSION, H_FIELDS, H_CAPACITY]] = [MAGIC, RING_VERSION, len(RING_FIELDS), self.capacity]
+                del header
+            os.replace(tmp, path)
+
+        self._file = open(path, 'r+b')
+        self._buf = mmap.mmap(self._file.fileno(), size)
+        self.header, self.heartbeat_slot, self.data = _views(self._buf, len(RING_FIELDS), self.capacity)
+
+    def _compatible(self, path, size):
+        """같은 형식의 파일이 있으면 이어서 씀 (수집기 재시작 시 최근 기록 유지)"""
+        if not os.path.exists(path) or os.path.getsize(path) != size:
+            return False
+        header = np.fromfile(path, dtype=np.uint64, count=HEADER_SLOTS)
+        return (int(header[H_MAGIC]) == MAGIC and int(header[H_VERSION]) == RING_VERSION
+                and int(header[H_FIELDS]) == len(RING_FIELDS) and int(header[H_CAPACITY]) == self.capacity
+                and int(header[H_SEQ]) % 2 == 0)
+
+    def append(self, snap):
+        row = [snap.get(name) or 0.0 for name in RING_FIELDS]
+        count = int(self.header[H_COUNT])
+        self.header[H_SEQ] += 1                     # 홀수: 쓰는 중
+        self.data[count % self.capacity] = row
+        self.header[H_COUNT] = count + 1
+        self.header[H_SEQ] += 1                     # 짝수: 다 씀
+
+    def heartbeat(self, connected):
+        self.heartbeat_slot[0] = time.time()
+        self.header[H_CONNECTED] = int(bool(connected))
+
+    def close(self):
+        del self.header, self.heartbeat_slot, self.data
+        self._buf.close()
+        self._file.close()
+
+
+class SensorRingReader:
+    """worker 쪽: 파일을 읽기 전용으로 mmap (수집기가 아직 안 떴으면 나중에 다시 시도)"""
+
+    def __init__(self, path, retries=1000):
+        self.path = path
+        self.retries = retries
+        self._buf = None
+        self._ino = None
+        self.generation = 0         # 파일을 (다시) 열 때마다 증가
+        self.header = self.heartbeat_slot = self.data = None
+        self.capacity = 0
+
+    def _open(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if self._buf is not None and (st.st_ino, st.st_dev) == self._ino:
+            return True
+        with open(self.path, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.uint64, buffer=buf)
+        if int(header[H_MAGIC]) != MAGIC or int(header[H_VERSION]) != RING_VERSION:
+            del header
+            buf.close()
+            return False
+        fields, self.capacity = int(header[H_FIELDS]), int(header[H_CAPACITY])
+        del header
+        old = self._buf
+        self.header, self.heartbeat_slot, self.data = _views(buf, fields, self.capacity)
+        self._buf, self._ino = buf, (st.st_ino, st.st_dev)
+        self.generation += 1
+        if old is not None:
+            # 교체된 파일의 mmap 해제 (다른 쓰레드가 아직 그 view 로 읽는 중이면 BufferError -> GC 에 맡김)
+            try:
+                old.close()
+            except BufferError:
+                pass
+        return True
+
+    def reopen_if_replaced(self):
+        return self._open()
+
+    def _consistent(self, fn):
+        """seqlock 읽기: seq 가 짝수이고 fn 실행 전후로 같을 때의 결과"""
+        if self._buf is None and not self._open():
+            return None
+        for _ in range(self.retries):
+            seq = int(self.header[H_SEQ])
+            if seq % 2 == 0:
+                result = fn(int(self.header[H_COUNT]))
+                if int(self.header[H_SEQ]) == seq:
+                    return result
+            time.sleep(0)
+        return None
+
+    def _rows(self, start, stop):
+        """누적 번호 [start, stop) 행 복사본 (링에 남아있는 것만)"""
+        start = max(start, stop - self.capacity)
+        if start >= stop:
+            return np.empty((0, len(RING_FIELDS)))
+        lo, hi = start % self.capacity, stop % self.capacity
+        if lo < hi:
+            return self.data[lo:hi].copy()
+        return np.concatenate([self.data[lo:], self.data[:hi]])
+
+    def count(self):
+        return self._consistent(lambda count: count) or 0
+
+    def latest(self):
+        return self._consistent(lambda count: self.data[(count - 1) % self.capacity].copy() if count else None)
+
+    def rows_after(self, seen):
+        """seen 번째 이후 새로 들어온 행과 지금까지의 누적 수"""
+        result = self._consistent(lambda count: (self._rows(seen, count), count))
+        return result if result is not None else (np.empty((0, len(RING_FIELDS))), seen)
+
+    def since(self, ts):
+        rows = self._consistent(lambda count: self._rows(0, count))
+        if rows is None:
+            return np.empty((0, len(RING_FIELDS)))
+        return rows[np.searchsorted(rows[:, 0], ts, side='left'):]
+
+    def collector_state(self):
+        if self._buf is None and not self._open():
+            return {'connected': False, 'heartbeat_age': None}
+        age = time.time() - float(self.heartbeat_slot[0]) if self.heartbeat_slot[0] > 0 else None
+        alive = age is not None and age < HEARTBEAT_TIMEOUT
+        return {'connected': alive and bool(self.header[H_CONNECTED]),
+                'heartbeat_age': None if age is None else round(age, 3)}
+
+
+def _snapshot(row):
+    snap = dict(zip(RING_FIELDS, row.tolist()))
+    snap['waste'], snap['loss_cum'] = int(snap['waste']), int(snap['loss_cum'])
+    return snap
+
+
+class SharedSensorFeed:
+    """SerialIngestor 와 같은 조회 인터페이스 (snapshot / history / get_stats / add_listener), 값은 공유 링에서"""
+
+    def __init__(self, path):
+        self.port = path
+        self.reader = SensorRingReader(path)
+        self._listeners = []
+        self._seen = None
+        self._generation = None
+        self.counters = {'lines': 0, 'listener_errors': 0}
+
+    def add_listener(self, fn):
+        """새 측정값마다 fn(snapshot) 호출 (SharedDevices 의 폴링 쓰레드에서 실행됨)"""
+        self._listeners.append(fn)
+
+    def poll_once(self):
+        if self._seen is None or self._generation != self.reader.generation:
+            # 처음(또는 링 파일이 바뀐 직후)에는 이미 있던 기록을 다시 알리지 않음
+            self._seen = self.reader.count()
+            self._generation = self.reader.generation
+            return 0
+        rows, self._seen = self.reader.rows_after(self._seen)
+        self.counters['lines'] += len(rows)
+        for row in rows:
+            snap = _snapshot(row)
+            for fn in self._listeners:
+                try:
+                    fn(snap)
+                except Exception as e:
+                    self._listener_failed(fn, e)
+        return len(rows)
+
+    def _listener_failed(self, fn, error):
+        self.counters['listener_errors'] += 1
+        count = self.counters['listener_errors']
+        if count == 1 or count % ERROR_LOG_EVERY == 0:
+            name = getattr(fn, '__qualname__', repr(fn))
+            print(f"⚠️ [주의] 측정값 리스너 오류 ({name}, 누적 {count}건), 폴링은 계속: {error!r}")
+
+    def snapshot(self):
+        row = self.reader.latest()
+        if row is None:
+            return {"sea": 0.0, "lake": 0.0, "head": 0.0, "waste": 0, "loss_cum": 0, "ts": None}
+        return _snapshot(row)
+
+    def history(self, seconds=None):
+        rows = self.reader.since(-np.inf if seconds is None else time.time() - seconds)
+        return {name: rows[:, i].tolist() for i, name in enumerate(FIELDS)}
+
+    def get_stats(self):
+        count = self.reader.count()
+        latest = self.reader.latest()
+        stats = dict(self.counters)
+        stats.update(self.reader.collector_state())
+        stats['buffered_rows'] = min(count, self.reader.capacity)
+        stats['capacity'] = self.reader.capacity
+        stats['last_ts'] = None if latest is None else float(latest[0])
+        stats['total_rows'] = count
+        return stats
+
+
+class SharedDevices:
+    """DeviceManager 와 같은 조회 인터페이스, 장치마다 SharedSensorFeed 하나 + 폴링 쓰레드 하나"""
+
+    def __init__(self, device_ids, directory=SHARED_DIR, poll_interval=0.05):
+        self.poll_interval = poll_interval
+        self.devices = {dev_id: SharedSensorFeed(ring_path(dev_id, directory)) for dev_id in device_ids}
+        self._thread = None
+        self._stop = threading.Event()
+        self._loop_errors = 0
+
+    def __getitem__(self, dev_id):
+        return self.devices[dev_id]
+
+    def __contains__(self, dev_id):
+        return dev_id in self.devices
+
+    def primary(self):
+        return next(iter(self.devices.values()))
+
+    def poll_once(self, last_check=0.0):
+        now = time.monotonic()
+        if now - last_check >= 1.0:
+            # 수집기가 링 파일을 새로 만들었으면 다시 mmap
+            for feed in self.devices.values():
+                feed.reader.reopen_if_replaced()
+            last_check = now
+        for feed in self.devices.values():
+            feed.poll_once()
+        return last_check
+
+    def run(self):
+        last_check = 0.0
+        while not self._stop.wait(self.poll_interval):
+            try:
+                last_check = self.poll_once(last_check)
+            except Exception as e:
+                # 링 파일 교체 중 읽기 등 예상 못 한 오류: 다음 주기에 다시
+                self._loop_errors += 1
+                if self._loop_errors == 1 or self._loop_errors % ERROR_LOG_EVERY == 0:
+                    print(f"❌ [오류] 공유 링 폴링 예외 (누적 {self._loop_errors}건), 계속 진행: {e!r}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='shared-ring', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self):
+        result = {}
+        for dev_id, feed in self.devices.items():
+            stats = feed.get_stats()
+            stats['port'] = feed.port
+            stats['mode'] = 'shared'
+            result[dev_id] = stats
+        return result
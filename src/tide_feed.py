@@ -0,0 +1,285 @@
+import json
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import REGISTRY
+
+UPSTREAM_SECONDS = REGISTRY.histogram('sihwa_upstream_seconds', "K-water 조위 API 호출 시간", ('outcome',))
+
+# API 실패 + 캐시도 없을 때 내려주는 샘플 데이터
+FALLBACK_DATA = {
+    'sea': [3.1, 3.5, 4.2, 3.8, 2.5, 1.1, -0.5, -1.5, -2.0, -1.8, -0.5, 1.2],
+    'lake': [-1.2, -1.3, -1.5, -1.7, -1.9, -2.0, -1.8, -1.5, -1.2, -1.0, -0.8, -0.5],
+    'times': ["00:00", "02:00", "04:00", "06:00", "08:00", "10:00", "12:00", "14:00", "16:00", "18:00", "20:00", "22:00"]
+}
+
+
+def parse_tide_xml(content):
+    """sihwaequiplist XML 응답을 {'sea', 'lake', 'times'} 로 변환 (값이 없으면 None)"""
+    root = ET.fromstring(content)
+    sea_list, lake_list, time_list = [], [], []
+
+    for item in root.findall('.//item'):
+        s = item.findtext('seaRwl')
+        l = item.findtext('lakeRwl')
+        t = item.findtext('obsdt')
+        if s and l:
+            sea_list.append(float(s))
+            lake_list.append(float(l))
+            time_list.append(t[-5:] if t else "")
+
+    if not sea_list:
+        return None
+
+    # 그래프 방향 정렬 (과거 -> 현재)
+    sea_list.reverse()
+    lake_list.reverse()
+    time_list.reverse()
+    return {'sea': sea_list, 'lake': lake_list, 'times': time_list}
+
+
+class TideFeed:
+    """K-water 조위 API 캐시
+
+    - ttl 이내: 캐시 그대로 반환 (hit)
+    - ttl ~ stale_ttl: 캐시를 즉시 반환하고 뒤에서 갱신 (stale-while-revalidate)
+    - 그 이후/캐시 없음: 업스트림 호출 (miss). 동시에 들어온 miss 는 한 번의 호출로 합친다.
+    """
+
+    def __init__(self, url, service_key, ttl=300, stale_ttl=3600, error_ttl=30,
+                 timeout=5, pool_size=4, share_path=None):
+        self.url = url
+        self.service_key = service_key
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        # serve.py 수집 프로세스: 받은 값을 이 파일에도 써서 worker 들(SharedTideFeed)이 업스트림 대신 읽게 함
+        self.share_path = share_path
+
+        # 커넥션 재사용 (매 요청마다 TCP/HTTP 연결을 새로 만들지 않음)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._data = None
+        self._fetched_at = None     # 마지막 성공 시각 (monotonic)
+        self._failed_at = None      # 마지막 실패 시각 (monotonic)
+        self._inflight = None       # 진행 중인 갱신의 완료 이벤트
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.stats = {
+            'hits': 0, 'misses': 0, 'stale_hits': 0, 'coalesced': 0,
+            'upstream_calls': 0, 'upstream_errors': 0,
+        }
+
+    # --- 업스트림 호출 ---
+    def _request_params(self):
+        now = datetime.now()
+        return {
+            'serviceKey': self.service_key,
+            'pageNo': '1',
+            'numOfRows': '24',
+            'stdt': (now - timedelta(days=1)).strftime('%Y-%m-%d'),
+            'eddt': now.strftime('%Y-%m-%d'),
+            '_type': 'xml'
+        }
+
+    def _fetch(self):
+        self.stats['upstream_calls'] += 1
+        response = self.session.get(self.url, params=self._request_params(), timeout=self.timeout)
+        response.raise_for_status()
+        return parse_tide_xml(response.content)
+
+    def _begin_refresh(self):
+        """lock 을 잡은 상태에서 호출. 새 갱신을 시작해야 하면 이벤트를, 이미 진행 중이면 None 반환"""
+        if self._inflight is not None:
+            return None
+        self._inflight = threading.Event()
+        return self._inflight
+
+    def _run_refresh(self, done):
+        t0 = time.perf_counter()
+        try:
+            data = self._fetch()
+            if data is None:
+                raise ValueError("응답에 수위 데이터가 없습니다")
+        except Exception as e:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - t0, 'error')
+            print(f"⚠️ API 오류: {e}")
+            with self._lock:
+                self.stats['upstream_errors'] += 1
+                self._failed_at = time.monotonic()
+        else:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - t0, 'ok')
+            with self._lock:
+                self._data = data
+                self._fetched_at = time.monotonic()
+                self._failed_at = None
+            if self.share_path:
+                self._publish(data)
+        finally:
+            with self._lock:
+                self._inflight = None
+            done.set()
+
+    def _publish(self, data):
+        # 임시 파일에 쓴 뒤 교체 (읽는 쪽이 반쯤 쓴 파일을 보지 않도록)
+        tmp = f"{self.share_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.share_path)), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'fetched_at': time.time(), 'data': data}, f, ensure_ascii=False)
+            os.replace(tmp, self.share_path)
+        except OSError as e:
+            print(f"⚠️ [주의] 조위 공유 캐시 기록 실패: {e}")
+
+    def refresh(self):
+        """강제 갱신 (진행 중인 갱신이 있으면 그 결과를 기다림)"""
+        with self._lock:
+            done = self._begin_refresh()
+            waiting = done or self._inflight
+        if done is not None:
+            self._run_refresh(done)
+        else:
+            waiting.wait(self.timeout + 1)
+
+    # --- 조회 ---
+    def get(self):
+        now = time.monotonic()
+        with self._lock:
+            age = None if self._fetched_at is None else now - self._fetched_at
+
+            if age is not None and age < self.ttl:
+                self.stats['hits'] += 1
+                return self._data
+
+            if age is not None and age < self.stale_ttl:
+                # 오래된 값을 먼저 돌려주고 갱신은 백그라운드에서
+                self.stats['stale_hits'] += 1
+                done = self._begin_refresh()
+                if done is not None:
+                    threading.Thread(target=self._run_refresh, args=(done,), daemon=True).start()
+                return self._data
+
+            self.stats['misses'] += 1
+            # 최근에 실패했다면 업스트림을 다시 두드리지 않고 바로 대체 데이터
+            if self._failed_at is not None and now - self._failed_at < self.error_ttl:
+                return self._data or FALLBACK_DATA
+
+            done = self._begin_refresh()
+            if done is None:
+                self.stats['coalesced'] += 1
+                waiting = self._inflight
+
+        if done is not None:
+            self._run_refresh(done)
+        else:
+            waiting.wait(self.timeout + 1)
+
+        with self._lock:
+            return self._data or FALLBACK_DATA
+
+    # --- 백그라운드 갱신 ---
+    def start(self, interval=None):
+        """ttl 이 끝나기 전에 주기적으로 갱신하는 쓰레드 시작"""
+        if self._thread is not None:
+            return
+        interval = interval or max(1.0, self.ttl * 0.8)
+
+        def loop():
+            while not self._stop.is_set():
+                self.refresh()
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            now = time.monotonic()
+            stats['age_seconds'] = None if self._fetched_at is None else round(now - self._fetched_at, 3)
+            stats['cached'] = self._data is not None
+            stats['refreshing'] = self._inflight is not None
+            stats['ttl'] = self.ttl
+            stats['stale_ttl'] = self.stale_ttl
+        return stats
+
+
+class SharedTideFeed:
+    """TideFeed 와 같은 조회 인터페이스 (get / get_stats / start / stop), 값은 수집 프로세스가 쓴 파일에서
+
+    serve.py 의 worker 마다 업스트림을 따로 부르지 않도록 K-water API 는 수집 프로세스의 TideFeed 만 호출.
+    파일이 바뀌었을 때만 다시 읽고, stale_ttl 보다 오래됐거나 없으면 대체 데이터.
+    """
+
+    def __init__(self, path, ttl=300, stale_ttl=3600):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self._lock = threading.Lock()
+        self._data = None
+        self._fetched_at = None     # 수집 프로세스가 받은 시각 (epoch 초)
+        self._mtime = None
+        self.stats = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'reloads': 0}
+
+    def _reload(self):
+        """lock 을 잡은 상태에서 호출. 파일이 바뀌었으면 다시 읽음"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._data, self._fetched_at, self._mtime = payload['data'], payload['fetched_at'], mtime
+        self.stats['reloads'] += 1
+
+    def get(self):
+        with self._lock:
+            self._reload()
+            age = None if self._fetched_at is None else time.time() - self._fetched_at
+            if age is not None and age < self.ttl:
+                self.stats['hits'] += 1
+                return self._data
+            if age is not None and age < self.stale_ttl:
+                self.stats['stale_hits'] += 1
+                return self._data
+            self.stats['misses'] += 1
+            return FALLBACK_DATA
+
+    # 갱신은 수집 프로세스가 하므로 할 일 없음
+    def start(self, interval=None):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_stats(self):
+        with self._lock:
+            self._reload()
+            stats = dict(self.stats)
+            stats['age_seconds'] = None if self._fetched_at is None else round(time.time() - self._fetched_at, 3)
+            stats['cached'] = self._data is not None
+            stats['ttl'] = self.ttl
+            stats['stale_ttl'] = self.stale_ttl
+            stats['mode'] = 'shared'
+        return stats